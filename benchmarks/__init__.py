@@ -0,0 +1 @@
+# Empty init file so benchmarks can be run with `python -m benchmarks.<name>`
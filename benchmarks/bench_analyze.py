@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Time `analyze` over synthetic step records: building the columnar table and the group-bys.
+
+    python -m benchmarks.bench_analyze --steps 100000
+"""
+
+import argparse
+import time
+
+from harness_debugger.analytics import DIMENSIONS, StepTable
+from tests.test_analytics import make_runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=100000, help="Step records to analyze (default: 100000)")
+    args = parser.parse_args()
+
+    runs = make_runs(args.steps // 3)
+
+    start = time.perf_counter()
+    table = StepTable(runs)
+    loaded = time.perf_counter()
+    for dimension in DIMENSIONS:
+        table.group_by(dimension)
+    grouped = time.perf_counter()
+
+    print(f"{len(table)} step records")
+    print(f"  load      {(loaded - start) * 1000:7.1f} ms")
+    print(f"  group-bys {(grouped - loaded) * 1000:7.1f} ms  ({', '.join(DIMENSIONS)})")
+    print(f"  total     {(grouped - start) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Normalize delegate listing entries: eager dicts (the previous normalizer) vs DelegateRecord.
+
+    python -m benchmarks.bench_delegates --delegates 10000
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+from harness_debugger.records import DelegateRecord
+from tests.stub_server import make_delegate
+
+
+def eager_dict(delegate):
+    """The dict the client built before DelegateRecord, formatting both timestamps up front."""
+    return {
+        "id": delegate.get("uuid"),
+        "name": delegate.get("name", "Unknown"),
+        "hostname": delegate.get("hostName", "Unknown"),
+        "ip": delegate.get("ip", "Unknown"),
+        "status": delegate.get("status", "Unknown"),
+        "version": delegate.get("version", "Unknown"),
+        "labels": delegate.get("selectors", []),
+        "last_heartbeat": datetime.fromtimestamp(int(delegate.get("lastHeartbeat", 0)) / 1000).strftime("%Y-%m-%d %H:%M:%S") if delegate.get("lastHeartbeat") else "Unknown",
+        "connected_at": datetime.fromtimestamp(int(delegate.get("connectedAt", 0)) / 1000).strftime("%Y-%m-%d %H:%M:%S") if delegate.get("connectedAt") else "Unknown",
+        "profile": delegate.get("delegateProfileId", "None")
+    }
+
+
+def measure(normalize, raw, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        [normalize(delegate) for delegate in raw]
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    records = [normalize(delegate) for delegate in raw]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return best, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delegates", type=int, default=10000, help="Delegates to normalize (default: 10000)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs; the best is reported (default: 5)")
+    args = parser.parse_args()
+
+    raw = [make_delegate(i) for i in range(args.delegates)]
+    for label, normalize in [("eager dict", eager_dict), ("DelegateRecord", DelegateRecord.from_api)]:
+        seconds, retained = measure(normalize, raw, args.runs)
+        print(f"{label:<15} {args.delegates / seconds:10.0f} delegates/s  {retained / args.delegates:6.0f} bytes/delegate retained")
+
+
+if __name__ == "__main__":
+    main()
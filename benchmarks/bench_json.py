@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Decode listing pages the two ways the client does: buffered vs streamed.
+
+"buffered" joins the downloaded chunks into one body and decodes it with the
+fast JSON backend (jsonlib.decode_page), as HarnessClient does for pages up to
+DEFAULT_STREAM_DECODE_BYTES; "streamed" feeds the chunks to the incremental
+jsonlib.read_page, as it does for larger pages. Each page is decoded and its
+items converted the way the client does it (DelegateRecord for delegate
+setup, failed-stage matching for execution summaries). Peak memory is traced
+from the first chunk on, so it includes the buffered body.
+
+    python -m benchmarks.bench_json --megabytes 1 8 32
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from harness_debugger.client import HarnessClient
+from harness_debugger.utils import jsonlib
+from harness_debugger.utils.constants import DEFAULT_JSON_CHUNK_SIZE, DEFAULT_STREAM_DECODE_BYTES
+from tests.stub_server import make_delegate, make_execution
+
+
+def make_page(make_item, megabytes):
+    """Download chunks of a listing body of about `megabytes`, in the {"data": {"content": [...]}} envelope."""
+    items, size, index = [], 0, 0
+    while size < megabytes * 1024 * 1024:
+        item = make_item(index)
+        items.append(item)
+        size += len(json.dumps(item)) + 2
+        index += 1
+    page = {"status": "SUCCESS", "data": {"totalPages": 1, "totalItems": len(items), "content": items}}
+    body = json.dumps(page).encode()
+    chunks = [body[start:start + DEFAULT_JSON_CHUNK_SIZE] for start in range(0, len(body), DEFAULT_JSON_CHUNK_SIZE)]
+    return chunks, len(body), len(items)
+
+
+def buffered(chunks, convert):
+    return jsonlib.decode_page(b"".join(chunks), convert)
+
+
+def streamed(chunks, convert):
+    return jsonlib.read_page(iter(chunks), convert)
+
+
+def measure(decode, chunks, convert, runs):
+    """Best decode time, and peak memory of one more run."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        decode(chunks, convert)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    page = decode(chunks, convert)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del page
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[1, 8, 32],
+                        help="Sizes of the synthetic pages (default: 1 8 32)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs; the best is reported (default: 5)")
+    args = parser.parse_args()
+
+    client = HarnessClient(api_key="bench", account_id="bench")
+    delegates = [make_delegate(i) for i in range(20)]
+    now_ms = int(time.time() * 1000)
+    kinds = [
+        ("delegate setup", make_delegate, client._delegate_item),
+        ("execution summary", lambda i: make_execution(i, delegates, now_ms)[0], client._failed_stage_item("build")),
+    ]
+    print(f"JSON backend: {jsonlib.backend()}; pages over {DEFAULT_STREAM_DECODE_BYTES / 1024 / 1024:g} MB "
+          f"are streamed by the client")
+
+    for label, make_item, convert in kinds:
+        for megabytes in args.megabytes:
+            chunks, size, count = make_page(make_item, megabytes)
+            print(f"\n{label}: {size / 1024 / 1024:.1f} MB, {count} items")
+            results = {name: measure(decode, chunks, convert, args.runs)
+                       for name, decode in (("buffered", buffered), ("streamed", streamed))}
+            for name, (seconds, peak) in results.items():
+                print(f"  {name:<9} {seconds * 1000:8.1f} ms  {peak / 1024 / 1024:8.1f} MB peak")
+            (fast, fast_peak), (slow, slow_peak) = results["buffered"], results["streamed"]
+            print(f"  buffered is {slow / fast:.1f}x faster; streamed needs {slow_peak / fast_peak:.0%} of its memory")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
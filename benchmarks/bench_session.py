@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Compare per-call requests.get against the pooled HarnessClient session.
+
+Runs both against the local stub gateway and reports requests/sec and the
+number of TCP connections the server accepted.
+
+    python -m benchmarks.bench_session --calls 500
+"""
+
+import argparse
+import time
+
+import requests
+
+from harness_debugger.client import HarnessClient
+from tests.stub_server import StubHarnessServer
+
+
+def bench_unpooled(server, calls):
+    """Baseline: module-level requests.get, one connection per call."""
+    url = f"{server.url}/api/setup/delegates/delegate-00000"
+    headers = {"x-api-key": "bench", "Content-Type": "application/json"}
+    for _ in range(calls):
+        response = requests.get(url, headers=headers, params={"accountIdentifier": "bench"})
+        response.raise_for_status()
+        response.json()
+
+
+def bench_pooled(server, calls):
+    """HarnessClient with its keep-alive session."""
+    with HarnessClient(api_key="bench", account_id="bench", gateway_url=server.url) as client:
+        for _ in range(calls):
+            client.get_delegate_info("delegate-00000")
+
+
+def run(name, func, server, calls):
+    server.reset_counters()
+    start = time.perf_counter()
+    func(server, calls)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {calls / elapsed:>10.1f} req/s  {elapsed:>7.3f}s  "
+          f"{server.connection_count:>5} connections")
+    return calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500, help="Requests per variant (default: 500)")
+    args = parser.parse_args()
+
+    with StubHarnessServer(delegates=1) as server:
+        before = run("unpooled", bench_unpooled, server, args.calls)
+        after = run("pooled", bench_pooled, server, args.calls)
+    print(f"speedup    {after / before:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Measure CLI startup: wall time of `harness-debugger --help` and the slowest imports.
+
+    python -m benchmarks.bench_startup --runs 20
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from tests.test_cli import import_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="Interpreter launches to time (default: 20)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list (default: 10)")
+    args = parser.parse_args()
+
+    for label, command in [
+        ("python -c pass", [sys.executable, "-c", "pass"]),
+        ("cli --help", [sys.executable, "-m", "harness_debugger.cli", "--help"]),
+    ]:
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{label:<16} median {statistics.median(samples):7.1f} ms  min {min(samples):7.1f} ms")
+
+    print(f"\nSlowest imports for harness_debugger.cli (cumulative):")
+    times = import_times("harness_debugger.cli")
+    for name, micros in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {micros / 1000:7.2f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Offline performance suite: run CLI commands against the local stub gateway at
+several data sizes and report wall time, API requests and peak RSS.
+
+Each command runs in a fresh interpreter, exactly as a user would invoke it,
+so startup and memory are measured too.
+
+    python -m benchmarks.bench_suite --sizes 100 1000 10000
+    python -m benchmarks.bench_suite --save baseline.json
+    python -m benchmarks.bench_suite --compare baseline.json --tolerance 0.25
+
+With --compare, the exit status is 1 if any scenario got slower, used more
+requests or more memory than the baseline allows.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from tests.stub_server import StubHarnessServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (CLI arguments, extra environment)
+SCENARIOS = {
+    "delegate list": (["delegate", "list"], {}),
+    "connector by-delegate": (["connector", "by-delegate", "pool-1", "pool-3"],
+                              {"HARNESS_ORG_ID": "default", "HARNESS_PROJECT_ID": "project"}),
+    "pipeline check": (["pipeline", "check", "--pipeline", "pipeline-1", "--stage", "build", "--days", "30",
+                        "--output-file", os.devnull], {}),
+}
+
+# Wall time is noisy on shared machines; requests and memory should be stable
+METRICS = ("seconds", "requests", "peak_rss_mb")
+
+
+def run_cli(server, arguments, env, output):
+    """Run the CLI once; return (seconds, peak RSS in MB, exit status)."""
+    # Don't let the caller's Harness settings leak into the run
+    inherited = {name: value for name, value in os.environ.items() if not name.startswith("HARNESS_")}
+    env = dict(inherited, HARNESS_API_KEY="bench", HARNESS_ACCOUNT_ID="bench",
+               HARNESS_GATEWAY_URL=server.url, PYTHONPATH=REPO_ROOT, **env)
+    command = [sys.executable, "-m", "harness_debugger.cli", "--no-cache", "--output", output, *arguments]
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env=env, cwd=REPO_ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_bytes = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return elapsed, rss_bytes / (1024 * 1024), process.returncode
+
+
+def run_suite(sizes, scenarios, output, latency, throttle_rate, error_rate, repeat):
+    results = []
+    for size in sizes:
+        with StubHarnessServer(delegates=size, connectors=size, executions=size, latency=latency,
+                               throttle_rate=throttle_rate, error_rate=error_rate) as server:
+            for name in scenarios:
+                arguments, env = SCENARIOS[name]
+                best = None
+                for _ in range(repeat):
+                    server.reset_counters()
+                    seconds, rss, status = run_cli(server, arguments, env, output)
+                    sample = {
+                        "scenario": name, "size": size, "seconds": round(seconds, 4),
+                        "requests": server.request_count, "peak_rss_mb": round(rss, 1),
+                        "throttled": server.throttled_count, "errors": server.error_count, "exit": status
+                    }
+                    if best is None or sample["seconds"] < best["seconds"]:
+                        best = sample
+                print(f"{name:<22} {size:>7}  {best['seconds']:8.3f}s  {best['requests']:>6} requests  "
+                      f"{best['peak_rss_mb']:7.1f} MB peak RSS"
+                      + (f"  exit {best['exit']}" if best["exit"] else ""), flush=True)
+                results.append(best)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print regressions against a baseline; return True if there were any."""
+    previous = {(r["scenario"], r["size"]): r for r in baseline}
+    regressed = False
+    for result in results:
+        before = previous.get((result["scenario"], result["size"]))
+        if before is None:
+            continue
+        for metric in METRICS:
+            if before[metric] and result[metric] > before[metric] * (1 + tolerance):
+                regressed = True
+                print(f"REGRESSION {result['scenario']} @ {result['size']}: {metric} "
+                      f"{before[metric]} -> {result[metric]}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Delegates, connectors and executions served by the stub (default: 100 1000 10000)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS),
+                        help="Scenarios to run (default: all)")
+    parser.add_argument("--output", choices=["text", "json", "ndjson"], default="json",
+                        help="CLI output format to exercise (default: json)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the fastest is kept (default: 1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stub adds to every response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--save", metavar="FILE", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed increase over the baseline before flagging a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.scenarios, args.output, args.latency,
+                        args.throttle_rate, args.error_rate, args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(results, json.load(f), args.tolerance):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
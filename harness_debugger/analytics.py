@@ -0,0 +1,146 @@
+"""Columnar failure-rate analytics over failed-run step records."""
+
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see extras_require["analytics"]
+    np = None
+
+# Dimensions StepTable can group by
+DIMENSIONS = ("delegate", "label", "version")
+
+class StepTable:
+    """
+    Step records from failed-run records, stored as parallel NumPy arrays
+
+    Strings (delegate IDs, versions, labels) are dictionary-encoded into integer
+    codes, so every aggregate is a bincount or a sort over flat arrays.
+    Delegates are grouped by ID, so two delegates sharing a name stay apart;
+    the name is only the label shown for the group. A step
+    can carry several labels; those are exploded into label_codes, with
+    label_steps holding the index of the step each label belongs to.
+
+    Args:
+        runs (Iterable[Dict]): Failed-run records as produced by get_failed_runs
+    """
+
+    def __init__(self, runs: Iterable[Dict]):
+        if np is None:
+            raise ImportError("Analytics require numpy. Install it with: pip install 'harness-debugger[analytics]'")
+
+        self.names = {dimension: {} for dimension in DIMENSIONS}
+        # Delegate ID -> name shown for it (the first one seen)
+        self.delegate_labels = {}
+        delegates, versions, durations, failed = [], [], [], []
+        label_codes, label_steps = [], []
+        delegate_names = self.names["delegate"]
+        version_names = self.names["version"]
+        label_names = self.names["label"]
+
+        for run in runs:
+            for step in run.get("delegates") or ():
+                delegate = step.get("delegate_info") or {}
+                step_index = len(failed)
+                delegate_id = delegate.get("id") or delegate.get("name") or "Unknown"
+                delegates.append(delegate_names.setdefault(delegate_id, len(delegate_names)))
+                self.delegate_labels.setdefault(delegate_id, delegate.get("name") or delegate_id)
+                version = delegate.get("version") or "Unknown"
+                versions.append(version_names.setdefault(version, len(version_names)))
+                duration = step.get("duration_ms")
+                durations.append(duration if duration is not None else np.nan)
+                failed.append(step.get("step_status") == "FAILED")
+                for label in delegate.get("labels") or ():
+                    label_codes.append(label_names.setdefault(label, len(label_names)))
+                    label_steps.append(step_index)
+
+        self.delegate_codes = np.asarray(delegates, dtype=np.int64)
+        self.version_codes = np.asarray(versions, dtype=np.int64)
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.failed = np.asarray(failed, dtype=bool)
+        self.label_codes = np.asarray(label_codes, dtype=np.int64)
+        self.label_steps = np.asarray(label_steps, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.failed)
+
+    def _columns(self, dimension: str):
+        """(group codes, failed flags, durations) for one dimension."""
+        if dimension == "delegate":
+            return self.delegate_codes, self.failed, self.durations
+        if dimension == "version":
+            return self.version_codes, self.failed, self.durations
+        if dimension == "label":
+            return self.label_codes, self.failed[self.label_steps], self.durations[self.label_steps]
+        raise ValueError(f"Unknown dimension {dimension!r}; expected one of {', '.join(DIMENSIONS)}")
+
+    def group_by(self, dimension: str, top: Optional[int] = None) -> List[Dict]:
+        """
+        Failure statistics per delegate, label or version
+
+        Args:
+            dimension (str): "delegate", "label" or "version"
+            top (int): Only return the groups with the most failures
+
+        Returns:
+            List[Dict]: One row per group with steps, failures, failure_rate,
+            failure_share (of all failed steps in the dimension) and p50_ms/p95_ms
+            step duration, sorted by failures then failure rate. Delegate rows
+            hold the name under "delegate" and the ID under "delegate_id".
+        """
+        codes, failed, durations = self._columns(dimension)
+        names = list(self.names[dimension])
+        groups = len(names)
+
+        steps = np.bincount(codes, minlength=groups)
+        failures = np.bincount(codes, weights=failed, minlength=groups)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            failure_rate = np.where(steps > 0, failures / steps, 0.0)
+        total_failures = failures.sum()
+        failure_share = failures / total_failures if total_failures else np.zeros(groups)
+        p50, p95 = _grouped_percentiles(codes, durations, groups, (0.50, 0.95))
+
+        order = np.lexsort((-failure_rate, -failures))
+        if top:
+            order = order[:top]
+        return [
+            {
+                **({"delegate": self.delegate_labels[names[code]], "delegate_id": names[code]}
+                   if dimension == "delegate" else {dimension: names[code]}),
+                "steps": int(steps[code]),
+                "failures": int(failures[code]),
+                "failure_rate": float(failure_rate[code]),
+                "failure_share": float(failure_share[code]),
+                "p50_ms": None if np.isnan(p50[code]) else float(p50[code]),
+                "p95_ms": None if np.isnan(p95[code]) else float(p95[code])
+            }
+            for code in order
+        ]
+
+def _grouped_percentiles(codes, values, groups: int, quantiles) -> List:
+    """
+    Percentiles of values per group code, for all groups at once
+
+    Sorts by (group, value) once and interpolates linearly between the
+    closest ranks, which matches numpy.percentile's default method. NaN values
+    are ignored; groups without values get NaN.
+    """
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    order = np.lexsort((values, codes))
+    values = values[order]
+    counts = np.bincount(codes, minlength=groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    results = []
+    for quantile in quantiles:
+        position = (counts - 1) * quantile
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        has_values = counts > 0
+        lower_values = np.full(groups, np.nan)
+        upper_values = np.full(groups, np.nan)
+        lower_values[has_values] = values[(starts + lower)[has_values]]
+        upper_values[has_values] = values[(starts + upper)[has_values]]
+        results.append(lower_values + (upper_values - lower_values) * (position - lower))
+    return results
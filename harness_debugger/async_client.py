@@ -0,0 +1,463 @@
+"""Asyncio counterpart to HarnessClient, for embedding in async services."""
+
+import asyncio
+import inspect
+import sys
+import threading
+from typing import Callable, Container, Dict, List, Optional, Union
+
+from colorama import Fore
+
+from harness_debugger.client import (BaseHarnessClient, HarnessAPIError, IDEMPOTENT_METHODS,
+                                     RETRY_STATUS_CODES, RequestSpec)
+from harness_debugger.errors import RequestRefused
+from harness_debugger.connector_index import ConnectorIndex
+from harness_debugger.log_scan import LineSplitter, log_text
+from harness_debugger.probes import connectivity_commands
+from harness_debugger.profiling import RequestEvent
+from harness_debugger.resolver import AsyncDelegateResolver
+from harness_debugger.scheduler import parse_retry_after
+from harness_debugger.utils import jsonlib
+from harness_debugger.utils.concurrency import gather_bounded
+from harness_debugger.utils.constants import *
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency, see extras_require["async"]
+    aiohttp = None
+
+class AsyncHarnessClient(BaseHarnessClient):
+    """
+    Harness API client built on one aiohttp connection pool
+
+    Every request passes through a semaphore, so callers can fan out thousands
+    of lookups with asyncio.gather without exceeding max_concurrency in-flight
+    requests. Requests first queue on a semaphore of their endpoint class, so
+    at most max_concurrency of each class wait on the scheduler at a time.
+    Methods mirror HarnessClient and return the same records.
+    """
+
+    def __init__(self, api_key=None, account_id=None, org_id=None, project_id=None,
+                 pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR, gateway_url=None,
+                 max_concurrency=DEFAULT_ASYNC_CONCURRENCY, cache=None, refresh_cache=False,
+                 scheduler=None, on_request=None, timeout=DEFAULT_REQUEST_TIMEOUT, breakers=None):
+        if aiohttp is None:
+            raise ImportError("AsyncHarnessClient requires aiohttp. Install it with: pip install 'harness-debugger[async]'")
+        super().__init__(api_key=api_key, account_id=account_id, org_id=org_id,
+                         project_id=project_id, pool_size=pool_size, max_retries=max_retries,
+                         backoff_factor=backoff_factor, gateway_url=gateway_url,
+                         cache=cache, refresh_cache=refresh_cache, scheduler=scheduler,
+                         on_request=on_request, timeout=timeout, breakers=breakers)
+        self.max_concurrency = max_concurrency
+        # Created on first use so they bind to the running event loop
+        self._session = None
+        self._semaphore = None
+        self._endpoint_semaphores = {}
+        self._connector_index = None
+        self.delegate_resolver = AsyncDelegateResolver(self.get_delegate_info, self.iter_delegates)
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def _endpoint_semaphore(self, endpoint_class: str) -> asyncio.Semaphore:
+        """Semaphore bounding the requests of one endpoint class that wait on the scheduler at once."""
+        semaphore = self._endpoint_semaphores.get(endpoint_class)
+        if semaphore is None:
+            semaphore = self._endpoint_semaphores[endpoint_class] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _request(self, method: str, url: str, idempotent: Optional[bool] = None,
+                       event: Optional[RequestEvent] = None, **kwargs) -> Union[bytes, "aiohttp.ClientResponse"]:
+        """
+        Send a request through the shared pool and return the response body
+
+        Admission, retries, 429 handling, timeouts, the deadline and circuit
+        breakers follow the same rules as HarnessClient._request; waiting for
+        the scheduler never blocks the loop. With stream=True the unread
+        response is returned instead, and the caller must release() it; its
+        timeout then applies to each read rather than to the whole body.
+        """
+        session = self._get_session()
+        stream = kwargs.pop("stream", False)
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        endpoint_class = self._endpoint_class(url)
+        if event is None:
+            event = RequestEvent(self._endpoint_name(method, url), endpoint_class)
+        breaker = self.breakers.get(event.endpoint)
+        attempts = self.max_retries + 1
+
+        for attempt in range(attempts):
+            last_attempt = attempt + 1 >= attempts
+            retry_after = None
+            event.retries = attempt
+            trial = breaker.before_call()
+            # Only a response or a failure of the endpoint counts; a 429 or the deadline leaves it at None
+            outcome = None
+            try:
+                # Queue per endpoint class before the scheduler, so a throttled class cannot starve the others
+                async with self._endpoint_semaphore(endpoint_class):
+                    slot = await self.scheduler.acquire_async(endpoint_class, self.deadline)
+                    try:
+                        async with self._semaphore:
+                            seconds = self._attempt_timeout()
+                            if stream:
+                                timeout = aiohttp.ClientTimeout(sock_connect=seconds, sock_read=seconds)
+                            else:
+                                timeout = aiohttp.ClientTimeout(total=seconds)
+                            response = await session.request(method, url, timeout=timeout, **kwargs)
+                            try:
+                                slot.status = event.status = response.status
+                                if response.status != 429:
+                                    outcome = response.status < 500
+                                if response.status == 429:
+                                    slot.retry_after = retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                                    event.throttled += 1
+                                    retryable = True
+                                else:
+                                    retryable = idempotent and response.status in RETRY_STATUS_CODES
+                                if last_attempt or not retryable:
+                                    response.raise_for_status()
+                                    if stream:
+                                        streamed, response = response, None
+                                        return streamed
+                                    body = await response.read()
+                                    event.bytes = len(body)
+                                    return body
+                            finally:
+                                if response is not None:
+                                    response.release()
+                    except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                        # A timeout cut short by the deadline says nothing about the endpoint
+                        if isinstance(e, asyncio.TimeoutError) and self._cut_by_deadline(seconds):
+                            raise self.deadline.error() from e
+                        outcome = False
+                        if last_attempt or not idempotent:
+                            if not isinstance(e, aiohttp.ClientError):
+                                # Surface our own timeout as a ClientError, like requests' Timeout in the sync client
+                                raise aiohttp.ServerTimeoutError(f"{method} {url} timed out after {seconds:g}s") from e
+                            raise
+                    finally:
+                        self.scheduler.release(slot)
+            finally:
+                breaker.record(outcome, trial)
+            if retry_after is None:
+                await asyncio.sleep(self._backoff_within_deadline(self._backoff_delay(attempt)))
+
+    async def _call(self, spec: RequestSpec, item: Optional[Callable] = None) -> Dict:
+        """Execute a RequestSpec, consulting the response cache, and return its data block (see HarnessClient._call)."""
+        method, url, kwargs = spec
+        with self._instrumented(method, url) as event:
+            key = self._cache_key(spec)
+            cached = self._cached_response(key, item)
+            if cached is not None:
+                event.cache_hit = True
+                return self._unwrap(cached)
+
+            body = await self._request(method, url, event=event, **self._transport_kwargs(kwargs))
+            data = self._unwrap(jsonlib.loads(body) if item is None else jsonlib.decode_page(body, item))
+            if key is not None:
+                self.cache.set(key, kwargs["cache_resource"], body.decode("utf-8"))
+            return data
+
+    async def close(self):
+        """Release pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def iter_step_log(self, log_key: str, chunk_size: int = DEFAULT_LOG_CHUNK_SIZE,
+                            max_line_length: int = DEFAULT_LOG_MAX_LINE_LENGTH):
+        """Stream the log of a pipeline step line by line, like HarnessClient.iter_step_log."""
+        method, url, kwargs = self._step_log_request(log_key)
+        with self._instrumented(method, url) as event:
+            response = await self._request(method, url, event=event, stream=True, **kwargs)
+            try:
+                splitter = LineSplitter(max_line_length)
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    if self.deadline is not None:
+                        self.deadline.check()
+                    event.bytes += len(chunk)
+                    for line in log_text(splitter.feed(chunk)):
+                        yield line
+                for line in log_text(splitter.close()):
+                    yield line
+            finally:
+                response.release()
+
+    async def _iter_pages(self, fetch_page, page_size: int, max_workers: int = DEFAULT_PAGE_WORKERS):
+        """
+        Yield every page of a listing in order (see HarnessClient._iter_pages)
+
+        Pages after the first are fetched max_workers at a time, a window of
+        twice that many at once, so a long listing neither floods the pool
+        nor is held in memory whole.
+        """
+        first_page = await fetch_page(0, page_size)
+        yield first_page
+
+        total_pages = int(first_page.get("totalPages") or 1)
+        workers = max(1, min(max_workers, self.pool_size))
+        window = 2 * workers
+        for start in range(1, total_pages, window):
+            indexes = range(start, min(start + window, total_pages))
+            for page in await gather_bounded((fetch_page(index, page_size) for index in indexes), workers):
+                yield page
+
+    async def get_delegate_info(self, delegate_id: str) -> Dict:
+        """Get information about a specific delegate (see HarnessClient.get_delegate_info)."""
+        try:
+            return self._normalize_delegate(await self._call(self._delegate_info_request(delegate_id)))
+        except HarnessAPIError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error getting delegate info: {e}", file=sys.stderr)
+            return {}
+        except aiohttp.ClientError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for delegate info: {e}", file=sys.stderr)
+            return {}
+
+    async def test_delegate_connectivity(self, delegate_id: str, urls: Optional[List[str]] = None) -> Dict:
+        """Build the commands that test a delegate's connectivity (see HarnessClient.test_delegate_connectivity)."""
+        delegate = await self.get_delegate_info(delegate_id)
+        if not delegate:
+            return {}
+        return {"delegate": delegate, "connectivity_tests": connectivity_commands(urls or DEFAULT_CONNECTIVITY_URLS)}
+
+    async def iter_delegates(self, page_size: int = DEFAULT_PAGE_SIZE,
+                             max_workers: int = DEFAULT_PAGE_WORKERS):
+        """Iterate over every delegate in the account, in listing order."""
+        fetch_page = lambda page_index, size: self._call(self._delegate_page_request(page_index, size),
+                                                         item=self._delegate_item)
+        async for page in self._iter_pages(fetch_page, page_size, max_workers):
+            for delegate in page.get("content") or []:
+                yield delegate
+
+    async def stream_delegates(self, page_size: int = DEFAULT_PAGE_SIZE,
+                               max_workers: int = DEFAULT_PAGE_WORKERS):
+        """Like iter_delegates, but API errors are reported and end the stream."""
+        try:
+            async for delegate in self.iter_delegates(page_size, max_workers):
+                yield delegate
+        except RequestRefused as e:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}Stopped listing delegates: {e}", file=sys.stderr)
+        except HarnessAPIError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error listing delegates: {e}", file=sys.stderr)
+        except aiohttp.ClientError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for delegates: {e}", file=sys.stderr)
+
+    async def get_all_delegates(self, page_size: int = DEFAULT_PAGE_SIZE,
+                                max_workers: int = DEFAULT_PAGE_WORKERS) -> Dict[str, Dict]:
+        """Get all delegates in the account, following every page of the listing (see HarnessClient.get_all_delegates)."""
+        delegates = {}
+        try:
+            async for delegate in self.iter_delegates(page_size, max_workers):
+                delegates[delegate["id"]] = delegate
+            return delegates
+        except RequestRefused as e:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW} Stopped listing delegates after {len(delegates)}: {e}", file=sys.stderr)
+            return delegates
+        except HarnessAPIError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED} API returned error: {e}", file=sys.stderr)
+            return {}
+        except aiohttp.ClientError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for delegates: {e}", file=sys.stderr)
+            return {}
+
+    async def iter_connectors(self, page_size: int = DEFAULT_PAGE_SIZE,
+                              max_workers: int = DEFAULT_PAGE_WORKERS):
+        """Iterate over connectors at account, org and project scope."""
+        for org_id, project_id in self._connector_scopes():
+            fetch_page = lambda page_index, size: self._call(
+                self._connector_page_request(page_index, size, org_id, project_id))
+            async for page in self._iter_pages(fetch_page, page_size, max_workers):
+                for item in page.get("content") or []:
+                    yield self._normalize_connector(item)
+
+    async def stream_connectors(self, page_size: int = DEFAULT_PAGE_SIZE,
+                                max_workers: int = DEFAULT_PAGE_WORKERS):
+        """Like iter_connectors, but API errors are reported and end the stream."""
+        try:
+            async for connector in self.iter_connectors(page_size, max_workers):
+                yield connector
+        except RequestRefused as e:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}Stopped listing connectors: {e}", file=sys.stderr)
+        except HarnessAPIError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error listing connectors: {e}", file=sys.stderr)
+        except aiohttp.ClientError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for connectors: {e}", file=sys.stderr)
+
+    def with_scope(self, org_id: Optional[str] = None, project_id: Optional[str] = None) -> "AsyncHarnessClient":
+        """See BaseHarnessClient.with_scope. Call it on the event loop, so the shared pool exists."""
+        self._get_session()
+        return super().with_scope(org_id, project_id)
+
+    async def iter_projects(self, page_size: int = DEFAULT_PAGE_SIZE,
+                            max_workers: int = DEFAULT_PAGE_WORKERS):
+        """Iterate over the identifiers of the projects in the configured org."""
+        fetch_page = lambda page_index, size: self._call(self._project_page_request(page_index, size))
+        async for page in self._iter_pages(fetch_page, page_size, max_workers):
+            for item in page.get("content") or []:
+                yield (item.get("project") or {}).get("identifier")
+
+    async def iter_pipelines(self, page_size: int = DEFAULT_PAGE_SIZE,
+                             max_workers: int = DEFAULT_PAGE_WORKERS):
+        """Iterate over the identifiers of the pipelines in the configured project."""
+        fetch_page = lambda page_index, size: self._call(self._pipeline_page_request(page_index, size))
+        async for page in self._iter_pages(fetch_page, page_size, max_workers):
+            for item in page.get("content") or []:
+                yield item.get("identifier")
+
+    async def connector_index(self) -> Optional[ConnectorIndex]:
+        """Selector-to-connector index built from one sweep, kept for the lifetime of the client."""
+        if self._connector_index is None:
+            try:
+                self._connector_index = ConnectorIndex([c async for c in self.iter_connectors()])
+            except HarnessAPIError as e:
+                print(f"{EMOJI_ERROR}{Fore.RED}Error listing connectors: {e}", file=sys.stderr)
+            except aiohttp.ClientError as e:
+                print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for connectors: {e}", file=sys.stderr)
+        return self._connector_index
+
+    async def find_connectors(self, selectors, match_all: bool = False) -> List[Dict]:
+        """Find connectors by delegate selectors (see HarnessClient.find_connectors)."""
+        index = await self.connector_index()
+        return index.match(selectors, match_all) if index else []
+
+    async def get_connectors(self, selector: Optional[str] = None) -> List[Dict]:
+        """Get connectors at account, org and project scope, optionally filtered by delegate selector."""
+        if selector:
+            return await self.find_connectors([selector])
+        index = await self.connector_index()
+        return index.connectors if index else []
+
+    async def resolve_delegates(self, delegate_ids) -> Dict[str, Dict]:
+        """Resolve many delegate IDs at once, deduplicated, coalesced and cached (see HarnessClient.resolve_delegates)."""
+        return await self.delegate_resolver.resolve(delegate_ids)
+
+    async def _failed_run(self, summary: Dict, stage_node: Dict) -> Dict:
+        detail = await self._call(self._execution_detail_request(
+            summary.get("planExecutionId"), stage_node.get("nodeUuid")))
+
+        resolved = await self.resolve_delegates(self._step_delegate_ids(detail))
+        return self._failed_run_record(summary, stage_node, detail, resolved.get)
+
+    async def iter_failed_runs(self, stage_name: str, pipeline_id: str, days: int = 7,
+                               page_size: int = DEFAULT_PAGE_SIZE,
+                               max_workers: int = DEFAULT_DETAIL_WORKERS,
+                               since_ms: Optional[int] = None, exclude: Container[str] = ()):
+        """
+        Stream failed runs of a pipeline stage, newest first (see HarnessClient.iter_failed_runs)
+
+        Stage details for each page are fetched concurrently, at most
+        max_workers at a time, and yielded before the next page is requested.
+        """
+        workers = asyncio.Semaphore(max_workers)
+
+        async def failed_run(summary, stage_node):
+            async with workers:
+                return await self._failed_run(summary, stage_node)
+
+        start_ms, end_ms = self._time_window(days, since_ms)
+        fetch_page = lambda page_index, size: self._call(
+            self._execution_page_request(pipeline_id, start_ms, end_ms, page_index, size),
+            item=self._failed_stage_item(stage_name, exclude))
+
+        page_index, total_pages = 0, 1
+        while page_index < total_pages:
+            page = await fetch_page(page_index, page_size)
+            total_pages = int(page.get("totalPages") or 1)
+            page_index += 1
+
+            failed = page.get("content") or []
+            for run in await gather_bounded(failed_run(*run) for run in failed):
+                yield run
+
+    async def get_failed_runs(self, stage_name: str, pipeline_id: str, days: int = 7,
+                              page_size: int = DEFAULT_PAGE_SIZE,
+                              max_workers: int = DEFAULT_DETAIL_WORKERS,
+                              since_ms: Optional[int] = None, exclude: Container[str] = ()):
+        """Like iter_failed_runs, but API errors are reported and end the stream."""
+        try:
+            async for run in self.iter_failed_runs(stage_name, pipeline_id, days, page_size, max_workers,
+                                                   since_ms, exclude):
+                yield run
+        except RequestRefused as e:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}Stopped listing pipeline executions: {e}", file=sys.stderr)
+        except HarnessAPIError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error listing pipeline executions: {e}", file=sys.stderr)
+        except aiohttp.ClientError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for pipeline executions: {e}", file=sys.stderr)
+
+class BlockingAsyncClient:
+    """
+    Drive an AsyncHarnessClient through the synchronous HarnessClient interface
+
+    The async client runs on a private event loop in a background thread.
+    Coroutine methods become blocking calls and async generators become
+    plain generators, so the command modules can use either client.
+    """
+
+    def __init__(self, async_client: AsyncHarnessClient):
+        self._client = async_client
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _iterate(self, async_iterator):
+        while True:
+            try:
+                yield self._run(async_iterator.__anext__())
+            except StopAsyncIteration:
+                return
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if inspect.iscoroutinefunction(attr):
+            return lambda *args, **kwargs: self._run(attr(*args, **kwargs))
+        if inspect.isasyncgenfunction(attr):
+            return lambda *args, **kwargs: self._iterate(attr(*args, **kwargs))
+        return attr
+
+    def _view(self, derive) -> "BlockingAsyncClient":
+        """A blocking view of derive(async client), built on the event loop and sharing it."""
+        async def derived():
+            return derive(self._client)
+
+        # Built by hand: copy.copy would consult __getattr__ before _client exists
+        view = object.__new__(BlockingAsyncClient)
+        view.__dict__.update(self.__dict__, _client=self._run(derived()))
+        return view
+
+    def with_scope(self, org_id: Optional[str] = None, project_id: Optional[str] = None) -> "BlockingAsyncClient":
+        """Blocking view of AsyncHarnessClient.with_scope, sharing this client's event loop."""
+        return self._view(lambda client: client.with_scope(org_id, project_id))
+
+    def refreshing(self) -> "BlockingAsyncClient":
+        """Blocking view of AsyncHarnessClient.refreshing, sharing this client's event loop."""
+        return self._view(lambda client: client.refreshing())
+
+    def close(self):
+        """Close the async client and stop its event loop."""
+        self._run(self._client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
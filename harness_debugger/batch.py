@@ -0,0 +1,207 @@
+"""Run many CLI commands in one process with a shared client (harness-debugger batch)."""
+
+import argparse
+import io
+import re
+import shlex
+import sys
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Dict, Iterable, List, Optional, TextIO
+
+from colorama import Fore
+
+from harness_debugger.errors import RequestRefused
+from harness_debugger.utils import jsonlib
+from harness_debugger.utils.concurrency import ordered_map
+from harness_debugger.utils.constants import *
+from harness_debugger.utils.output import ThreadOutput
+
+_ANSI_CODE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+# Global options that configure the shared client or the whole run; on a batch line they are ignored
+BATCH_OPTIONS = {"api_key", "account", "pool_size", "max_retries", "use_async", "no_cache", "refresh",
+                 "cache_stats", "rate_limit", "scheduler_stats", "profile", "profile_output",
+                 "profile_format", "profile_label", "pager", "profiles", "all_profiles", "profiles_file",
+                 "deadline", "request_timeout", "breaker_failures"}
+
+class BatchCommand:
+    """One line of a batch: its text, parsed arguments, and once run, exit code and output."""
+
+    __slots__ = ("index", "line", "args", "exit_code", "stdout", "stderr")
+
+    def __init__(self, index: int, line: str, args: Optional[argparse.Namespace] = None,
+                 exit_code: Optional[int] = None, stderr: str = ""):
+        self.index = index
+        self.line = line
+        self.args = args
+        self.exit_code = exit_code
+        self.stdout = ""
+        self.stderr = stderr
+
+def read_batch_lines(stream: TextIO) -> Iterable[str]:
+    """Yield the commands in a batch file: blank lines and # comments are skipped."""
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+def parse_batch(parser: argparse.ArgumentParser, batch_args: argparse.Namespace,
+                lines: Iterable[str]) -> List[BatchCommand]:
+    """
+    Parse batch lines with the CLI's own parser
+
+    Every line is a command as it would follow `harness-debugger` (a leading
+    "harness-debugger" is accepted too). Global options not given on the line
+    are inherited from the batch command line; in json/ndjson batches the
+    commands default to --output json. Options that configure the client
+    (credentials, pool, cache, rate limits, profiling) come from the batch
+    command line only.
+
+    Returns:
+        List[BatchCommand]: One per line; lines that do not parse already carry
+            exit code 2 and argparse's message
+    """
+    inherited = {
+        action.dest: getattr(batch_args, action.dest)
+        for action in parser._actions
+        if action.dest not in ("help", "command") and not isinstance(action, argparse._SubParsersAction)
+    }
+    if batch_args.output != "text":
+        inherited["output"] = "json"
+
+    commands = []
+    for index, line in enumerate(lines, 1):
+        messages = io.StringIO()
+        try:
+            tokens = shlex.split(line)
+            if tokens and tokens[0] == "harness-debugger":
+                tokens = tokens[1:]
+            with redirect_stdout(messages), redirect_stderr(messages):
+                args = parser.parse_args(tokens, namespace=argparse.Namespace(**inherited))
+        except ValueError as e:
+            commands.append(BatchCommand(index, line, exit_code=2, stderr=f"{e}\n"))
+            continue
+        except SystemExit as e:
+            # Usage errors exit with 2; --help exits with 0 after printing
+            commands.append(BatchCommand(index, line, exit_code=e.code or 0, stderr=messages.getvalue()))
+            continue
+
+        if not args.command or args.command == "batch":
+            message = "batch lines cannot run batch" if args.command else "no command given"
+            commands.append(BatchCommand(index, line, exit_code=2, stderr=f"{message}\n"))
+            continue
+        for option in BATCH_OPTIONS:
+            setattr(args, option, inherited[option])
+        commands.append(BatchCommand(index, line, args))
+    return commands
+
+def run_batch(cli, args, client) -> int:
+    """
+    Run the commands of a batch file on one shared client
+
+    Commands run concurrently on args.workers threads, sharing the client's
+    connection pool, scheduler, delegate lookups and in-memory response
+    cache. Each command's output is captured and printed in input order as
+    soon as it and the commands before it have finished: in text mode under
+    a "==> command <==" header, in json/ndjson mode as one record per command
+    with the decoded JSON output.
+
+    Args:
+        cli (HarnessDebuggerCLI): Parses each line and dispatches it
+        args (argparse.Namespace): The batch command's arguments
+        client: Shared HarnessClient or BlockingAsyncClient
+
+    Returns:
+        int: 0 if every command succeeded, otherwise 1
+    """
+    if args.file == "-":
+        commands = parse_batch(cli.parser, args, read_batch_lines(sys.stdin))
+    else:
+        try:
+            with open(args.file) as f:
+                commands = parse_batch(cli.parser, args, read_batch_lines(f))
+        except OSError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Could not read batch file {args.file}: {e}", file=sys.stderr)
+            return 1
+
+    stdout, stderr = ThreadOutput(sys.stdout), ThreadOutput(sys.stderr)
+    scoped_clients = {}
+    scope_lock = threading.Lock()
+
+    def client_for(command_args):
+        scope = (command_args.org or client.org_id, command_args.project or client.project_id)
+        if scope == (client.org_id, client.project_id):
+            return client
+        with scope_lock:
+            if scope not in scoped_clients:
+                scoped_clients[scope] = client.with_scope(*scope)
+            return scoped_clients[scope]
+
+    def run(command):
+        if command.args is None:
+            return command
+        out, err = io.StringIO(), io.StringIO()
+        stdout.capture(out)
+        stderr.capture(err)
+        try:
+            command.exit_code = cli._dispatch(command.args, client_for(command.args))
+        except RequestRefused as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Stopped: {e}", file=err)
+            command.exit_code = EXIT_INCOMPLETE
+        except Exception as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}{type(e).__name__}: {e}", file=err)
+            command.exit_code = 1
+        finally:
+            stdout.capture(None)
+            stderr.capture(None)
+        command.stdout, command.stderr = out.getvalue(), err.getvalue()
+        return command
+
+    failed = 0
+    records = []
+    sys.stdout, sys.stderr = stdout, stderr
+    try:
+        for command in ordered_map(run, commands, max_workers=args.workers):
+            failed += bool(command.exit_code)
+            if args.output == "text":
+                _print_text(command, stdout._stream, stderr._stream)
+            elif args.output == "ndjson":
+                print(jsonlib.dumps(_record(command)), file=stdout._stream, flush=True)
+            else:
+                records.append(_record(command))
+    finally:
+        sys.stdout, sys.stderr = stdout._stream, stderr._stream
+
+    if args.output == "json":
+        print(jsonlib.dumps(records, indent=2))
+    return 1 if failed else 0
+
+def _print_text(command: BatchCommand, stdout: TextIO, stderr: TextIO):
+    status = f" {Fore.RED}(exit {command.exit_code})" if command.exit_code else ""
+    print(f"{Fore.CYAN}==> [{command.index}] {command.line} <=={status}", file=stdout)
+    stdout.write(command.stdout)
+    if command.stdout and not command.stdout.endswith("\n"):
+        stdout.write("\n")
+    stdout.flush()
+    if command.stderr:
+        stderr.write(command.stderr)
+        stderr.flush()
+
+def _decode(text: str):
+    """Parse a command's JSON (or NDJSON) output; anything else is returned as plain text."""
+    try:
+        return jsonlib.loads(text)
+    except ValueError:
+        pass
+    try:
+        return [jsonlib.loads(line) for line in text.splitlines() if line.strip()]
+    except ValueError:
+        return _ANSI_CODE.sub("", text)
+
+def _record(command: BatchCommand) -> Dict:
+    record = {"index": command.index, "command": command.line, "exit_code": command.exit_code,
+              "output": _decode(command.stdout) if command.stdout.strip() else None}
+    if command.stderr:
+        record["stderr"] = _ANSI_CODE.sub("", command.stderr)
+    return record
@@ -0,0 +1,278 @@
+"""Persistent TTL cache for Harness API responses."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from harness_debugger.utils.constants import DEFAULT_CACHE_MAX_BYTES, DEFAULT_CACHE_TTLS
+from harness_debugger.utils.paths import default_cache_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    resource TEXT NOT NULL,
+    body TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+class _KeyLocks:
+    """Per-key locks, created on demand and dropped when nobody holds or waits for them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}  # key -> [lock, users]
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[bool]:
+        """Hold the lock for key; yields True if another thread held it first."""
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        waited = not entry[0].acquire(blocking=False)
+        if waited:
+            entry[0].acquire()
+        try:
+            yield waited
+        finally:
+            entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+class ResponseCache:
+    """
+    SQLite-backed cache of raw response bodies
+
+    Entries expire after a per-resource TTL and the total body size is capped,
+    evicting the least recently used entries first. One cache file can be
+    shared by concurrent CLI processes; a single instance is thread-safe.
+
+    Args:
+        path (str): SQLite file (defaults to responses.sqlite3 in the cache directory)
+        ttls (Dict[str, float]): TTL in seconds per resource; resources without a TTL are not cached
+        max_bytes (int): Cap on the total size of cached bodies
+    """
+
+    def __init__(self, path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None,
+                 max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.path = path or os.path.join(default_cache_dir(), "responses.sqlite3")
+        self.ttls = dict(DEFAULT_CACHE_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._fetching = _KeyLocks()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    @staticmethod
+    def make_key(scope, method: str, url: str, params=None, body=None) -> str:
+        """Build a cache key from the account/org/project scope, endpoint and parameters."""
+        material = json.dumps([list(scope), method.upper(), url, params or {}, body or {}],
+                              sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def caches(self, resource: Optional[str]) -> bool:
+        """Whether responses for this resource are cached at all."""
+        return bool(resource) and self.ttls.get(resource, 0) > 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached body for key, or None if it is missing or expired."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return (body, expires_at) for key, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0], row[1]
+
+    def fetching(self, key: str):
+        """
+        Context manager held while fetching the response for a missed key
+
+        Threads that miss the same key wait for the first one; it yields True
+        when another thread fetched first, so the caller should look again.
+        """
+        return self._fetching.hold(key)
+
+    def set(self, key: str, resource: str, body: str):
+        """Store a response body under key with the TTL of its resource."""
+        if not self.caches(resource):
+            return
+        now = time.time()
+        size = len(body.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, resource, body, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, resource, body, size, now + self.ttls[resource], now)
+            )
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this instance plus the current size of the cache."""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "path": self.path
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class MemoryCache:
+    """
+    In-process response cache, optionally in front of a ResponseCache
+
+    Used when several commands share one client (harness-debugger batch):
+    bodies are served from a dict instead of SQLite, and without a backing
+    cache the commands still share responses. Entries keep the TTL of their
+    resource (or the backing entry's expiry) and the least recently used
+    are dropped beyond max_bytes. Implements the ResponseCache interface
+    used by the clients; thread-safe.
+
+    Args:
+        backing (ResponseCache): Persistent cache to read through and write to
+        ttls (Dict[str, float]): TTL in seconds per resource (defaults to the backing cache's)
+        max_bytes (int): Cap on the total size of bodies held in memory
+    """
+
+    make_key = staticmethod(ResponseCache.make_key)
+
+    def __init__(self, backing: Optional[ResponseCache] = None, ttls: Optional[Dict[str, float]] = None,
+                 max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.backing = backing
+        self.ttls = dict(backing.ttls if backing is not None else DEFAULT_CACHE_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (body, size, expires_at)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._fetching = _KeyLocks()
+
+    def caches(self, resource: Optional[str]) -> bool:
+        """Whether responses for this resource are cached at all."""
+        return bool(resource) and self.ttls.get(resource, 0) > 0
+
+    def _store(self, key: str, body: str, expires_at: float):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous[1]
+        self._entries[key] = (body, size, expires_at)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self._size -= evicted
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached body for key, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        stored = self.backing.get_entry(key) if self.backing is not None else None
+        with self._lock:
+            if stored is None:
+                self.misses += 1
+                return None
+            self._store(key, *stored)
+            self.hits += 1
+            return stored[0]
+
+    def fetching(self, key: str):
+        """Context manager held while fetching a missed key (see ResponseCache.fetching)."""
+        return self._fetching.hold(key)
+
+    def set(self, key: str, resource: str, body: str):
+        """Store a response body under key with the TTL of its resource."""
+        if not self.caches(resource):
+            return
+        with self._lock:
+            self._store(key, body, time.time() + self.ttls[resource])
+        if self.backing is not None:
+            self.backing.set(key, resource, body)
+
+    def clear(self):
+        """Remove every cached response, including the backing cache's."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if self.backing is not None:
+            self.backing.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for lookups through this cache and the size held in memory."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "path": "memory" if self.backing is None else f"memory over {self.backing.path}"
+            }
+
+    def close(self):
+        if self.backing is not None:
+            self.backing.close()
@@ -1,32 +1,46 @@
-"""Command-line interface for the Harness Debugger tool."""
+"""Command-line interface for the Harness Debugger tool.
+
+Startup cost matters here because the CLI runs in hot pipeline steps, so this
+module only imports the standard library and constants. Command modules, the
+API client and third-party packages are imported when a command needs them.
+"""
 
 import argparse
 import sys
 import os
-from colorama import init, Fore, Style
-from dotenv import load_dotenv
 
-from harness_debugger.client import HarnessClient
 from harness_debugger.utils.constants import *
-from harness_debugger.utils.formatting import print_welcome
-from harness_debugger.commands import delegate, connector, pipeline
 
-# Load .env file if it exists
-load_dotenv()
+def _load_dotenv():
+    """Load a .env file if one exists, importing python-dotenv only in that case."""
+    search_roots = [os.getcwd(), os.path.dirname(os.path.abspath(__file__))]
+    for root in search_roots:
+        directory = root
+        while True:
+            path = os.path.join(directory, ".env")
+            if os.path.isfile(path):
+                try:
+                    from dotenv import load_dotenv
+                except ImportError:
+                    return
+                load_dotenv(path)
+                return
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
 
-# Initialize colorama
-init(autoreset=True)
+class _HarnessArgumentParser(argparse.ArgumentParser):
+    """Argument parser whose colored epilog is only built when help is shown."""
+    
+    def format_help(self):
+        if self.epilog is None and getattr(self, 'colored_epilog', None):
+            self.epilog = self.colored_epilog()
+        return super().format_help()
 
-class HarnessDebuggerCLI:
-    def __init__(self):
-        self.parser = self._create_parser()
-        
-    def _create_parser(self):
-        """Create command line argument parser"""
-        parser = argparse.ArgumentParser(
-            description=f"{EMOJI_INFO} Harness Platform Debugging Utility",
-            formatter_class=argparse.RawDescriptionHelpFormatter,
-            epilog=f"""
+def _examples_epilog():
+    from colorama import Fore, Style
+    return f"""
 {Fore.CYAN}Examples:{Style.RESET_ALL}
   List all delegates:
     {Fore.GREEN}harness-debugger delegate list{Style.RESET_ALL}
@@ -40,15 +54,133 @@ class HarnessDebuggerCLI:
   Check for pipeline failures:
     {Fore.GREEN}harness-debugger pipeline check --pipeline=PIPELINE_ID --stage=STAGE_NAME{Style.RESET_ALL}
 """
+
+def _rate_limit(value):
+    """Parse a --rate-limit value of the form CLASS=RATE[:BURST]."""
+    endpoint_class, _, limit = value.partition("=")
+    rate, _, burst = limit.partition(":")
+    try:
+        rate = float(rate)
+        burst = float(burst) if burst else max(1.0, rate)
+    except ValueError:
+        rate = burst = 0
+    if not endpoint_class or rate <= 0 or burst < 1:
+        raise argparse.ArgumentTypeError(f"expected CLASS=RATE[:BURST] with a positive rate, got {value!r}")
+    return endpoint_class, (rate, burst)
+
+def _profile_label(value):
+    """Parse a --profile-label value of the form NAME=VALUE."""
+    name, _, label = value.partition("=")
+    if not name.isidentifier() or not label:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE with NAME a valid label name, got {value!r}")
+    return name, label
+
+def _add_log_arguments(parser):
+    """Step log scanning options shared by the pipeline check commands."""
+    parser.add_argument('--logs', action='store_true',
+                        help='Download the logs of failed steps and show the lines that match error patterns')
+    parser.add_argument('--log-pattern', action='append', metavar='REGEX',
+                        help='Error pattern to look for in step logs, replacing the built-in set. Repeatable.')
+    parser.add_argument('--log-context', type=int, default=DEFAULT_LOG_CONTEXT, metavar='N',
+                        help=f'Lines shown before and after each matching line (default: {DEFAULT_LOG_CONTEXT})')
+    parser.add_argument('--log-max-excerpts', type=int, default=DEFAULT_LOG_MAX_EXCERPTS, metavar='N',
+                        help=f'Keep only the last N excerpts of each log (default: {DEFAULT_LOG_MAX_EXCERPTS})')
+    parser.add_argument('--log-workers', type=int, default=DEFAULT_LOG_WORKERS, metavar='N',
+                        help=f'Runs whose logs are downloaded concurrently (default: {DEFAULT_LOG_WORKERS})')
+
+def _profile_names(value):
+    """Parse a --profiles value: comma-separated profile names."""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    if not names:
+        raise argparse.ArgumentTypeError(f"expected comma-separated profile names, got {value!r}")
+    return names
+
+def _error(message):
+    from colorama import Fore
+    print(f"{EMOJI_ERROR}{Fore.RED}{message}")
+
+class HarnessDebuggerCLI:
+    def __init__(self):
+        self.parser = self._create_parser()
+        
+    def _create_parser(self):
+        """Create command line argument parser"""
+        parser = _HarnessArgumentParser(
+            description=f"{EMOJI_INFO} Harness Platform Debugging Utility",
+            formatter_class=argparse.RawDescriptionHelpFormatter
         )
+        parser.colored_epilog = _examples_epilog
         
         # Global arguments
         parser.add_argument('--api-key', help='Harness API key (defaults to HARNESS_API_KEY env var)')
         parser.add_argument('--account', help='Harness account ID (defaults to HARNESS_ACCOUNT_ID env var)')
         parser.add_argument('--org', help='Harness organization ID (defaults to HARNESS_ORG_ID env var)')
         parser.add_argument('--project', help='Harness project ID (defaults to HARNESS_PROJECT_ID env var)')
-        parser.add_argument('--output', choices=['text', 'json'], default='text', 
-                         help='Output format (text or json)')
+        parser.add_argument('--output', choices=['text', 'json', 'ndjson'], default='text', 
+                         help='Output format (text, json, or ndjson streamed one record per line)')
+        parser.add_argument('--timestamps', choices=['text', 'epoch'], default='text',
+                         help='Write delegate timestamps in json/ndjson output as formatted text or epoch milliseconds')
+        parser.add_argument('--pager', action='store_true',
+                         help='Page text output through $PAGER (default: less -FRX) when writing to a terminal')
+        parser.add_argument('--table-sample', type=int, default=DEFAULT_TABLE_SAMPLE, metavar='N',
+                         help=f'Rows used to size table columns before the rest are streamed; 0 for fixed-width '
+                              f'columns (default: {DEFAULT_TABLE_SAMPLE})')
+        parser.add_argument('--max-col-width', type=int, metavar='N',
+                         help=f'Truncate table cells to N characters (fixed column width with --table-sample 0, '
+                              f'default {DEFAULT_TABLE_COLUMN_WIDTH})')
+        parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                         help=f'Maximum pooled connections to the Harness gateway (default: {DEFAULT_POOL_SIZE})')
+        parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                         help=f'Retries for idempotent API calls on 5xx or dropped connections (default: {DEFAULT_MAX_RETRIES})')
+        parser.add_argument('--deadline', type=float, metavar='SECONDS',
+                         help=f'Time budget for the whole command: every API call gets what is left of it as its '
+                              f'timeout and none starts once it is spent. Results gathered by then are still shown, '
+                              f'marked incomplete, and the exit status is {EXIT_INCOMPLETE}.')
+        parser.add_argument('--request-timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT, metavar='SECONDS',
+                         help=f'Seconds allowed per API call attempt, to connect and for each read '
+                              f'(default: {DEFAULT_REQUEST_TIMEOUT:g})')
+        parser.add_argument('--breaker-failures', type=int, default=DEFAULT_BREAKER_FAILURES, metavar='N',
+                         help=f'Consecutive failures (dropped connections, timeouts, 5xx) after which calls to an '
+                              f'endpoint fail fast for {DEFAULT_BREAKER_COOLDOWN:g}s; 0 disables '
+                              f'(default: {DEFAULT_BREAKER_FAILURES})')
+        parser.add_argument('--async', dest='use_async', action='store_true',
+                         help='Use the asyncio client (requires aiohttp)')
+        parser.add_argument('--no-cache', action='store_true',
+                         help='Do not read or write the on-disk response cache')
+        parser.add_argument('--refresh', action='store_true',
+                         help='Ignore cached responses and refetch (fresh responses are still cached)')
+        parser.add_argument('--cache-stats', action='store_true',
+                         help='Print response cache hit/miss counters when the command finishes')
+        parser.add_argument('--rate-limit', type=_rate_limit, action='append', default=[], metavar='CLASS=RATE[:BURST]',
+                         help='Requests per second (and burst) for an endpoint class: delegates, connectors, '
+                              'pipelines, logs or default. Repeatable.')
+        parser.add_argument('--scheduler-stats', action='store_true',
+                         help='Print request scheduler queueing and throttling counters when the command finishes')
+        parser.add_argument('--profile', action='store_true',
+                         help='Print per-endpoint API call counts, latency percentiles and time share when the command finishes')
+        parser.add_argument('--profile-output', metavar='FILE',
+                         help='Write the API call profile to FILE (implies profiling)')
+        parser.add_argument('--profile-format', choices=['json', 'prometheus'], default='json',
+                         help='Format of --profile-output: JSON or Prometheus text exposition format (default: json)')
+        parser.add_argument('--profile-label', type=_profile_label, action='append', default=[], metavar='NAME=VALUE',
+                         help='Extra label for the exported profile, e.g. step=build. Repeatable.')
+        parser.add_argument('--history', action='store_true',
+                         help="Record the failed runs that pipeline commands fetch in the local history store "
+                              "(see 'history query')")
+        parser.add_argument('--history-file', metavar='FILE',
+                         help='History store location (default: history.sqlite3 in the cache directory)')
+        parser.add_argument('--history-retention-days', type=int, default=DEFAULT_HISTORY_RETENTION_DAYS, metavar='DAYS',
+                         help=f'Delete stored runs older than DAYS; 0 keeps them (default: {DEFAULT_HISTORY_RETENTION_DAYS})')
+        parser.add_argument('--history-max-runs', type=int, default=DEFAULT_HISTORY_MAX_RUNS, metavar='N',
+                         help=f'Keep at most N runs, deleting the oldest; 0 for no limit (default: {DEFAULT_HISTORY_MAX_RUNS})')
+        parser.add_argument('--profiles', type=_profile_names, metavar='NAME[,NAME...]',
+                         help='Run the command against each of these profiles from the profiles file at once, '
+                              'merging the results tagged by profile')
+        parser.add_argument('--all-profiles', action='store_true',
+                         help='Run the command against every profile in the profiles file')
+        parser.add_argument('--profiles-file', metavar='FILE',
+                         help='Profiles file (default: $HARNESS_DEBUGGER_PROFILES or '
+                              '~/.config/harness-debugger/profiles.ini)')
         
         # Create subparsers for main commands
         subparsers = parser.add_subparsers(dest='command')
@@ -59,6 +191,15 @@ class HarnessDebuggerCLI:
         
         # List delegates
         list_parser = delegate_subparsers.add_parser('list', help='List all delegates')
+        list_parser.add_argument('--changed-since', metavar='SNAPSHOT|DURATION',
+                                 help="Show only delegates added, removed, changed or gone stale since a saved "
+                                      "snapshot: 'last', a duration such as 15m (the newest snapshot at least "
+                                      "that old), a snapshot name or file. The listing is saved as a new snapshot.")
+        list_parser.add_argument('--snapshot', action='store_true',
+                                 help='Save the listing as a snapshot for later --changed-since runs')
+        list_parser.add_argument('--stale-after', type=int, default=DEFAULT_HEARTBEAT_STALE_SECONDS, metavar='SECONDS',
+                                 help=f'Seconds without a heartbeat before a delegate counts as stale '
+                                      f'(default: {DEFAULT_HEARTBEAT_STALE_SECONDS})')
         
         # Get delegate info
         info_parser = delegate_subparsers.add_parser('info', help='Get detailed information about a delegate')
@@ -66,9 +207,15 @@ class HarnessDebuggerCLI:
         
         # Test delegate connectivity
         conn_parser = delegate_subparsers.add_parser('test-connectivity', 
-                                                 help='Generate commands to test delegate connectivity')
-        conn_parser.add_argument('delegate_id', help='Delegate ID')
+                                                 help='Test connectivity from this machine, or generate commands to run on a delegate')
+        conn_parser.add_argument('delegate_id', nargs='?', help='Delegate ID (not needed with --run)')
         conn_parser.add_argument('--urls', nargs='+', help='URLs to test (defaults to common services)')
+        conn_parser.add_argument('--run', action='store_true',
+                              help='Probe the URLs from this machine (DNS, connect, TLS, HTTP HEAD) instead of printing commands')
+        conn_parser.add_argument('--timeout', type=float, default=DEFAULT_PROBE_TIMEOUT,
+                              help=f'Seconds allowed per probe with --run (default: {DEFAULT_PROBE_TIMEOUT:g})')
+        conn_parser.add_argument('--concurrency', type=int, default=DEFAULT_PROBE_CONCURRENCY,
+                              help=f'Probes run at once with --run (default: {DEFAULT_PROBE_CONCURRENCY})')
         
         # Check delegate usage in pipeline
         check_pipeline_parser = delegate_subparsers.add_parser('check-pipeline', 
@@ -78,6 +225,9 @@ class HarnessDebuggerCLI:
         check_pipeline_parser.add_argument('--days', type=int, default=7, 
                                         help='Number of days to look back (default: 7)')
         check_pipeline_parser.add_argument('--output-file', help='Path to write output variables')
+        check_pipeline_parser.add_argument('--workers', type=int, default=DEFAULT_DETAIL_WORKERS,
+                                        help=f'Concurrent execution detail requests (default: {DEFAULT_DETAIL_WORKERS})')
+        _add_log_arguments(check_pipeline_parser)
         
         # Pipeline commands
         pipeline_parser = subparsers.add_parser('pipeline', help='Pipeline-related commands')
@@ -91,6 +241,43 @@ class HarnessDebuggerCLI:
         pipeline_check_parser.add_argument('--days', type=int, default=7, 
                                         help='Number of days to look back (default: 7)')
         pipeline_check_parser.add_argument('--output-file', help='Path to write output variables')
+        pipeline_check_parser.add_argument('--workers', type=int, default=DEFAULT_DETAIL_WORKERS,
+                                        help=f'Concurrent execution detail requests (default: {DEFAULT_DETAIL_WORKERS})')
+        _add_log_arguments(pipeline_check_parser)
+        
+        # Watch a pipeline stage for new failures
+        pipeline_watch_parser = pipeline_subparsers.add_parser('watch',
+                                                          help='Poll for new pipeline failures, resuming where the last poll stopped')
+        pipeline_watch_parser.add_argument('--pipeline', required=True, help='Pipeline ID')
+        pipeline_watch_parser.add_argument('--stage', required=True, help='Stage name')
+        pipeline_watch_parser.add_argument('--days', type=int, default=7,
+                                        help='Number of days of failures to track (default: 7)')
+        pipeline_watch_parser.add_argument('--output-file', help='Path to write output variables, updated on every new failure')
+        pipeline_watch_parser.add_argument('--workers', type=int, default=DEFAULT_DETAIL_WORKERS,
+                                        help=f'Concurrent execution detail requests (default: {DEFAULT_DETAIL_WORKERS})')
+        pipeline_watch_parser.add_argument('--interval', type=int, default=DEFAULT_WATCH_INTERVAL,
+                                        help=f'Seconds between polls (default: {DEFAULT_WATCH_INTERVAL})')
+        pipeline_watch_parser.add_argument('--lookback', type=int, default=DEFAULT_WATCH_LOOKBACK_MINUTES,
+                                        help='Minutes before the high-water mark to re-check for runs that were still '
+                                             f'in progress (default: {DEFAULT_WATCH_LOOKBACK_MINUTES})')
+        pipeline_watch_parser.add_argument('--state-file',
+                                        help='Where to persist the high-water mark (default: watch-state.json in the cache directory)')
+        pipeline_watch_parser.add_argument('--once', action='store_true',
+                                        help='Poll once and exit, e.g. from cron')
+        
+        # Scan many pipelines, stages and projects at once
+        pipeline_scan_parser = pipeline_subparsers.add_parser('scan',
+                                                         help='Aggregate failures across many pipelines, stages and projects')
+        pipeline_scan_parser.add_argument('--pipelines', nargs='+', default=['*'], metavar='PIPELINE',
+                                       help='Pipeline IDs or globs; globs are matched against each project\'s pipelines (default: *)')
+        pipeline_scan_parser.add_argument('--stages', nargs='+', default=['*'], metavar='STAGE',
+                                       help='Stage names or globs (default: *)')
+        pipeline_scan_parser.add_argument('--projects', nargs='+', metavar='PROJECT',
+                                       help='Project IDs or globs matched against the org\'s projects (default: --project)')
+        pipeline_scan_parser.add_argument('--days', type=int, default=7,
+                                       help='Number of days to look back (default: 7)')
+        pipeline_scan_parser.add_argument('--workers', type=int, default=DEFAULT_FLEET_WORKERS,
+                                       help=f'Pipeline stages scanned concurrently (default: {DEFAULT_FLEET_WORKERS})')
         
         # Connector commands
         connector_parser = subparsers.add_parser('connector', help='Connector-related commands')
@@ -101,8 +288,56 @@ class HarnessDebuggerCLI:
         
         # Find connectors by delegate
         connector_by_delegate_parser = connector_subparsers.add_parser('by-delegate', 
-                                                                  help='Find connectors using a specific delegate selector')
-        connector_by_delegate_parser.add_argument('selector', help='Delegate selector')
+                                                                  help='Find connectors using delegate selectors')
+        connector_by_delegate_parser.add_argument('selectors', nargs='*', metavar='selector', help='Delegate selector(s)')
+        connector_by_delegate_parser.add_argument('--from-file', help='Read additional selectors from a file, one per line')
+        connector_by_delegate_parser.add_argument('--match', choices=['any', 'all'], default='any',
+                                               help='Match connectors using any (OR) or all (AND) of the selectors (default: any)')
+        
+        # Failure-rate analytics
+        analyze_parser = subparsers.add_parser('analyze',
+                                           help='Failure rate, failure share and step durations per delegate, label and version')
+        analyze_parser.add_argument('--input', nargs='+', metavar='FILE',
+                                 help="Run records saved with 'pipeline check --output ndjson' (or json); '-' reads stdin")
+        analyze_parser.add_argument('--pipeline', help='Fetch history for this pipeline instead of reading --input')
+        analyze_parser.add_argument('--stage', help='Stage name (with --pipeline)')
+        analyze_parser.add_argument('--days', type=int, default=7,
+                                 help='Number of days to look back (default: 7)')
+        analyze_parser.add_argument('--workers', type=int, default=DEFAULT_DETAIL_WORKERS,
+                                 help=f'Concurrent execution detail requests (default: {DEFAULT_DETAIL_WORKERS})')
+        analyze_parser.add_argument('--by', nargs='+', choices=['delegate', 'label', 'version'],
+                                 default=['delegate', 'label', 'version'], help='Dimensions to group by (default: all)')
+        analyze_parser.add_argument('--top', type=int, help='Only show the N groups with the most failures')
+        
+        # Offline queries over the local execution history
+        history_parser = subparsers.add_parser('history', help='Query failed runs recorded with --history, offline')
+        history_subparsers = history_parser.add_subparsers(dest='subcommand')
+        
+        history_query_parser = history_subparsers.add_parser('query',
+                                                         help='List or count stored failed runs matching filters '
+                                                              '(the global --project filters by project)')
+        history_query_parser.add_argument('--pipeline', help='Pipeline ID (globs such as build-* allowed)')
+        history_query_parser.add_argument('--stage', help='Stage name (globs allowed)')
+        history_query_parser.add_argument('--status', help='Run status, e.g. FAILED or ABORTED')
+        history_query_parser.add_argument('--delegate', help='Delegate ID or name that ran a step of the run')
+        history_query_parser.add_argument('--label', help='Label of a delegate that ran a step of the run')
+        history_query_parser.add_argument('--days', type=int,
+                                       help='Only runs started in the last N days (default: all stored runs)')
+        history_query_parser.add_argument('--group-by', choices=HISTORY_GROUPS,
+                                       help='Count failed runs per group instead of listing them')
+        history_query_parser.add_argument('--limit', type=int,
+                                       help='Most runs (or groups) shown; text output defaults to 50 runs')
+        
+        history_subparsers.add_parser('compact',
+                                      help='Apply retention now, drop full records of old runs and shrink the file')
+        
+        # Many commands in one process
+        batch_parser = subparsers.add_parser('batch',
+                                         help='Run commands from a file or stdin, one per line, on one shared client')
+        batch_parser.add_argument('file', nargs='?', default='-',
+                               help="File of commands as they would follow 'harness-debugger' (default: stdin)")
+        batch_parser.add_argument('--workers', type=int, default=DEFAULT_BATCH_WORKERS,
+                               help=f'Commands run concurrently (default: {DEFAULT_BATCH_WORKERS})')
         
         return parser
     
@@ -113,36 +348,190 @@ class HarnessDebuggerCLI:
         if not args.command:
             self.parser.print_help()
             return 1
+        
+        from colorama import init
+        init(autoreset=True)
+        _load_dotenv()
+        
+        # Keep stdout machine-readable for json and ndjson output
+        if args.output == 'text':
+            from harness_debugger.utils.formatting import print_welcome
+            print_welcome()
             
-        # Create client with provided credentials
-        client = HarnessClient(
+        # Offline analysis needs no credentials or client
+        if args.command == 'analyze' and args.input:
+            from harness_debugger.commands.analyze import analyze_history
+            return analyze_history(args, None)
+        
+        # So does the execution history
+        if args.command == 'history':
+            return self._handle_history_command(args)
+        
+        # Probing from this machine needs no credentials or client either
+        if args.command == 'delegate' and getattr(args, 'subcommand', None) == 'test-connectivity' and args.run:
+            from harness_debugger.commands.delegate import run_connectivity_probes
+            from harness_debugger.utils.table import paged_output
+            with paged_output(args.pager and args.output == 'text'):
+                return run_connectivity_probes(args)
+        
+        profiler = None
+        if args.profile or args.profile_output:
+            from harness_debugger.profiling import RequestProfiler
+            command = " ".join(filter(None, [args.command, getattr(args, 'subcommand', None)]))
+            profiler = RequestProfiler({"command": command, **dict(args.profile_label)})
+        
+        cache = self._create_cache(args, in_memory=args.command == 'batch')
+        if args.profiles or args.all_profiles:
+            if args.command == 'batch':
+                _error("--profiles and --all-profiles cannot be combined with batch")
+                return 1
+            from harness_debugger.profiles import run_profiles
+            from harness_debugger.utils.table import paged_output
+            with paged_output(args.pager and args.output == 'text'):
+                schedulers = {}
+                result = run_profiles(self, args, cache, profiler, schedulers)
+        else:
+            # Create client with provided credentials
+            client_args = self._client_args(args, cache, profiler)
+            client = self._create_client(args, client_args)
+            
+            from harness_debugger.utils.table import paged_output
+            with client, paged_output(args.pager and args.output == 'text'):
+                result = self._dispatch_within_deadline(args, client)
+            schedulers = {None: client_args['scheduler']}
+        
+        if args.cache_stats and cache is not None:
+            stats = cache.stats()
+            print(f"Cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries, "
+                  f"{stats['bytes']} bytes in {stats['path']}", file=sys.stderr)
+        if args.scheduler_stats:
+            for name, scheduler in schedulers.items():
+                for endpoint_class, stats in scheduler.stats().items():
+                    print(f"{f'[{name}] ' if name else ''}Scheduler [{endpoint_class}]: "
+                          f"{stats['requests']} requests, {stats['throttled']} throttled, "
+                          f"max queue {stats['max_queued']}, wait avg {stats['avg_wait'] * 1000:.1f}ms "
+                          f"max {stats['max_wait'] * 1000:.1f}ms, concurrency {stats['concurrency_limit']}",
+                          file=sys.stderr)
+        if profiler is not None:
+            self._report_profile(args, profiler)
+        return result
+    
+    def _client_args(self, args, cache, profiler, profile=None):
+        """Keyword arguments for an API client: credentials from the command line and env, or from a profile"""
+        from harness_debugger.resilience import CircuitBreakers
+        from harness_debugger.scheduler import RequestScheduler
+        rate_limits = dict(args.rate_limit)
+        client_args = dict(
             api_key=args.api_key,
             account_id=args.account,
             org_id=args.org,
-            project_id=args.project
+            project_id=args.project,
+            pool_size=args.pool_size,
+            max_retries=args.max_retries,
+            cache=cache,
+            refresh_cache=args.refresh,
+            on_request=profiler,
+            timeout=args.request_timeout,
+            breakers=CircuitBreakers(args.breaker_failures)
         )
-        
+        if profile is not None:
+            # --org/--project still narrow every profile's scope
+            client_args.update(api_key=profile.api_key, account_id=profile.account_id,
+                               org_id=args.org or profile.org_id, project_id=args.project or profile.project_id,
+                               gateway_url=profile.gateway_url)
+            rate_limits.update(_rate_limit(value) for value in profile.rate_limits)
+        client_args['scheduler'] = RequestScheduler(rate_limits)
+        return client_args
+    
+    def _create_client(self, args, client_args):
+        """The sync client, or the asyncio client behind a blocking facade with --async"""
+        if args.use_async:
+            from harness_debugger.async_client import AsyncHarnessClient, BlockingAsyncClient
+            return BlockingAsyncClient(AsyncHarnessClient(**client_args))
+        from harness_debugger.client import HarnessClient
+        return HarnessClient(**client_args)
+    
+    def _report_profile(self, args, profiler):
+        """Print and/or export the API call profile"""
+        if args.profile:
+            print(profiler.format_table(), file=sys.stderr)
+        if args.profile_output:
+            rendered = profiler.to_prometheus() if args.profile_format == 'prometheus' else profiler.to_json()
+            try:
+                with open(args.profile_output, 'w') as f:
+                    f.write(rendered)
+            except OSError as e:
+                from colorama import Fore
+                print(f"{EMOJI_ERROR}{Fore.RED}Could not write profile to {args.profile_output}: {e}", file=sys.stderr)
+    
+    def _create_cache(self, args, in_memory=False):
+        """Open the on-disk response cache unless disabled, behind an in-memory layer if asked"""
+        cache = None
+        if not args.no_cache:
+            import sqlite3
+            from colorama import Fore
+            from harness_debugger.cache import ResponseCache
+            try:
+                cache = ResponseCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"{EMOJI_WARNING}{Fore.YELLOW}Response cache unavailable, continuing without it: {e}", file=sys.stderr)
+        if in_memory:
+            from harness_debugger.cache import MemoryCache
+            cache = MemoryCache(cache)
+        return cache
+    
+    def _dispatch_within_deadline(self, args, client):
+        """Run the command under --deadline, and mark its output if the deadline or a circuit breaker cut it short"""
+        from colorama import Fore
+        from harness_debugger.errors import RequestRefused
+        client.set_deadline(args.deadline)
+        try:
+            result = self._dispatch(args, client)
+        except RequestRefused as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Stopped: {e}", file=sys.stderr)
+            result = EXIT_INCOMPLETE
+        reasons = client.incomplete_reasons()
+        if reasons:
+            # After the partial results in text output; on stderr so json and ndjson stay parseable
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}Results are incomplete: {'; '.join(reasons)}",
+                  file=sys.stdout if args.output == 'text' else sys.stderr)
+            result = EXIT_INCOMPLETE
+        return result
+    
+    def _dispatch(self, args, client):
+        """Run the selected command with the given client"""
         if args.command == 'delegate':
             return self._handle_delegate_command(args, client)
         elif args.command == 'pipeline':
             return self._handle_pipeline_command(args, client)
         elif args.command == 'connector':
             return self._handle_connector_command(args, client)
+        elif args.command == 'analyze':
+            from harness_debugger.commands.analyze import analyze_history
+            return analyze_history(args, client)
+        elif args.command == 'history':
+            return self._handle_history_command(args)
+        elif args.command == 'batch':
+            from harness_debugger.batch import run_batch
+            return run_batch(self, args, client)
         else:
-            print(f"{EMOJI_ERROR}{Fore.RED}Unknown command: {args.command}")
+            _error(f"Unknown command: {args.command}")
             return 1
     
     def _handle_delegate_command(self, args, client):
         """Handle delegate-related commands"""
         if not args.subcommand:
-            print(f"{EMOJI_ERROR}{Fore.RED}Error: No delegate subcommand specified")
+            _error("Error: No delegate subcommand specified")
             return 1
             
+        from harness_debugger.commands import delegate
         if args.subcommand == 'list':
             return delegate.list_delegates(args, client)
         elif args.subcommand == 'info':
             return delegate.show_delegate_info(args, client)
         elif args.subcommand == 'check-pipeline':
+            from harness_debugger.commands import pipeline
             return pipeline.check_pipeline(args, client)
         elif args.subcommand == 'test-connectivity':
             return delegate.test_connectivity(args, client)
@@ -152,20 +541,42 @@ class HarnessDebuggerCLI:
     def _handle_pipeline_command(self, args, client):
         """Handle pipeline-related commands"""
         if not args.subcommand:
-            print(f"{EMOJI_ERROR}{Fore.RED}Error: No pipeline subcommand specified")
+            _error("Error: No pipeline subcommand specified")
             return 1
             
+        from harness_debugger.commands import pipeline
         if args.subcommand == 'check':
             return pipeline.check_pipeline(args, client)
+        elif args.subcommand == 'watch':
+            return pipeline.watch_pipeline(args, client)
+        elif args.subcommand == 'scan':
+            return pipeline.scan_pipelines(args, client)
             
         return 0
         
+    def _handle_history_command(self, args):
+        """Handle history commands (offline, no client needed)"""
+        if not args.subcommand:
+            _error("Error: No history subcommand specified")
+            return 1
+        
+        from harness_debugger.commands import history
+        from harness_debugger.utils.table import paged_output
+        if args.subcommand == 'query':
+            with paged_output(args.pager and args.output == 'text'):
+                return history.query_history(args)
+        elif args.subcommand == 'compact':
+            return history.compact_history(args)
+        
+        return 0
+    
     def _handle_connector_command(self, args, client):
         """Handle connector-related commands"""
         if not args.subcommand:
-            print(f"{EMOJI_ERROR}{Fore.RED}Error: No connector subcommand specified")
+            _error("Error: No connector subcommand specified")
             return 1
         
+        from harness_debugger.commands import connector
         if args.subcommand == 'list':
             return connector.list_connectors(args, client)
         elif args.subcommand == 'by-delegate':
@@ -175,7 +586,6 @@ class HarnessDebuggerCLI:
 
 def main():
     """Main entry point for the CLI."""
-    print_welcome()
     cli = HarnessDebuggerCLI()
     return cli.run()
 
@@ -1,145 +1,979 @@
 """Harness API client for making requests to the Harness platform."""
 
+import copy
 import os
+import random
 import requests
+import sys
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from tqdm import tqdm
+from fnmatch import fnmatchcase
+from typing import Callable, Container, Dict, Iterator, List, Optional, Tuple
 from colorama import Fore
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
 
+from harness_debugger.connector_index import ConnectorIndex
+from harness_debugger.errors import HarnessAPIError, RequestRefused
+from harness_debugger.log_scan import log_text, split_lines
+from harness_debugger.probes import connectivity_commands
+from harness_debugger.profiling import RequestEvent
+from harness_debugger.records import DelegateRecord, format_epoch_ms
+from harness_debugger.resilience import CircuitBreakers, Deadline
+from harness_debugger.resolver import DelegateResolver
+from harness_debugger.scheduler import RequestScheduler, parse_retry_after
+from harness_debugger.utils import jsonlib
+from harness_debugger.utils.concurrency import ordered_map
 from harness_debugger.utils.constants import *
 
-class HarnessClient:
-    def __init__(self, api_key=None, account_id=None, org_id=None, project_id=None):
+# Methods that can be replayed safely after a dropped connection or a 5xx
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUS_CODES = frozenset([500, 502, 503, 504])
+
+# Execution and node statuses that count as a failure
+FAILED_STATUSES = frozenset(["Failed", "Errored"])
+
+# (method, url, keyword arguments for _request)
+RequestSpec = Tuple[str, str, Dict]
+
+class BaseHarnessClient:
+    """
+    Credentials, endpoints and response parsing shared by the sync and async clients
+
+    Subclasses only add transport: every API call is described here as a
+    RequestSpec and every response is turned into CLI records here, so that
+    HarnessClient and AsyncHarnessClient return identical data.
+    """
+
+    def __init__(self, api_key=None, account_id=None, org_id=None, project_id=None,
+                 pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR, gateway_url=None,
+                 cache=None, refresh_cache=False, scheduler=None, on_request=None,
+                 timeout=DEFAULT_REQUEST_TIMEOUT, breakers=None):
         # Try to get from env vars if not provided
         self.api_key = api_key or os.environ.get("HARNESS_API_KEY")
         self.account_id = account_id or os.environ.get("HARNESS_ACCOUNT_ID")
         self.org_id = org_id or os.environ.get("HARNESS_ORG_ID", "")
         self.project_id = project_id or os.environ.get("HARNESS_PROJECT_ID", "")
-        
+
         if not self.api_key or not self.account_id:
             raise ValueError("API key and Account ID are required. Provide them as arguments or set HARNESS_API_KEY and HARNESS_ACCOUNT_ID environment variables.")
-        
+
         # Updated API endpoints
-        self.base_url = "https://app.harness.io/gateway/api"
-        self.ng_url = "https://app.harness.io/gateway/ng/api"
-        
+        self.gateway_url = (gateway_url or os.environ.get("HARNESS_GATEWAY_URL", DEFAULT_GATEWAY_URL)).rstrip("/")
+        self.base_url = f"{self.gateway_url}/api"
+        self.ng_url = f"{self.gateway_url}/ng/api"
+        self.pipeline_url = f"{self.gateway_url}/pipeline/api"
+        self.delegate_url = f"{self.base_url}/setup/delegates"
+        self.log_url = f"{self.gateway_url}/log-service"
+
         # Updated headers with the correct format for API key
         self.headers = {
             "x-api-key": self.api_key,
             "Content-Type": "application/json"
         }
 
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        # Optional ResponseCache; refresh_cache skips lookups but still stores fresh responses
+        self.cache = cache
+        self.refresh_cache = refresh_cache
+
+        # Every request is admitted by the scheduler; pass one in to share rate limits between clients
+        self.scheduler = scheduler or RequestScheduler()
+
+        # Optional callable handed a RequestEvent after every API call, cache hits included
+        self.on_request = on_request
+
+        # Seconds allowed per request attempt, cut to what is left of the deadline (see set_deadline)
+        self.timeout = timeout
+        self.deadline = None
+
+        # Endpoints that keep failing are refused for a while instead of being retried
+        self.breakers = breakers or CircuitBreakers()
+
+    def set_deadline(self, seconds: Optional[float]):
+        """
+        Give every later request a share of one time budget
+
+        Copies made by with_scope afterwards share the deadline.
+
+        Args:
+            seconds (float): Budget from now; None or 0 for no deadline
+        """
+        self.deadline = Deadline(seconds) if seconds else None
+
+    def _attempt_timeout(self) -> Optional[float]:
+        """Timeout for the next request attempt; raises DeadlineExceeded once the deadline has passed."""
+        if self.deadline is None:
+            return self.timeout
+        return self.deadline.timeout(self.timeout)
+
+    def _cut_by_deadline(self, timeout: Optional[float]) -> bool:
+        """Whether an attempt's timeout was shortened to what is left of the deadline."""
+        return self.deadline is not None and (self.timeout is None or timeout < self.timeout)
+
+    def _backoff_within_deadline(self, delay: float) -> float:
+        """A backoff delay, shortened so that it ends no later than the deadline."""
+        if self.deadline is None:
+            return delay
+        return max(0.0, min(delay, self.deadline.remaining()))
+
+    def incomplete_reasons(self) -> List[str]:
+        """Why results so far may be partial: the deadline ran out, or breakers refused calls. Empty if neither."""
+        reasons = []
+        if self.deadline is not None and self.deadline.exceeded:
+            reasons.append(f"the {self.deadline.seconds:g}s deadline ran out")
+        rejected = self.breakers.rejected()
+        if rejected:
+            reasons.append(f"{sum(rejected.values())} calls refused by open circuit breakers "
+                           f"({', '.join(sorted(rejected))})")
+        return reasons
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (zero-based) retry attempt."""
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff_factor * (2 ** attempt)))
+
+    def _endpoint_class(self, url: str) -> str:
+        """Scheduler endpoint class (rate-limit bucket) for a request URL."""
+        path = urlparse(url).path
+        if "/delegate" in path:
+            return "delegates"
+        if "/connectors" in path:
+            return "connectors"
+        if path.startswith(urlparse(self.pipeline_url).path):
+            return "pipelines"
+        if path.startswith(urlparse(self.log_url).path):
+            return "logs"
+        return "default"
+
+    def _endpoint_name(self, method: str, url: str) -> str:
+        """Stable name for a request's endpoint, e.g. "GET /api/setup/delegates/{id}"."""
+        path = urlparse(url).path[len(urlparse(self.gateway_url).path):]
+        for templated in (urlparse(self.delegate_url).path, f"{urlparse(self.pipeline_url).path}/pipelines/execution/v2"):
+            templated = templated[len(urlparse(self.gateway_url).path):]
+            if path.startswith(templated + "/"):
+                path = templated + "/{id}"
+        return f"{method.upper()} {path}"
+
+    @contextmanager
+    def _instrumented(self, method: str, url: str) -> Iterator[RequestEvent]:
+        """Time one API call and hand its RequestEvent to the on_request hook."""
+        event = RequestEvent(self._endpoint_name(method, url), self._endpoint_class(url))
+        try:
+            yield event
+        except Exception as e:
+            event.error = type(e).__name__
+            raise
+        finally:
+            if self.on_request is not None:
+                event.finish()
+                self.on_request(event)
+
+    def _scope_params(self) -> Dict:
+        """Query parameters identifying the configured account/org/project scope."""
+        params = {"accountIdentifier": self.account_id}
+        if self.org_id:
+            params["orgIdentifier"] = self.org_id
+            if self.project_id:
+                params["projectIdentifier"] = self.project_id
+        return params
+
+    def with_scope(self, org_id: Optional[str] = None, project_id: Optional[str] = None):
+        """
+        Return a client for another org/project that shares this client's
+        connection pool, scheduler, response cache and delegate lookups
+
+        Args:
+            org_id (str): Organization identifier (defaults to this client's)
+            project_id (str): Project identifier (defaults to this client's)
+        """
+        scoped = copy.copy(self)
+        scoped.org_id = org_id or self.org_id
+        scoped.project_id = project_id or self.project_id
+        # Connectors are scope-specific, so the copy builds its own index
+        scoped._connector_index = None
+        return scoped
+
+    def refreshing(self):
+        """
+        Return a copy of this client that ignores cached responses, like --refresh
+
+        Fresh responses are still cached; everything else is shared as with with_scope.
+        """
+        fresh = self.with_scope()
+        fresh.refresh_cache = True
+        return fresh
+
+    @staticmethod
+    def _unwrap(data: Dict) -> Dict:
+        """Return the data block of a Harness response, raising on a non-SUCCESS status."""
+        if data.get("status") != "SUCCESS":
+            raise HarnessAPIError(data.get("message", "Unknown error"))
+        return data.get("data") or {}
+
+    def _cache_key(self, spec: RequestSpec) -> Optional[str]:
+        """Cache key for a RequestSpec, or None if its resource is not cached."""
+        method, url, kwargs = spec
+        if self.cache is None or not self.cache.caches(kwargs.get("cache_resource")):
+            return None
+        scope = (self.account_id, self.org_id, self.project_id)
+        return self.cache.make_key(scope, method, url, kwargs.get("params"), kwargs.get("json"))
+
+    def _cached_response(self, key: Optional[str], item: Optional[Callable] = None) -> Optional[Dict]:
+        """Return the decoded cached body for key, unless caching is off or a refresh was requested."""
+        if key is None or self.refresh_cache:
+            return None
+        body = self.cache.get(key)
+        if body is None:
+            return None
+        return jsonlib.loads(body) if item is None else jsonlib.decode_page(body, item)
+
+    @staticmethod
+    def _transport_kwargs(kwargs: Dict) -> Dict:
+        """Strip RequestSpec-only options before handing kwargs to the transport."""
+        return {name: value for name, value in kwargs.items() if name != "cache_resource"}
+
+    # Delegates
+
+    def _delegate_info_request(self, delegate_id: str) -> RequestSpec:
+        return "GET", f"{self.delegate_url}/{delegate_id}", {
+            "params": {"accountIdentifier": self.account_id},
+            "cache_resource": "delegate"
+        }
+
+    def _delegate_page_request(self, page_index: int, page_size: int) -> RequestSpec:
+        # Define the request payload for filtering delegates
+        payload = {
+            "accountIdentifier": self.account_id,
+            "pageIndex": page_index,
+            "pageSize": page_size,
+            # Add filters if needed, or leave empty for all delegates
+            "filterType": "ALL"
+        }
+        # Use POST method as specified in documentation; the listing is a read, so it is safe to retry
+        return "POST", f"{self.ng_url}/delegate-setup", {
+            "json": payload,
+            "idempotent": True,
+            "cache_resource": "delegates"
+        }
+
+    @staticmethod
+    def _normalize_delegate(delegate_data: Dict) -> DelegateRecord:
+        """Convert a setup/delegates response or a delegate-setup listing entry into a DelegateRecord."""
+        return DelegateRecord.from_api(delegate_data)
+
+    @classmethod
+    def _delegate_item(cls, delegate_data: Dict) -> Optional[DelegateRecord]:
+        """Listing entry to DelegateRecord as the page is decoded; entries without an ID are dropped."""
+        return cls._normalize_delegate(delegate_data) if delegate_data.get("uuid") else None
+
+    # Connectors
+
+    def _connector_scopes(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        """(org, project) pairs to sweep for connectors: account, then org, then project level."""
+        scopes = [(None, None)]
+        if self.org_id:
+            scopes.append((self.org_id, None))
+            if self.project_id:
+                scopes.append((self.org_id, self.project_id))
+        return scopes
+
+    def _connector_page_request(self, page_index: int, page_size: int,
+                                org_id: Optional[str] = None, project_id: Optional[str] = None) -> RequestSpec:
+        params = {"accountIdentifier": self.account_id}
+        if org_id:
+            params["orgIdentifier"] = org_id
+            if project_id:
+                params["projectIdentifier"] = project_id
+        params.update({"pageIndex": page_index, "pageSize": page_size})
+        return "POST", f"{self.ng_url}/connectors/listV2", {
+            "params": params,
+            "json": {"filterType": "Connector"},
+            "idempotent": True,
+            "cache_resource": "connectors"
+        }
+
+    def _normalize_connector(self, item: Dict) -> Dict:
+        """Convert a connectors/listV2 entry into the CLI's connector dict."""
+        connector = item.get("connector") or {}
+        spec = connector.get("spec") or {}
+        return {
+            "id": connector.get("identifier", "Unknown"),
+            "name": connector.get("name", "Unknown"),
+            "connectorType": connector.get("type", "Unknown"),
+            "delegateSelectors": spec.get("delegateSelectors") or [],
+            "orgIdentifier": connector.get("orgIdentifier"),
+            "projectIdentifier": connector.get("projectIdentifier"),
+            "status": (item.get("status") or {}).get("status", "Unknown"),
+            "createdAt": item.get("createdAt"),
+            "lastModifiedAt": item.get("lastModifiedAt")
+        }
+
+    # Projects and pipelines
+
+    def _project_page_request(self, page_index: int, page_size: int) -> RequestSpec:
+        params = {"accountIdentifier": self.account_id, "pageIndex": page_index, "pageSize": page_size}
+        if self.org_id:
+            params["orgIdentifier"] = self.org_id
+        return "GET", f"{self.ng_url}/projects", {"params": params}
+
+    def _pipeline_page_request(self, page_index: int, page_size: int) -> RequestSpec:
+        params = self._scope_params()
+        params.update({"page": page_index, "size": page_size})
+        return "POST", f"{self.pipeline_url}/pipelines/list", {
+            "params": params,
+            "json": {"filterType": "PipelineSetup"},
+            "idempotent": True
+        }
+
+    # Pipeline executions
+
+    @staticmethod
+    def _time_window(days: int, since_ms: Optional[int] = None) -> Tuple[int, int]:
+        """Return (start, end) epoch millis for the last `days` days, starting no earlier than since_ms."""
+        end = datetime.now()
+        start = int((end - timedelta(days=days)).timestamp() * 1000)
+        if since_ms is not None:
+            start = max(start, since_ms)
+        return start, int(end.timestamp() * 1000)
+
+    def _execution_page_request(self, pipeline_id: str, start_ms: int, end_ms: int,
+                                page_index: int, page_size: int) -> RequestSpec:
+        params = self._scope_params()
+        params.update({"pipelineIdentifier": pipeline_id, "page": page_index, "size": page_size})
+        payload = {
+            "filterType": "PipelineExecution",
+            "status": sorted(FAILED_STATUSES),
+            "timeRange": {"startTime": start_ms, "endTime": end_ms}
+        }
+        return "POST", f"{self.pipeline_url}/pipelines/execution/summary", {
+            "params": params,
+            "json": payload,
+            "idempotent": True
+        }
+
+    def _execution_detail_request(self, execution_id: str, stage_node_id: Optional[str]) -> RequestSpec:
+        params = self._scope_params()
+        if stage_node_id:
+            params["stageNodeId"] = stage_node_id
+        params["renderFullBottomGraph"] = "true"
+        return "GET", f"{self.pipeline_url}/pipelines/execution/v2/{execution_id}", {"params": params}
+
+    def _step_log_request(self, log_key: str) -> RequestSpec:
+        return "GET", f"{self.log_url}/blob", {"params": {"accountID": self.account_id, "key": log_key}}
+
+    @staticmethod
+    def _find_failed_stage(summary: Dict, stage_name: str) -> Optional[Dict]:
+        """Return the layout node for stage_name (a name, identifier or glob) if it failed in this execution."""
+        for node in (summary.get("layoutNodeMap") or {}).values():
+            names = [name for name in (node.get("name"), node.get("nodeIdentifier")) if name]
+            if node.get("status") in FAILED_STATUSES and any(fnmatchcase(name, stage_name) for name in names):
+                return node
+        return None
+
+    def _failed_stage_item(self, stage_name: str, exclude: Container[str] = ()) -> Callable:
+        """
+        Page item converter for execution summaries
+
+        Returns (summary, failed stage node) for executions whose stage failed,
+        and None, dropping the summary as soon as it is decoded, for the rest.
+        """
+        def item(summary: Dict) -> Optional[Tuple[Dict, Dict]]:
+            if summary.get("planExecutionId") in exclude:
+                return None
+            stage_node = self._find_failed_stage(summary, stage_name)
+            return (summary, stage_node) if stage_node else None
+        return item
+
+    @staticmethod
+    def _step_delegate_ids(detail: Dict) -> set:
+        """Delegate IDs referenced by the steps of an execution graph."""
+        return {
+            delegate_ref.get("id")
+            for node in ((detail.get("executionGraph") or {}).get("nodeMap") or {}).values()
+            for delegate_ref in node.get("delegateInfoList") or []
+            if delegate_ref.get("id")
+        }
+
+    def _failed_run_record(self, summary: Dict, stage_node: Dict, detail: Dict,
+                           delegate_lookup: Callable[[str], Dict]) -> Dict:
+        """
+        Build the failed-run record printed by check_pipeline
+
+        Args:
+            summary (Dict): Execution summary from the execution/summary listing
+            stage_node (Dict): Layout node of the failed stage
+            detail (Dict): Data block of the execution/v2 response for that stage
+            delegate_lookup (Callable): Returns delegate information for a delegate ID
+        """
+        failure_info = summary.get("failureInfo") or stage_node.get("failureInfo") or {}
+        node_map = (detail.get("executionGraph") or {}).get("nodeMap") or {}
+
+        delegates = []
+        for node in node_map.values():
+            for delegate_ref in node.get("delegateInfoList") or []:
+                delegate_id = delegate_ref.get("id")
+                delegate_info = delegate_lookup(delegate_id) if delegate_id else {}
+                if not delegate_info:
+                    delegate_info = {"id": delegate_id or "Unknown", "name": delegate_ref.get("name", "Unknown"), "labels": []}
+
+                start_ts, end_ts = node.get("startTs"), node.get("endTs")
+                delegates.append({
+                    "step_name": node.get("name", "Unknown"),
+                    "step_id": node.get("identifier"),
+                    "step_status": (node.get("status") or "Unknown").upper(),
+                    "error_message": (node.get("failureInfo") or {}).get("message", ""),
+                    "duration_ms": end_ts - start_ts if start_ts and end_ts else None,
+                    "log_key": node.get("logBaseKey"),
+                    "delegate_info": delegate_info
+                })
+
+        return {
+            "execution_id": summary.get("planExecutionId"),
+            "pipeline_id": summary.get("pipelineIdentifier"),
+            "stage": stage_node.get("name"),
+            "start_ts": summary.get("startTs"),
+            "start_time": format_epoch_ms(summary.get("startTs")),
+            "status": (summary.get("status") or "Unknown").upper(),
+            "failure_message": failure_info.get("message") or "Unknown",
+            "delegates": delegates
+        }
+
+class HarnessClient(BaseHarnessClient):
+    def __init__(self, api_key=None, account_id=None, org_id=None, project_id=None,
+                 pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR, gateway_url=None,
+                 cache=None, refresh_cache=False, scheduler=None, on_request=None,
+                 timeout=DEFAULT_REQUEST_TIMEOUT, breakers=None):
+        super().__init__(api_key=api_key, account_id=account_id, org_id=org_id,
+                         project_id=project_id, pool_size=pool_size, max_retries=max_retries,
+                         backoff_factor=backoff_factor, gateway_url=gateway_url,
+                         cache=cache, refresh_cache=refresh_cache, scheduler=scheduler,
+                         on_request=on_request, timeout=timeout, breakers=breakers)
+        self.session = self._create_session(pool_size)
+        self.delegate_resolver = DelegateResolver(self.get_delegate_info, self.iter_delegates)
+        self._connector_index = None
+        self._connector_index_lock = threading.Lock()
+
+    def _create_session(self, pool_size: int) -> requests.Session:
+        """Create the keep-alive session shared by every call on this client."""
+        # Retries are handled in _request so that only idempotent calls are replayed
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def _request(self, method: str, url: str, idempotent: Optional[bool] = None,
+                 event: Optional[RequestEvent] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session
+
+        Every attempt is admitted by the shared RequestScheduler. Idempotent
+        calls are retried with jittered exponential backoff when the connection
+        drops or the gateway answers with a 5xx. A 429 is retried for any
+        method, since the request was not processed, after its Retry-After.
+
+        Each attempt times out after self.timeout, or sooner if the deadline
+        is nearer, and backoff never sleeps past the deadline. Attempts that
+        fail (dropped connection, timeout, 5xx) count toward the endpoint's
+        circuit breaker, which refuses calls while it is open; a 429 or a
+        timeout cut short by the deadline does not count either way.
+
+        Args:
+            method (str): HTTP method
+            url (str): Absolute URL
+            idempotent (bool): Override whether the call may be retried. Defaults
+                to True for GET/HEAD/OPTIONS/PUT/DELETE.
+            event (RequestEvent): Updated with the status, size, retries and 429s of the call
+
+        Returns:
+            requests.Response: The successful response
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before a response arrives
+            CircuitOpenError: If the endpoint's circuit breaker is open
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        endpoint_class = self._endpoint_class(url)
+        if event is None:
+            event = RequestEvent(self._endpoint_name(method, url), endpoint_class)
+        breaker = self.breakers.get(event.endpoint)
+        attempts = self.max_retries + 1
+
+        for attempt in range(attempts):
+            last_attempt = attempt + 1 >= attempts
+            retry_after = None
+            event.retries = attempt
+            trial = breaker.before_call()
+            # Only a response or a failure of the endpoint counts; a 429 or the deadline leaves it at None
+            outcome = None
+            try:
+                with self.scheduler.slot(endpoint_class, self.deadline) as slot:
+                    timeout = self._attempt_timeout()
+                    try:
+                        response = self.session.request(method, url, timeout=timeout, **kwargs)
+                    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                        # A timeout cut short by the deadline says nothing about the endpoint
+                        if isinstance(e, requests.exceptions.Timeout) and self._cut_by_deadline(timeout):
+                            raise self.deadline.error() from e
+                        outcome = False
+                        if last_attempt or not idempotent:
+                            raise
+                    else:
+                        slot.status = event.status = response.status_code
+                        if response.status_code != 429:
+                            outcome = response.status_code < 500
+                        if response.status_code == 429:
+                            slot.retry_after = retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                            event.throttled += 1
+                            retryable = True
+                        else:
+                            retryable = idempotent and response.status_code in RETRY_STATUS_CODES
+                        if last_attempt or not retryable:
+                            response.raise_for_status()
+                            if not kwargs.get("stream"):
+                                event.bytes = len(response.content)
+                            return response
+                        response.close()
+            finally:
+                breaker.record(outcome, trial)
+            # After a 429 the scheduler holds the endpoint class until Retry-After has passed
+            if retry_after is None:
+                time.sleep(self._backoff_within_deadline(self._backoff_delay(attempt)))
+
+    def _call(self, spec: RequestSpec, item: Optional[Callable] = None) -> Dict:
+        """
+        Execute a RequestSpec, consulting the response cache, and return its data block
+
+        Args:
+            spec (RequestSpec): The call
+            item (Callable): For listings, converts each data.content entry; pages
+                over DEFAULT_STREAM_DECODE_BYTES are decoded as they download
+                (see jsonlib.read_page), so they are never held as raw JSON
+        """
+        method, url, kwargs = spec
+        with self._instrumented(method, url) as event:
+            key = self._cache_key(spec)
+            cached = self._cached_response(key, item)
+            if cached is not None:
+                event.cache_hit = True
+                return self._unwrap(cached)
+            if key is None:
+                return self._unwrap(self._fetch_json(method, url, kwargs, event, item)[0])
+
+            # Threads missing the same key wait for the first fetch instead of repeating it
+            with self.cache.fetching(key) as waited:
+                cached = self._cached_response(key, item) if waited else None
+                if cached is not None:
+                    event.cache_hit = True
+                    return self._unwrap(cached)
+                body, text = self._fetch_json(method, url, kwargs, event, item, keep_text=True)
+                data = self._unwrap(body)
+                self.cache.set(key, kwargs["cache_resource"], text)
+                return data
+
+    def _fetch_json(self, method: str, url: str, kwargs: Dict, event: RequestEvent,
+                    item: Optional[Callable] = None, keep_text: bool = False) -> Tuple[Dict, Optional[str]]:
+        """Send a request and decode its JSON body; returns (body, body text if keep_text)."""
+        if item is None:
+            response = self._request(method, url, event=event, **self._transport_kwargs(kwargs))
+            return jsonlib.loads(response.content), response.content.decode("utf-8") if keep_text else None
+
+        response = self._request(method, url, event=event, stream=True, **self._transport_kwargs(kwargs))
+        try:
+            length = response.headers.get("Content-Length")
+            if length is not None and length.isdigit() and int(length) <= DEFAULT_STREAM_DECODE_BYTES:
+                content = response.content
+                event.bytes = len(content)
+                return jsonlib.decode_page(content, item), content.decode("utf-8") if keep_text else None
+
+            # Large or unsized page: decode it as it downloads rather than buffering it first
+            pieces = []
+            def chunks():
+                for chunk in response.iter_content(DEFAULT_JSON_CHUNK_SIZE):
+                    event.bytes += len(chunk)
+                    if keep_text:
+                        pieces.append(chunk)
+                    yield chunk
+            body = jsonlib.read_page(chunks(), item)
+            return body, b"".join(pieces).decode("utf-8") if keep_text else None
+        finally:
+            response.close()
+
+    def close(self):
+        """Release pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def _reporting_errors(self, what: str):
+        """
+        Report API errors for `what` in the usual format instead of raising them
+
+        A request refused by the deadline or a circuit breaker ends the stream
+        with a warning; incomplete_reasons() then marks the output as partial.
+        """
+        try:
+            yield
+        except RequestRefused as e:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}Stopped listing {what}: {e}", file=sys.stderr)
+        except HarnessAPIError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error listing {what}: {e}", file=sys.stderr)
+        except requests.exceptions.RequestException as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for {what}: {e}", file=sys.stderr)
+            if hasattr(e, 'response') and hasattr(e.response, 'text'):
+                print(f"{Fore.RED}Response text: {e.response.text}", file=sys.stderr)
+
     def get_delegate_info(self, delegate_id: str) -> Dict:
         """
         Get information about a specific delegate
-        
+
         Args:
             delegate_id (str): The ID of the delegate
-            
+
         Returns:
-            Dict: Delegate information including labels and status
+            Dict: Delegate information including labels and status, or {} after an API error
+
+        Raises:
+            RequestRefused: If the deadline or a circuit breaker refuses the lookup
         """
         try:
-            params = {
-                "accountIdentifier": self.account_id,
-            }
-            
-            response = requests.get(
-                f"{self.delegate_url}/{delegate_id}",
-                headers=self.headers,
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("status") != "SUCCESS":
-                print(f"{EMOJI_ERROR}{Fore.RED}Error getting delegate info: {data.get('message')}")
-                return {}
-                
-            delegate_data = data.get("data", {})
-            return {
-                "id": delegate_data.get("uuid", "Unknown"),
-                "name": delegate_data.get("name", "Unknown"),
-                "hostname": delegate_data.get("hostName", "Unknown"),
-                "ip": delegate_data.get("ip", "Unknown"),
-                "status": delegate_data.get("status", "Unknown"),
-                "version": delegate_data.get("version", "Unknown"),
-                "labels": delegate_data.get("selectors", []),
-                "last_heartbeat": datetime.fromtimestamp(int(delegate_data.get("lastHeartBeat", 0)) / 1000).strftime("%Y-%m-%d %H:%M:%S") if delegate_data.get("lastHeartBeat") else "Unknown",
-                "connected_at": datetime.fromtimestamp(int(delegate_data.get("connectedAt", 0)) / 1000).strftime("%Y-%m-%d %H:%M:%S") if delegate_data.get("connectedAt") else "Unknown",
-                "profile": delegate_data.get("delegateProfileId", "None")
-            }
+            return self._normalize_delegate(self._call(self._delegate_info_request(delegate_id)))
+        except HarnessAPIError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}Error getting delegate info: {e}", file=sys.stderr)
+            return {}
         except requests.exceptions.RequestException as e:
-            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for delegate info: {e}")
+            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for delegate info: {e}", file=sys.stderr)
             if hasattr(e, 'response') and hasattr(e.response, 'text'):
-                print(f"{Fore.RED}Response text: {e.response.text}")
+                print(f"{Fore.RED}Response text: {e.response.text}", file=sys.stderr)
+            return {}
+
+    def test_delegate_connectivity(self, delegate_id: str, urls: Optional[List[str]] = None) -> Dict:
+        """
+        Build the commands that test a delegate's connectivity from its host
+
+        Args:
+            delegate_id (str): The ID of the delegate
+            urls (List[str]): URLs to test (defaults to DEFAULT_CONNECTIVITY_URLS)
+
+        Returns:
+            Dict: "delegate" (its information) and "connectivity_tests" (hostname,
+                port and command by URL), or an empty dict if the delegate is unknown
+        """
+        delegate = self.get_delegate_info(delegate_id)
+        if not delegate:
             return {}
+        return {"delegate": delegate, "connectivity_tests": connectivity_commands(urls or DEFAULT_CONNECTIVITY_URLS)}
+
+    def iter_step_log(self, log_key: str, chunk_size: int = DEFAULT_LOG_CHUNK_SIZE,
+                      max_line_length: int = DEFAULT_LOG_MAX_LINE_LENGTH) -> Iterator[str]:
+        """
+        Stream the log of a pipeline step, line by line
+
+        The log is downloaded in chunks and never held in memory; overlong
+        lines are cut to max_line_length.
+
+        Args:
+            log_key (str): The step's logBaseKey from the execution graph
+            chunk_size (int): Bytes read per chunk
+            max_line_length (int): Longest line kept
+
+        Raises:
+            requests.exceptions.RequestException: If the download fails
+            DeadlineExceeded: If the deadline passes during the download
+        """
+        method, url, kwargs = self._step_log_request(log_key)
+        with self._instrumented(method, url) as event:
+            with self._request(method, url, event=event, stream=True, **kwargs) as response:
+                def chunks():
+                    for chunk in response.iter_content(chunk_size):
+                        # The read timeout applies per chunk; a slow log must still stop at the deadline
+                        if self.deadline is not None:
+                            self.deadline.check()
+                        event.bytes += len(chunk)
+                        yield chunk
+                yield from log_text(split_lines(chunks(), max_line_length))
 
-    def get_all_delegates(self) -> Dict[str, Dict]:
-        """Get all delegates in the account."""
+    def _fetch_delegate_page(self, page_index: int, page_size: int) -> Dict:
+        """Fetch one page of the delegate-setup listing; its content is already DelegateRecords."""
+        return self._call(self._delegate_page_request(page_index, page_size), item=self._delegate_item)
+
+    def _iter_pages(self, fetch_page, page_size: int, max_workers: int) -> Iterator[Dict]:
+        """
+        Yield every page of a paginated listing, in order
+
+        The first page is fetched on its own to learn the page count; the rest
+        are fetched concurrently on a bounded worker pool.
+
+        Args:
+            fetch_page (Callable): Called as fetch_page(page_index, page_size), returns the page data
+            page_size (int): Items per page
+            max_workers (int): Maximum concurrent page requests
+        """
+        first_page = fetch_page(0, page_size)
+        yield first_page
+
+        total_pages = int(first_page.get("totalPages") or 1)
+        if total_pages <= 1:
+            return
+
+        # More workers than pooled connections would just churn connections
+        workers = min(max_workers, self.pool_size, total_pages - 1)
+        yield from ordered_map(lambda page_index: fetch_page(page_index, page_size),
+                               range(1, total_pages), max_workers=workers)
+
+    def iter_delegates(self, page_size: int = DEFAULT_PAGE_SIZE,
+                       max_workers: int = DEFAULT_PAGE_WORKERS) -> Iterator[Dict]:
+        """
+        Iterate over every delegate in the account, in listing order
+
+        Args:
+            page_size (int): Delegates requested per page
+            max_workers (int): Maximum concurrent page requests
+
+        Yields:
+            Dict: Delegate information, as returned by get_all_delegates
+
+        Raises:
+            requests.exceptions.RequestException: If a page request fails
+            HarnessAPIError: If the API reports an error
+        """
+        for page in self._iter_pages(self._fetch_delegate_page, page_size, max_workers):
+            yield from page.get("content") or []
+
+    def stream_delegates(self, page_size: int = DEFAULT_PAGE_SIZE,
+                         max_workers: int = DEFAULT_PAGE_WORKERS) -> Iterator[Dict]:
+        """Like iter_delegates, but API errors are reported and end the stream."""
+        with self._reporting_errors("delegates"):
+            yield from self.iter_delegates(page_size, max_workers)
+
+    def get_all_delegates(self, page_size: int = DEFAULT_PAGE_SIZE,
+                          max_workers: int = DEFAULT_PAGE_WORKERS) -> Dict[str, Dict]:
+        """
+        Get all delegates in the account, following every page of the listing
+
+        If the deadline runs out or a circuit breaker opens part way, the
+        delegates listed so far are returned (incomplete_reasons says so).
+        """
+        delegates = {}
         try:
-            print(f"{EMOJI_INFO}{Fore.CYAN} Fetching delegates information...")
-            
-            # Use the delegate-setup endpoint which can list delegates
-            url = f"{self.ng_url}/delegate-setup"
-            
-            # Define the request payload for filtering delegates
-            payload = {
-                "accountIdentifier": self.account_id,
-                "pageIndex": 0,
-                "pageSize": 100,
-                # Add filters if needed, or leave empty for all delegates
-                "filterType": "ALL"
-            }
-            
-            # For debugging
-            print(f"DEBUG: Requesting {url}")
-            print(f"DEBUG: Headers: {self.headers}")
-            print(f"DEBUG: Payload: {payload}")
-            
-            # Use POST method as specified in documentation
-            response = requests.post(url, headers=self.headers, json=payload)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data.get("status") != "SUCCESS":
-                print(f"{EMOJI_ERROR}{Fore.RED} API returned error: {data.get('message', 'Unknown error')}")
-                return {}
-                
-            delegate_list = data.get("data", {}).get("content", [])
-            if not delegate_list:
-                print(f"{EMOJI_WARNING}{Fore.YELLOW} No delegates found")
-                return {}
-                
-            delegates = {}
-            
-            for delegate in tqdm(delegate_list, desc="Processing delegates", unit="delegate"):
-                delegate_id = delegate.get("uuid")
-                if delegate_id:
-                    delegates[delegate_id] = {
-                        "id": delegate_id,
-                        "name": delegate.get("name", "Unknown"),
-                        "hostname": delegate.get("hostName", "Unknown"),
-                        "ip": delegate.get("ip", "Unknown"),
-                        "status": delegate.get("status", "Unknown"),
-                        "version": delegate.get("version", "Unknown"),
-                        "labels": delegate.get("selectors", []),
-                        "last_heartbeat": datetime.fromtimestamp(int(delegate.get("lastHeartbeat", 0)) / 1000).strftime("%Y-%m-%d %H:%M:%S") if delegate.get("lastHeartbeat") else "Unknown",
-                        "connected_at": datetime.fromtimestamp(int(delegate.get("connectedAt", 0)) / 1000).strftime("%Y-%m-%d %H:%M:%S") if delegate.get("connectedAt") else "Unknown",
-                        "profile": delegate.get("delegateProfileId", "None")
-                    }
-            
+            print(f"{EMOJI_INFO}{Fore.CYAN} Fetching delegates information...", file=sys.stderr)
+
+            # tqdm is only needed here, so keep it off the import path of every command
+            from tqdm import tqdm
+
+            progress = tqdm(desc="Processing delegates", unit="delegate")
+            with progress:
+                for page in self._iter_pages(self._fetch_delegate_page, page_size, max_workers):
+                    if progress.total is None and page.get("totalItems") is not None:
+                        progress.total = int(page["totalItems"])
+                    for delegate in page.get("content") or []:
+                        delegates[delegate.id] = delegate
+                        progress.update(1)
+
+            if not delegates:
+                print(f"{EMOJI_WARNING}{Fore.YELLOW} No delegates found", file=sys.stderr)
+            return delegates
+
+        except RequestRefused as e:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW} Stopped listing delegates after {len(delegates)}: {e}", file=sys.stderr)
             return delegates
-            
+        except HarnessAPIError as e:
+            print(f"{EMOJI_ERROR}{Fore.RED} API returned error: {e}", file=sys.stderr)
+            return {}
         except requests.exceptions.RequestException as e:
-            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for delegates: {e}")
+            print(f"{EMOJI_ERROR}{Fore.RED}Error making API request for delegates: {e}", file=sys.stderr)
             if hasattr(e, 'response') and hasattr(e.response, 'text'):
-                print(f"{Fore.RED}Response text: {e.response.text}")
+                print(f"{Fore.RED}Response text: {e.response.text}", file=sys.stderr)
             return {}
-    
+
+    def iter_connectors(self, page_size: int = DEFAULT_PAGE_SIZE,
+                        max_workers: int = DEFAULT_PAGE_WORKERS) -> Iterator[Dict]:
+        """
+        Iterate over connectors at account, org and project scope
+
+        Each scope is paged concurrently like the delegate listing.
+
+        Raises:
+            requests.exceptions.RequestException: If a page request fails
+            HarnessAPIError: If the API reports an error
+        """
+        for org_id, project_id in self._connector_scopes():
+            fetch_page = lambda page_index, size: self._call(
+                self._connector_page_request(page_index, size, org_id, project_id))
+            for page in self._iter_pages(fetch_page, page_size, max_workers):
+                for item in page.get("content") or []:
+                    yield self._normalize_connector(item)
+
+    def stream_connectors(self, page_size: int = DEFAULT_PAGE_SIZE,
+                          max_workers: int = DEFAULT_PAGE_WORKERS) -> Iterator[Dict]:
+        """Like iter_connectors, but API errors are reported and end the stream."""
+        with self._reporting_errors("connectors"):
+            yield from self.iter_connectors(page_size, max_workers)
+
+    def with_scope(self, org_id: Optional[str] = None, project_id: Optional[str] = None) -> "HarnessClient":
+        scoped = super().with_scope(org_id, project_id)
+        scoped._connector_index_lock = threading.Lock()
+        return scoped
+
+    def iter_projects(self, page_size: int = DEFAULT_PAGE_SIZE,
+                      max_workers: int = DEFAULT_PAGE_WORKERS) -> Iterator[str]:
+        """
+        Iterate over the identifiers of the projects in the configured org
+
+        Raises:
+            requests.exceptions.RequestException: If a page request fails
+            HarnessAPIError: If the API reports an error
+        """
+        fetch_page = lambda page_index, size: self._call(self._project_page_request(page_index, size))
+        for page in self._iter_pages(fetch_page, page_size, max_workers):
+            for item in page.get("content") or []:
+                yield (item.get("project") or {}).get("identifier")
+
+    def iter_pipelines(self, page_size: int = DEFAULT_PAGE_SIZE,
+                       max_workers: int = DEFAULT_PAGE_WORKERS) -> Iterator[str]:
+        """
+        Iterate over the identifiers of the pipelines in the configured project
+
+        Raises:
+            requests.exceptions.RequestException: If a page request fails
+            HarnessAPIError: If the API reports an error
+        """
+        fetch_page = lambda page_index, size: self._call(self._pipeline_page_request(page_index, size))
+        for page in self._iter_pages(fetch_page, page_size, max_workers):
+            for item in page.get("content") or []:
+                yield item.get("identifier")
+
+    def connector_index(self) -> Optional[ConnectorIndex]:
+        """
+        Selector-to-connector index built from one sweep, kept for the lifetime of the client
+
+        Returns:
+            ConnectorIndex: The index, or None if the sweep failed
+        """
+        with self._connector_index_lock:
+            if self._connector_index is None:
+                with self._reporting_errors("connectors"):
+                    self._connector_index = ConnectorIndex(self.iter_connectors())
+            return self._connector_index
+
+    def find_connectors(self, selectors, match_all: bool = False) -> List[Dict]:
+        """
+        Find connectors by delegate selectors without further API calls after the first sweep
+
+        Args:
+            selectors (Iterable[str]): Delegate selectors
+            match_all (bool): Require every selector (AND) instead of any (OR)
+
+        Returns:
+            List[Dict]: Matching connectors
+        """
+        index = self.connector_index()
+        return index.match(selectors, match_all) if index else []
+
+    def get_connectors(self, selector: Optional[str] = None) -> List[Dict]:
+        """
+        Get connectors at account, org and project scope
+
+        Args:
+            selector (str): Only return connectors that use this delegate selector
+
+        Returns:
+            List[Dict]: Connector information
+        """
+        if selector:
+            return self.find_connectors([selector])
+        index = self.connector_index()
+        return index.connectors if index else []
+
+    def resolve_delegates(self, delegate_ids) -> Dict[str, Dict]:
+        """
+        Resolve many delegate IDs at once
+
+        Lookups are deduplicated, coalesced with concurrent lookups of the same
+        ID and remembered for the lifetime of the client. Large batches are
+        answered from one paginated listing instead of one call per ID.
+
+        Args:
+            delegate_ids (Iterable[str]): Delegate IDs to resolve
+
+        Returns:
+            Dict[str, Dict]: Delegate information per ID ({} for unknown IDs)
+        """
+        return self.delegate_resolver.resolve(delegate_ids)
+
+    def _iter_failed_stages(self, stage_name: str, pipeline_id: str, days: int, page_size: int,
+                            max_workers: int, since_ms: Optional[int] = None,
+                            exclude: Container[str] = ()) -> Iterator[Tuple[Dict, Dict]]:
+        """Yield (summary, stage node) for each execution in the window whose stage failed."""
+        start_ms, end_ms = self._time_window(days, since_ms)
+        item = self._failed_stage_item(stage_name, exclude)
+        fetch_page = lambda page_index, size: self._call(
+            self._execution_page_request(pipeline_id, start_ms, end_ms, page_index, size), item=item)
+
+        for page in self._iter_pages(fetch_page, page_size, max_workers):
+            yield from page.get("content") or []
+
+    def _fetch_failed_run(self, failed_stage: Tuple[Dict, Dict]) -> Dict:
+        """Fetch the stage graph of one failed execution and build its record."""
+        summary, stage_node = failed_stage
+        detail = self._call(self._execution_detail_request(
+            summary.get("planExecutionId"), stage_node.get("nodeUuid")))
+        resolved = self.resolve_delegates(self._step_delegate_ids(detail))
+        return self._failed_run_record(summary, stage_node, detail, resolved.get)
+
+    def iter_failed_runs(self, stage_name: str, pipeline_id: str, days: int = 7,
+                         page_size: int = DEFAULT_PAGE_SIZE, max_workers: int = DEFAULT_DETAIL_WORKERS,
+                         since_ms: Optional[int] = None, exclude: Container[str] = ()) -> Iterator[Dict]:
+        """
+        Stream failed runs of a pipeline stage, newest first
+
+        Execution summaries are paged with server-side status and time-window
+        filters. Stage details are fetched on a bounded thread pool as pages
+        arrive, and only a fixed window of executions is held in memory, so the
+        first run is yielded long before the whole window has been scanned.
+
+        Args:
+            stage_name (str): Stage name or identifier
+            pipeline_id (str): Pipeline identifier
+            days (int): Number of days to look back
+            page_size (int): Execution summaries requested per page
+            max_workers (int): Maximum concurrent detail requests
+            since_ms (int): Only consider executions started at or after this epoch-millis time
+            exclude (Container[str]): Execution IDs to skip without fetching their details
+
+        Yields:
+            Dict: Failed-run record with per-step delegate information
+
+        Raises:
+            HarnessAPIError: If the API answers with an error status
+            requests.exceptions.RequestException: If a request fails
+        """
+        failed_stages = self._iter_failed_stages(stage_name, pipeline_id, days, page_size, max_workers,
+                                                 since_ms, exclude)
+        yield from ordered_map(self._fetch_failed_run, failed_stages,
+                               max_workers=min(max_workers, self.pool_size))
+
+    def get_failed_runs(self, stage_name: str, pipeline_id: str, days: int = 7,
+                        page_size: int = DEFAULT_PAGE_SIZE, max_workers: int = DEFAULT_DETAIL_WORKERS,
+                        since_ms: Optional[int] = None, exclude: Container[str] = ()) -> Iterator[Dict]:
+        """Like iter_failed_runs, but API errors are reported and end the stream."""
+        with self._reporting_errors("pipeline executions"):
+            yield from self.iter_failed_runs(stage_name, pipeline_id, days, page_size, max_workers,
+                                             since_ms, exclude)
+
     # Add other methods from original HarnessClient here...
-    # (get_step_delegate_info, get_failed_runs, get_connectors, test_delegate_connectivity) 
\ No newline at end of file
+    # (get_step_delegate_info)
@@ -0,0 +1,97 @@
+"""Failure-rate analytics command for the Harness Debugger CLI tool."""
+
+import sys
+from colorama import Fore
+
+from harness_debugger.utils import jsonlib
+from harness_debugger.utils.constants import *
+from harness_debugger.utils.formatting import write_ndjson
+
+def read_runs(paths):
+    """
+    Yield failed-run records from files written by `pipeline check`
+
+    Accepts --output ndjson (one record per line) and --output json (an array)
+    files; '-' reads standard input. Records without step information are skipped.
+    """
+    for path in paths:
+        f = sys.stdin if path == '-' else open(path)
+        try:
+            first = f.read(1)
+            while first.isspace():
+                first = f.read(1)
+            if first == '[':
+                records = jsonlib.loads(first + f.read())
+            else:
+                records = (jsonlib.loads(line) for line in _prepend(first, f) if line.strip())
+            for record in records:
+                if isinstance(record, dict) and 'delegates' in record:
+                    yield record
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+def _prepend(first, f):
+    """Lines of f, with the character already consumed put back on the first line."""
+    yield first + f.readline()
+    yield from f
+
+def analyze_history(args, client):
+    """Compute failure rate, failure share and step duration percentiles per delegate, label and version."""
+    from harness_debugger.analytics import StepTable, np
+
+    if np is None:
+        print(f"{EMOJI_ERROR}{Fore.RED}Error: analyze requires numpy. Install it with: pip install 'harness-debugger[analytics]'")
+        return 1
+
+    if args.input:
+        runs = read_runs(args.input)
+    elif args.pipeline and args.stage:
+        runs = client.get_failed_runs(args.stage, args.pipeline, args.days, max_workers=args.workers)
+    else:
+        print(f"{EMOJI_ERROR}{Fore.RED}Error: Give --input files, or --pipeline and --stage to fetch history")
+        return 1
+
+    try:
+        table = StepTable(runs)
+    except (OSError, ValueError) as e:
+        print(f"{EMOJI_ERROR}{Fore.RED}Error reading execution history: {e}")
+        return 1
+
+    if not len(table):
+        print(f"{EMOJI_WARNING}{Fore.YELLOW}No step records to analyze")
+        return 0
+
+    report = {dimension: table.group_by(dimension, args.top) for dimension in args.by}
+
+    if args.output == 'ndjson':
+        write_ndjson(dict(row, group=dimension) for dimension, rows in report.items() for row in rows)
+    elif args.output == 'json':
+        print(jsonlib.dumps({"steps": len(table), **report}, indent=2))
+    else:
+        print_analysis(len(table), report)
+    return 0
+
+def print_analysis(steps, report):
+    """Display one table per dimension."""
+    from tabulate import tabulate
+
+    print(f"\n{EMOJI_INFO}{Fore.CYAN}Analyzed {Fore.YELLOW}{steps}{Fore.CYAN} step records")
+    for dimension, rows in report.items():
+        print(f"\n{EMOJI_DELEGATE}{Fore.CYAN}Failures per {dimension}:")
+        # Delegates are grouped by ID; show it next to the name, which need not be unique
+        keys = [dimension, "delegate_id"] if dimension == "delegate" else [dimension]
+        table = [
+            [row[key] for key in keys] + [row["steps"], row["failures"], f"{row['failure_rate']:.1%}",
+                                          f"{row['failure_share']:.1%}", _format_ms(row["p50_ms"]),
+                                          _format_ms(row["p95_ms"])]
+            for row in rows
+        ]
+        headers = [dimension.capitalize()] + (["Delegate ID"] if dimension == "delegate" else [])
+        print(tabulate(table, headers=headers + ["Steps", "Failures", "Failure Rate", "Failure Share", "p50", "p95"],
+                       tablefmt="grid"))
+
+def _format_ms(value):
+    if value is None:
+        return "-"
+    return f"{value / 1000:.1f}s" if value >= 1000 else f"{value:.0f}ms"
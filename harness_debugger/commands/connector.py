@@ -1,43 +1,92 @@
 """Connector-related commands for the Harness Debugger CLI tool."""
 
-import json
 from colorama import Fore
 from datetime import datetime
-from tabulate import tabulate
 
+from harness_debugger.utils import jsonlib
 from harness_debugger.utils.constants import *
-from harness_debugger.utils.formatting import format_connector_table
+from harness_debugger.utils.formatting import CONNECTOR_HEADERS, connector_row, write_ndjson
+from harness_debugger.utils.table import StreamingTable
 
 def list_connectors(args, client):
     """List all connectors in the account."""
-    connectors = client.get_connectors()
-    
-    if not connectors:
-        print(f"{EMOJI_WARNING}{Fore.YELLOW}No connectors found")
+    if args.output == 'ndjson':
+        write_ndjson(client.stream_connectors())
         return 0
     
     if args.output == 'json':
-        print(json.dumps(connectors, indent=2))
-    else:
-        print(f"\n{EMOJI_INFO}{Fore.CYAN}Found {Fore.YELLOW}{len(connectors)}{Fore.CYAN} connectors:")
-        print(format_connector_table(connectors))
+        connectors = client.get_connectors()
+        if not connectors:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}No connectors found")
+            return 0
+        print(jsonlib.dumps(connectors, indent=2))
+        return 0
+    
+    def title(count):
+        if count is None:
+            return f"\n{EMOJI_INFO}{Fore.CYAN}Connectors:"
+        return f"\n{EMOJI_INFO}{Fore.CYAN}Found {Fore.YELLOW}{count}{Fore.CYAN} connectors:"
+    
+    # Rows are printed as listing pages arrive
+    table = StreamingTable.from_args(CONNECTOR_HEADERS, args)
+    count = table.write((connector_row(connector) for connector in client.stream_connectors()), title=title)
+    
+    if not count:
+        print(f"{EMOJI_WARNING}{Fore.YELLOW}No connectors found")
+    elif count > args.table_sample:
+        print(f"{EMOJI_INFO}{Fore.CYAN}Found {Fore.YELLOW}{count}{Fore.CYAN} connectors")
     
     return 0
 
+def read_selectors(args):
+    """Collect delegate selectors from the command line and --from-file."""
+    selectors = list(args.selectors or [])
+    if args.from_file:
+        with open(args.from_file) as f:
+            selectors.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return list(dict.fromkeys(selectors))
+
 def find_by_delegate(args, client):
-    """Find connectors using a specific delegate selector."""
-    selector = args.selector
-    connectors = client.get_connectors(selector)
+    """Find connectors using one or more delegate selectors."""
+    selectors = read_selectors(args)
+    if not selectors:
+        print(f"{EMOJI_ERROR}{Fore.RED}Error: At least one delegate selector is required")
+        return 1
+    
+    match_all = args.match == 'all'
+    connectors = client.find_connectors(selectors, match_all=match_all)
+    
+    if args.output == 'ndjson':
+        write_ndjson(connectors)
+        return 0
+    selector_text = "', '".join(selectors)
+    mode_text = "all of" if match_all else "any of"
     
     if not connectors:
-        print(f"{EMOJI_WARNING}{Fore.YELLOW}No connectors found using delegate selector '{selector}'")
+        if len(selectors) == 1:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}No connectors found using delegate selector '{selector_text}'")
+        else:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}No connectors found using {mode_text} {len(selectors)} delegate selectors")
         return 0
     
     if args.output == 'json':
-        print(json.dumps(connectors, indent=2))
+        print(jsonlib.dumps(connectors, indent=2))
+        return 0
+    
+    if len(selectors) == 1:
+        print(f"\n{EMOJI_INFO}{Fore.CYAN}Found {Fore.YELLOW}{len(connectors)}{Fore.CYAN} connectors using delegate selector '{Fore.YELLOW}{selector_text}{Fore.CYAN}':")
     else:
-        print(f"\n{EMOJI_INFO}{Fore.CYAN}Found {Fore.YELLOW}{len(connectors)}{Fore.CYAN} connectors using delegate selector '{Fore.YELLOW}{selector}{Fore.CYAN}':")
-        print(format_connector_table(connectors))
+        print(f"\n{EMOJI_INFO}{Fore.CYAN}Found {Fore.YELLOW}{len(connectors)}{Fore.CYAN} connectors using {mode_text} {Fore.YELLOW}{len(selectors)}{Fore.CYAN} delegate selectors:")
+    StreamingTable.from_args(CONNECTOR_HEADERS, args).write(connector_row(connector) for connector in connectors)
+    
+    if len(selectors) > 1:
+        # Per-selector usage, e.g. to confirm a retired delegate pool is no longer referenced
+        index = client.connector_index()
+        print(f"\n{EMOJI_CONNECTOR}{Fore.CYAN}Connectors per selector:")
+        for selector in selectors:
+            count = index.count(selector)
+            color = Fore.YELLOW if count else Fore.GREEN
+            print(f"  {Fore.WHITE}{selector}: {color}{count}")
     
     return 0
 
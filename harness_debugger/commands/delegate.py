@@ -1,47 +1,189 @@
 """Delegate-related commands for the Harness Debugger CLI tool."""
 
-import json
+import sys
+
 from colorama import Fore
-from tabulate import tabulate
 
+from harness_debugger.utils import jsonlib
 from harness_debugger.utils.constants import *
-from harness_debugger.utils.formatting import format_delegate_info
+from harness_debugger.utils.formatting import format_delegate_info, json_default, write_ndjson
+from harness_debugger.utils.table import StreamingTable
 
 def list_delegates(args, client):
     """List all delegates in the account."""
-    delegates = client.get_all_delegates()
+    # Snapshots are compared and stamped with the current time, so they must
+    # never be built from cached responses, however fresh
+    if getattr(args, 'changed_since', None):
+        return list_changed_delegates(args, client.refreshing())
     
-    if not delegates:
+    delegates = None
+    if getattr(args, 'snapshot', False):
+        # A snapshot must hold the whole fleet, so it is fetched before anything is printed
+        from harness_debugger.delegate_snapshots import DelegateSnapshot
+        client = client.refreshing()
+        delegates = client.get_all_delegates()
+        if delegates and client.incomplete_reasons():
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}Listing is incomplete; not saving it as a snapshot", file=sys.stderr)
+        elif delegates:
+            path = _snapshot_store(args, client).save(DelegateSnapshot.of(delegates.values()))
+            print(f"{EMOJI_SUCCESS}{Fore.GREEN}Saved delegate snapshot {path}", file=sys.stderr)
+    if args.output == 'json':
+        if delegates is None:
+            delegates = client.get_all_delegates()
+        if not delegates:
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}No delegates found")
+            return 0
+        print(jsonlib.dumps(delegates, indent=2, default=json_default(args.timestamps == 'epoch')))
+        return 0
+    
+    listing = client.stream_delegates() if delegates is None else delegates.values()
+    if args.output == 'ndjson':
+        write_ndjson(listing, numeric_timestamps=args.timestamps == 'epoch')
+        return 0
+    
+    def title(count):
+        if count is None:
+            return f"\n{EMOJI_INFO}{Fore.CYAN}Delegates:"
+        return f"\n{EMOJI_INFO}{Fore.CYAN}Found {Fore.YELLOW}{count}{Fore.CYAN} delegates:"
+    
+    # Rows are printed as listing pages arrive
+    table = StreamingTable.from_args(["Name", "ID", "Hostname", "IP", "Status", "Version", "Labels"], args)
+    count = table.write((_delegate_row(delegate) for delegate in listing), title=title)
+    
+    if not count:
         print(f"{EMOJI_WARNING}{Fore.YELLOW}No delegates found")
+    elif count > args.table_sample:
+        print(f"{EMOJI_INFO}{Fore.CYAN}Found {Fore.YELLOW}{count}{Fore.CYAN} delegates")
+    
+    return 0
+
+def _snapshot_store(args, client):
+    from harness_debugger.delegate_snapshots import SnapshotStore
+    return SnapshotStore(client.account_id)
+
+# Order of --changed-since rows, and the color of each kind of change
+CHANGE_COLORS = {
+    "removed": Fore.RED,
+    "stale": Fore.RED,
+    "changed": Fore.YELLOW,
+    "added": Fore.GREEN,
+    "recovered": Fore.GREEN,
+}
+
+def list_changed_delegates(args, client):
+    """
+    Show the delegates added, removed, changed or gone stale since a saved snapshot
+    
+    The current listing is saved as a new snapshot, so repeated polls compare
+    against each other. Only changed delegates are looked up individually.
+    Pass a client that skips the response cache (see client.refreshing).
+    """
+    from harness_debugger.delegate_snapshots import DelegateSnapshot, diff_snapshots
+    from harness_debugger.records import format_epoch_ms
+    from harness_debugger.utils.concurrency import ordered_map
+    
+    store = _snapshot_store(args, client)
+    try:
+        baseline = store.resolve(args.changed_since)
+    except ValueError as e:
+        print(f"{EMOJI_ERROR}{Fore.RED}{e}")
+        return 1
+    
+    delegates = client.get_all_delegates()
+    if not delegates:
+        # An empty or failed listing would read as every delegate removed
+        print(f"{EMOJI_ERROR}{Fore.RED}No delegates listed; not comparing against the snapshot")
+        return 1
+    if client.incomplete_reasons():
+        # Delegates on the pages that were never fetched would read as removed
+        print(f"{EMOJI_ERROR}{Fore.RED}Listing is incomplete; not comparing against the snapshot")
+        return EXIT_INCOMPLETE
+    current = DelegateSnapshot.of(delegates.values())
+    saved = store.save(current)
+    
+    if baseline is None:
+        print(f"{EMOJI_WARNING}{Fore.YELLOW}No delegate snapshot yet; saved this listing as the baseline: {saved}")
         return 0
-        
+    
+    changes = diff_snapshots(baseline, current, getattr(args, 'stale_after', DEFAULT_HEARTBEAT_STALE_SECONDS))
+    changes.sort(key=lambda change: list(CHANGE_COLORS).index(change["change"]))
+    # Details only for what changed, so the follow-up cost scales with churn
+    looked_up = [change for change in changes if change["change"] != "removed"]
+    for change, info in zip(looked_up, ordered_map(client.get_delegate_info, [change["id"] for change in looked_up],
+                                                   DEFAULT_DETAIL_WORKERS)):
+        if info:
+            change["delegate"] = info
+    
+    numeric = args.timestamps == 'epoch'
+    if args.output == 'ndjson':
+        write_ndjson(changes, numeric_timestamps=numeric)
+        return 0
+    
     if args.output == 'json':
-        print(json.dumps(delegates, indent=2))
+        print(jsonlib.dumps({
+            "since": baseline.taken_at_ms if numeric else format_epoch_ms(baseline.taken_at_ms),
+            "snapshot": baseline.path,
+            "saved": saved,
+            "delegates": len(delegates),
+            "changes": changes,
+        }, indent=2, default=json_default(numeric)))
         return 0
-        
-    print(f"\n{EMOJI_INFO}{Fore.CYAN}Found {Fore.YELLOW}{len(delegates)}{Fore.CYAN} delegates:")
     
-    # Create a table for better display
-    table_data = []
-    for delegate_id, delegate in delegates.items():
-        status = delegate.get('status')
-        status_color = Fore.GREEN if status == 'ENABLED' else Fore.RED
-        
-        table_data.append([
-            delegate.get('name'),
-            delegate_id,
-            delegate.get('hostname'),
-            delegate.get('ip'),
-            f"{status_color}{status}{Fore.RESET}",
-            delegate.get('version'),
-            ", ".join(delegate.get('labels', [])) or "None"
-        ])
-    
-    headers = ["Name", "ID", "Hostname", "IP", "Status", "Version", "Labels"]
-    print(tabulate(table_data, headers=headers, tablefmt="pretty"))
+    since = f"{format_epoch_ms(baseline.taken_at_ms)} ({baseline.name})"
+    if not changes:
+        print(f"{EMOJI_SUCCESS}{Fore.GREEN}No delegate changes since {since}")
+        return 0
     
+    def title(count):
+        return f"\n{EMOJI_DELEGATE}{Fore.CYAN}Delegate changes since {since}:"
+    
+    table = StreamingTable.from_args(["Change", "Name", "ID", "Status", "Version", "Last Heartbeat", "Details"], args)
+    table.write((_change_row(change) for change in changes), title=title)
+    
+    counts = {kind: 0 for kind in CHANGE_COLORS}
+    for change in changes:
+        counts[change["change"]] += 1
+    summary = ", ".join(f"{count} {kind}" for kind, count in counts.items() if count)
+    print(f"{EMOJI_INFO}{Fore.CYAN}{summary} of {Fore.YELLOW}{len(delegates)}{Fore.CYAN} delegates")
     return 0
 
+def _change_row(change):
+    from harness_debugger.records import format_epoch_ms
+    
+    def shown(field, value):
+        if field in ("heartbeat", "connected_at"):
+            return format_epoch_ms(value)
+        if field == "labels":
+            return ", ".join(value) or "None"
+        return value
+    
+    delegate = change["delegate"]
+    details = "; ".join(f"{field}: {shown(field, before)} -> {shown(field, after)}"
+                        for field, (before, after) in change["fields"].items())
+    return [
+        f"{CHANGE_COLORS[change['change']]}{change['change']}{Fore.RESET}",
+        delegate.get('name'),
+        change["id"],
+        delegate.get('status'),
+        delegate.get('version'),
+        delegate.get('last_heartbeat'),
+        details,
+    ]
+
+def _delegate_row(delegate):
+    status = delegate.get('status')
+    status_color = Fore.GREEN if status == 'ENABLED' else Fore.RED
+    
+    return [
+        delegate.get('name'),
+        delegate.get('id'),
+        delegate.get('hostname'),
+        delegate.get('ip'),
+        f"{status_color}{status}{Fore.RESET}",
+        delegate.get('version'),
+        ", ".join(delegate.get('labels', [])) or "None"
+    ]
+
 def show_delegate_info(args, client):
     """Show detailed information about a specific delegate."""
     delegate_id = args.delegate_id
@@ -50,9 +192,13 @@ def show_delegate_info(args, client):
     if not delegate:
         print(f"{EMOJI_ERROR}{Fore.RED}Could not find delegate with ID: {delegate_id}")
         return 1
+    
+    if args.output == 'ndjson':
+        write_ndjson([delegate], numeric_timestamps=args.timestamps == 'epoch')
+        return 0
         
     if args.output == 'json':
-        print(json.dumps(delegate, indent=2))
+        print(jsonlib.dumps(delegate, indent=2, default=json_default(args.timestamps == 'epoch')))
         return 0
         
     print(f"\n{EMOJI_DELEGATE}{Fore.CYAN}Delegate Information:")
@@ -61,14 +207,16 @@ def show_delegate_info(args, client):
     return 0
 
 def test_connectivity(args, client):
-    """Generate connectivity test commands for a delegate."""
-    delegate_id = args.delegate_id
-    urls = args.urls
+    """Probe connectivity from this machine (--run), or generate test commands for a delegate."""
+    if args.run:
+        return run_connectivity_probes(args)
     
-    if urls:
-        urls = [url if url.startswith(('http://', 'https://')) else f"https://{url}" for url in urls]
+    delegate_id = args.delegate_id
+    if not delegate_id:
+        print(f"{EMOJI_ERROR}{Fore.RED}A delegate ID is required unless --run is given")
+        return 1
     
-    results = client.test_delegate_connectivity(delegate_id, urls)
+    results = client.test_delegate_connectivity(delegate_id, args.urls)
     
     if not results:
         print(f"{EMOJI_ERROR}{Fore.RED}Failed to get delegate information")
@@ -108,4 +256,54 @@ def test_connectivity(args, client):
     
     return 0
 
+def run_connectivity_probes(args):
+    """Probe the given URLs concurrently from this machine and report per-phase timings."""
+    import socket
+    import time
+    from harness_debugger.probes import run_probes
+    
+    urls = args.urls or list(DEFAULT_CONNECTIVITY_URLS)
+    started = time.perf_counter()
+    results = run_probes(urls, timeout=args.timeout, concurrency=args.concurrency)
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for result in results if not result["ok"])
+    
+    if args.output == 'ndjson':
+        write_ndjson(results)
+        return 1 if failed else 0
+    
+    if args.output == 'json':
+        print(jsonlib.dumps(results, indent=2))
+        return 1 if failed else 0
+    
+    def title(count):
+        return f"\n{EMOJI_NETWORK}{Fore.CYAN}Connectivity from {Fore.WHITE}{socket.gethostname()}{Fore.CYAN}:"
+    
+    table = StreamingTable.from_args(["URL", "Address", "DNS", "Connect", "TLS", "HTTP", "Result"], args)
+    table.write((_probe_row(result) for result in results), title=title)
+    
+    color = Fore.RED if failed else Fore.GREEN
+    print(f"{EMOJI_TIME}{color}{len(results) - failed} of {len(results)} reachable "
+          f"{Fore.CYAN}({elapsed * 1000:.0f} ms)")
+    return 1 if failed else 0
+
+def _probe_row(result):
+    milliseconds = lambda value: "-" if value is None else f"{value:.1f} ms"
+    
+    if result["ok"]:
+        color = Fore.GREEN if result["status"] < 500 else Fore.YELLOW
+        outcome = f"{color}HTTP {result['status']}{Fore.RESET}"
+    else:
+        outcome = f"{Fore.RED}{result['failed_phase']}: {result['error']}{Fore.RESET}"
+    
+    return [
+        result["url"],
+        result["address"],
+        milliseconds(result["dns_ms"]),
+        milliseconds(result["connect_ms"]),
+        milliseconds(result["tls_ms"]),
+        milliseconds(result["http_ms"]),
+        outcome
+    ]
+
 # Add other delegate command functions here... 
\ No newline at end of file
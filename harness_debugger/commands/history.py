@@ -0,0 +1,127 @@
+"""Offline execution-history commands for the Harness Debugger CLI tool."""
+
+import os
+import time
+from colorama import Fore
+
+from harness_debugger.utils import jsonlib
+from harness_debugger.utils.constants import *
+from harness_debugger.utils.formatting import json_default, write_ndjson
+from harness_debugger.utils.table import StreamingTable
+
+# Runs listed in text output when no --limit is given
+TEXT_RUN_LIMIT = 50
+
+def query_history(args):
+    """List or count stored failed runs matching the filters, without calling the API."""
+    from harness_debugger.history import default_history_path, open_history
+
+    if not os.path.exists(args.history_file or default_history_path()):
+        print(f"{EMOJI_WARNING}{Fore.YELLOW}No execution history yet; run pipeline commands with --history to record it")
+        return 1
+    history = open_history(args, writing=False)
+    if history is None:
+        return 1
+
+    filters = {
+        "project": args.project,
+        "pipeline": args.pipeline,
+        "stage": args.stage,
+        "status": args.status,
+        "delegate": args.delegate,
+        "label": args.label,
+        "since_ms": int((time.time() - args.days * 24 * 60 * 60) * 1000) if args.days else None,
+    }
+    limit = args.limit or (TEXT_RUN_LIMIT if args.output == 'text' and not args.group_by else None)
+    started = time.perf_counter()
+    try:
+        if args.group_by:
+            rows = history.aggregate(args.group_by, limit=limit, **filters)
+        else:
+            rows = history.query_runs(limit=limit, **filters)
+    finally:
+        history.close()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if args.output == 'ndjson':
+        write_ndjson(rows, numeric_timestamps=args.timestamps == 'epoch')
+        return 0
+
+    if args.output == 'json':
+        print(jsonlib.dumps(rows, indent=2, default=json_default(args.timestamps == 'epoch')))
+        return 0
+
+    if args.group_by:
+        print_groups(args, rows)
+    else:
+        print_runs(args, rows)
+    noun = "groups" if args.group_by else "runs"
+    print(f"{EMOJI_TIME}{Fore.CYAN}{len(rows)} {noun} in {elapsed_ms:.1f} ms")
+    return 0
+
+def print_runs(args, runs):
+    """Display stored runs, one row each."""
+    def title(count):
+        return f"\n{EMOJI_PIPELINE}{Fore.CYAN}Stored failed runs, newest first:"
+
+    table = StreamingTable.from_args(["Start Time", "Execution", "Pipeline", "Stage", "Status",
+                                      "Failed Steps", "Delegates", "Failure Message"], args)
+    count = table.write((_run_row(run) for run in runs), title=title)
+    if not count:
+        print(f"{EMOJI_SUCCESS}{Fore.GREEN}No stored failed runs match")
+
+def _run_row(run):
+    steps = run.get('delegates') or []
+    failed = [step.get('step_name') for step in steps if step.get('step_status') == 'FAILED']
+    delegates = dict.fromkeys((step.get('delegate_info') or {}).get('name') for step in steps)
+    return [run['start_time'], run['execution_id'], run['pipeline_id'], run['stage'], run['status'],
+            ", ".join(filter(None, failed)), ", ".join(filter(None, delegates)), run.get('failure_message')]
+
+def print_groups(args, rows):
+    """Display failed-run counts per group."""
+    headers = {
+        "pipeline": ["Project", "Pipeline"],
+        "delegate": ["Delegate", "ID"],
+    }.get(args.group_by, [args.group_by.capitalize()])
+    steps = args.group_by in ("delegate", "label")
+
+    def title(count):
+        return f"\n{EMOJI_INFO}{Fore.CYAN}Failed runs per {args.group_by}:"
+
+    def cells(row):
+        if args.group_by == "pipeline":
+            keys = [row["project"], row["pipeline"]]
+        elif args.group_by == "delegate":
+            keys = [row["delegate"], row["delegate_id"]]
+        else:
+            keys = [row[args.group_by]]
+        return keys + [row["failed_runs"]] + ([row["failed_steps"]] if steps else []) + [row["last_failure"]]
+
+    table = StreamingTable.from_args(headers + ["Failed Runs"] + (["Failed Steps"] if steps else []) + ["Last Failure"],
+                                     args)
+    if not table.write((cells(row) for row in rows), title=title):
+        print(f"{EMOJI_SUCCESS}{Fore.GREEN}No stored failed runs match")
+
+def compact_history(args):
+    """Apply retention and compaction to the history store now and shrink the file."""
+    from harness_debugger.history import open_history
+
+    history = open_history(args, writing=False)
+    if history is None:
+        return 1
+    try:
+        before = history.size()
+        result = history.maintain(vacuum=True)
+        stats = history.stats()
+    finally:
+        history.close()
+
+    if args.output != 'text':
+        print(jsonlib.dumps({**result, "bytes_before": before, **stats}, indent=2))
+        return 0
+
+    print(f"{EMOJI_SUCCESS}{Fore.GREEN}Deleted {Fore.YELLOW}{result['expired'] + result['trimmed']}{Fore.GREEN} runs "
+          f"and compacted {Fore.YELLOW}{result['compacted']}{Fore.GREEN}; {before} -> {result['bytes']} bytes")
+    print(f"{EMOJI_INFO}{Fore.CYAN}{stats['runs']} runs ({stats['compacted_runs']} compacted) from "
+          f"{stats['first_run']} to {stats['last_run']} in {stats['path']}")
+    return 0
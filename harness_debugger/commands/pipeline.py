@@ -1,12 +1,15 @@
 """Pipeline-related commands for the Harness Debugger CLI tool."""
 
-import json
+import os
+import sys
 import time
 from colorama import Fore
 from datetime import datetime, timedelta
 
+from harness_debugger.errors import DeadlineExceeded
+from harness_debugger.utils import jsonlib
 from harness_debugger.utils.constants import *
-from harness_debugger.utils.formatting import format_delegate_info
+from harness_debugger.utils.formatting import format_delegate_info, json_default, write_ndjson
 
 def check_pipeline(args, client):
     """Check for failed runs in a specific pipeline stage."""
@@ -22,67 +25,267 @@ def check_pipeline(args, client):
     stage_name = args.stage
     days = args.days
     
+    # Runs are streamed newest first, so each one can be shown as soon as it is fetched
+    failed_runs = client.get_failed_runs(stage_name, pipeline_id, days, max_workers=args.workers)
+    if args.logs:
+        from harness_debugger.log_scan import LogScanner, attach_step_logs
+        scanner = LogScanner(args.log_pattern, context=args.log_context, max_excerpts=args.log_max_excerpts)
+        failed_runs = attach_step_logs(client, failed_runs, scanner, max_workers=args.log_workers)
+    failed_runs = record_history(args, client, failed_runs)
+    
+    if args.output == 'ndjson':
+        write_ndjson(failed_runs, numeric_timestamps=args.timestamps == 'epoch')
+        return 0
+    
+    if args.output == 'json':
+        failed_runs = list(failed_runs)
+        if not failed_runs:
+            print(f"{EMOJI_SUCCESS}{Fore.GREEN}No failed runs found for this stage in the specified time period.")
+            return 0
+        print(jsonlib.dumps(failed_runs, indent=2, default=json_default(args.timestamps == 'epoch')))
+        return 0
+    
     print(f"{EMOJI_INFO}{Fore.CYAN}Checking for failures in pipeline {Fore.YELLOW}{pipeline_id}{Fore.CYAN}, stage {Fore.YELLOW}{stage_name}{Fore.CYAN} in the last {Fore.YELLOW}{days}{Fore.CYAN} days...")
     
-    failed_runs = client.get_failed_runs(stage_name, pipeline_id, days)
+    failed_count = 0
+    last_failed_run = None
+    for run in failed_runs:
+        if last_failed_run is None:
+            last_failed_run = run
+            print(f"\n{EMOJI_ERROR}{Fore.RED}Failed runs for stage {Fore.YELLOW}{stage_name}{Fore.RED}:")
+        failed_count += 1
+        print_failed_run(run)
     
-    if not failed_runs:
+    if not failed_count:
         print(f"{EMOJI_SUCCESS}{Fore.GREEN}No failed runs found for this stage in the specified time period.")
         return 0
+    
+    print(f"\n{EMOJI_ERROR}{Fore.RED}Found {Fore.YELLOW}{failed_count}{Fore.RED} failed runs for stage {Fore.YELLOW}{stage_name}{Fore.RED}")
+    
+    # Set output variables for Harness if running in pipeline
+    output_file = args.output_file or os.environ.get("HARNESS_OUTPUT_PATH", "output.txt")
+    write_output_variables(output_file, failed_count, last_failed_run)
+                
+    return 0
+
+def watch_pipeline(args, client):
+    """
+    Poll a pipeline stage for new failed runs until interrupted
+
+    Each poll only asks for executions newer than the persisted high-water
+    mark (less --lookback, to catch runs that were still in progress), skips
+    runs already reported, and rewrites the output variables when a new
+    failure appears.
+    """
+    from harness_debugger.history import open_history
+    from harness_debugger.watch_state import WatchState
+    
+    if not args.pipeline:
+        print(f"{EMOJI_ERROR}{Fore.RED}Error: Pipeline ID is required")
+        return 1
         
-    if args.output == 'json':
-        print(json.dumps(failed_runs, indent=2))
+    if not args.stage:
+        print(f"{EMOJI_ERROR}{Fore.RED}Error: Stage name is required")
+        return 1
+    
+    pipeline_id = args.pipeline
+    stage_name = args.stage
+    state = WatchState(args.state_file)
+    mark = state.mark(WatchState.key((client.account_id, client.org_id, client.project_id), pipeline_id, stage_name))
+    output_file = args.output_file or os.environ.get("HARNESS_OUTPUT_PATH", "output.txt")
+    lookback_ms = args.lookback * 60 * 1000
+    history = open_history(args)
+    scope = (client.account_id, client.org_id, client.project_id)
+    
+    if args.output == 'text':
+        print(f"{EMOJI_INFO}{Fore.CYAN}Watching pipeline {Fore.YELLOW}{pipeline_id}{Fore.CYAN}, stage {Fore.YELLOW}{stage_name}{Fore.CYAN} every {Fore.YELLOW}{args.interval}s{Fore.CYAN} (Ctrl+C to stop)...")
+    
+    try:
+        while True:
+            poll_started_ms = int(time.time() * 1000)
+            since_ms = mark.since_ms - lookback_ms if mark.since_ms is not None else None
+            new_runs = []
+            out_of_time = False
+            try:
+                for run in client.iter_failed_runs(stage_name, pipeline_id, args.days, max_workers=args.workers,
+                                                   since_ms=since_ms, exclude=set(mark.seen)):
+                    mark.record(run)
+                    new_runs.append(run)
+                    if args.output == 'text':
+                        print_failed_run(run)
+                    else:
+                        write_ndjson([run], numeric_timestamps=args.timestamps == 'epoch')
+            except DeadlineExceeded as e:
+                # --deadline bounds the whole watch: report what this poll found, then stop
+                print(f"{EMOJI_WARNING}{Fore.YELLOW}Stopped watching: {e}", file=sys.stderr)
+                out_of_time = True
+            except Exception as e:
+                # Keep watching; the mark stays put so the next poll covers this window again
+                print(f"{EMOJI_WARNING}{Fore.YELLOW}Poll failed, will retry: {e}", file=sys.stderr)
+            else:
+                mark.advance(poll_started_ms, poll_started_ms - args.days * 24 * 60 * 60 * 1000)
+            state.save()
+            
+            if new_runs:
+                if history is not None:
+                    history.save(new_runs, scope)
+                write_output_variables(output_file, len(mark.seen), mark.last_run)
+                if args.output == 'text':
+                    print(f"\n{EMOJI_ERROR}{Fore.YELLOW}{len(new_runs)}{Fore.RED} new failed runs, {Fore.YELLOW}{len(mark.seen)}{Fore.RED} in the last {args.days} days")
+            
+            if args.once or out_of_time:
+                return 0
+            # Wake up for the deadline, so the next poll stops at once
+            deadline = client.deadline
+            time.sleep(min(args.interval, max(0.0, deadline.remaining())) if deadline else args.interval)
+    except KeyboardInterrupt:
+        state.save()
         return 0
-        
-    print(f"\n{EMOJI_ERROR}{Fore.RED}Found {Fore.YELLOW}{len(failed_runs)}{Fore.RED} failed runs for stage {Fore.YELLOW}{stage_name}{Fore.RED}:")
+    finally:
+        if history is not None:
+            history.close()
+
+def scan_pipelines(args, client):
+    """Scan many pipelines, stages and projects for failed runs and print one aggregated report."""
+    from harness_debugger.fleet import fleet_targets, scan_fleet
+    from harness_debugger.history import open_history
     
-    # Display each failed run with delegate information
-    for run in failed_runs:
-        print("\n" + "=" * 80)
-        print(f"{EMOJI_PIPELINE}{Fore.CYAN}Execution ID: {Fore.WHITE}{run['execution_id']}")
-        print(f"{EMOJI_TIME}{Fore.CYAN}Start Time: {Fore.WHITE}{run['start_time']}")
-        print(f"{EMOJI_ERROR}{Fore.CYAN}Status: {Fore.RED}{run['status']}")
-        print(f"{EMOJI_ERROR}{Fore.CYAN}Failure Message: {Fore.WHITE}{run['failure_message']}")
-        
-        # Print delegate information
-        if run.get('delegates'):
-            print(f"\n{EMOJI_DELEGATE}{Fore.CYAN}DELEGATE INFORMATION:")
-            for d_info in run['delegates']:
-                delegate = d_info.get('delegate_info', {})
-                
-                print(f"  {Fore.YELLOW}Step: {Fore.WHITE}{d_info.get('step_name')}")
-                print(format_delegate_info(delegate))
-                
-                if d_info.get('step_status') == 'FAILED':
-                    print(f"  {EMOJI_ERROR}{Fore.YELLOW}Step Error: {Fore.RED}{d_info.get('error_message')}")
-                print()
-        else:
-            print(f"  {EMOJI_WARNING}{Fore.YELLOW}No delegate information available")
+    projects = args.projects or ([client.project_id] if client.project_id else [])
+    if not projects:
+        print(f"{EMOJI_ERROR}{Fore.RED}Error: No project given; use --projects or set HARNESS_PROJECT_ID")
+        return 1
+    
+    workers = max(1, args.workers)
+    try:
+        targets = fleet_targets(client, projects, args.pipelines, args.stages, max_workers=workers)
+    except Exception as e:
+        print(f"{EMOJI_ERROR}{Fore.RED}Error discovering projects and pipelines: {e}")
+        return 1
+    
+    if not targets:
+        print(f"{EMOJI_WARNING}{Fore.YELLOW}No pipelines matched")
+        return 0
+    
+    if args.output == 'text':
+        print(f"{EMOJI_INFO}{Fore.CYAN}Scanning {Fore.YELLOW}{len(targets)}{Fore.CYAN} pipeline stages for failures in the last {Fore.YELLOW}{args.days}{Fore.CYAN} days...")
+    
+    history = open_history(args)
+    try:
+        report = scan_fleet(client, targets, args.days, max_workers=workers, history=history)
+    finally:
+        if history is not None:
+            history.close()
+    
+    if args.output == 'ndjson':
+        write_ndjson(report.rows())
+    elif args.output == 'json':
+        print(jsonlib.dumps(report.to_dict(), indent=2))
+    else:
+        print_fleet_report(report)
+    return 0
+
+def record_history(args, client, runs):
+    """Record runs in the execution history store as they stream past, when --history is given."""
+    from harness_debugger.history import open_history
+    
+    history = open_history(args)
+    if history is None:
+        return runs
+    return history.record_runs(runs, (client.account_id, client.org_id, client.project_id), close=True)
+
+def print_fleet_report(report):
+    """Display a fleet scan report as tables per pipeline, stage and delegate."""
+    from tabulate import tabulate
+    
+    summary = report.to_dict()
+    color = Fore.RED if summary["failed_runs"] else Fore.GREEN
+    print(f"\n{EMOJI_INFO}{color}Found {Fore.YELLOW}{summary['failed_runs']}{color} failed runs across {Fore.YELLOW}{summary['targets']}{color} pipeline stages")
+    
+    if summary["pipelines"]:
+        print(f"\n{EMOJI_PIPELINE}{Fore.CYAN}Failures per pipeline:")
+        print(tabulate([[row["project"], row["pipeline"], row["failed_runs"]] for row in summary["pipelines"]],
+                       headers=["Project", "Pipeline", "Failed Runs"], tablefmt="grid"))
+    if summary["stages"]:
+        print(f"\n{EMOJI_PIPELINE}{Fore.CYAN}Failures per stage:")
+        print(tabulate([[row["stage"], row["failed_runs"]] for row in summary["stages"]],
+                       headers=["Stage", "Failed Runs"], tablefmt="grid"))
+    if summary["delegates"]:
+        print(f"\n{EMOJI_DELEGATE}{Fore.CYAN}Failures per delegate:")
+        print(tabulate([[row["delegate"], row["delegate_id"], row["failed_runs"], row["failed_steps"]]
+                        for row in summary["delegates"]],
+                       headers=["Delegate", "ID", "Failed Runs", "Failed Steps"], tablefmt="grid"))
+    for row in summary["errors"]:
+        print(f"{EMOJI_WARNING}{Fore.YELLOW}Could not scan {row['project']}/{row['pipeline']} ({row['stage']}): {row['error']}")
+
+def print_failed_run(run):
+    """Display a failed run with delegate information."""
+    print("\n" + "=" * 80)
+    print(f"{EMOJI_PIPELINE}{Fore.CYAN}Execution ID: {Fore.WHITE}{run['execution_id']}")
+    print(f"{EMOJI_TIME}{Fore.CYAN}Start Time: {Fore.WHITE}{run['start_time']}")
+    print(f"{EMOJI_ERROR}{Fore.CYAN}Status: {Fore.RED}{run['status']}")
+    print(f"{EMOJI_ERROR}{Fore.CYAN}Failure Message: {Fore.WHITE}{run['failure_message']}")
+    
+    # Print delegate information
+    if run.get('delegates'):
+        print(f"\n{EMOJI_DELEGATE}{Fore.CYAN}DELEGATE INFORMATION:")
+        for d_info in run['delegates']:
+            delegate = d_info.get('delegate_info', {})
+            
+            print(f"  {Fore.YELLOW}Step: {Fore.WHITE}{d_info.get('step_name')}")
+            print(format_delegate_info(delegate))
             
-        print("-" * 80)
+            if d_info.get('step_status') == 'FAILED':
+                print(f"  {EMOJI_ERROR}{Fore.YELLOW}Step Error: {Fore.RED}{d_info.get('error_message')}")
+            if d_info.get('log'):
+                print_log_excerpts(d_info['log'])
+            print()
+    else:
+        print(f"  {EMOJI_WARNING}{Fore.YELLOW}No delegate information available")
+        
+    print("-" * 80)
+
+def print_log_excerpts(log):
+    """Display the error lines found in a step log, with their context."""
+    if log.get('error'):
+        print(f"  {EMOJI_LOG}{Fore.YELLOW}Log: {Fore.RED}could not be read: {log['error']}")
+        return
+    if not log['excerpts']:
+        print(f"  {EMOJI_LOG}{Fore.YELLOW}Log: {Fore.WHITE}no error lines in {log['lines_scanned']} lines")
+        return
     
-    # Set output variables for Harness if running in pipeline
-    output_file = args.output_file or os.environ.get("HARNESS_OUTPUT_PATH", "output.txt")
+    omitted = " (earlier matches omitted)" if log['truncated'] else ""
+    print(f"  {EMOJI_LOG}{Fore.YELLOW}Log: {Fore.WHITE}{log['matches']} error lines in {log['lines_scanned']} lines{omitted}")
+    width = len(str(log['lines_scanned']))
+    for index, excerpt in enumerate(log['excerpts']):
+        if index:
+            print(f"    {Fore.CYAN}{'.' * width}")
+        matches = set(excerpt['matches'])
+        for number, line in enumerate(excerpt['lines'], excerpt['first_line']):
+            if number in matches:
+                print(f"  {Fore.RED}> {number:>{width}} | {line}")
+            else:
+                print(f"    {Fore.CYAN}{number:>{width}} {Fore.WHITE}| {line}")
+
+def write_output_variables(output_file, failed_count, last_failed_run):
+    """Write Harness output variables describing the most recent failed run."""
     with open(output_file, "w") as f:
-        f.write(f"FAILED_RUNS_COUNT={len(failed_runs)}\n")
-        f.write(f"LAST_FAILED_RUN_ID={failed_runs[0]['execution_id']}\n")
-        f.write(f"LAST_FAILED_TIME={failed_runs[0]['start_time']}\n")
+        f.write(f"FAILED_RUNS_COUNT={failed_count}\n")
+        f.write(f"LAST_FAILED_RUN_ID={last_failed_run['execution_id']}\n")
+        f.write(f"LAST_FAILED_TIME={last_failed_run['start_time']}\n")
         
         # Add delegate information to output
-        if failed_runs[0].get('delegates'):
+        if last_failed_run.get('delegates'):
             delegates_used = ','.join([d.get('delegate_info', {}).get('name', 'Unknown') 
-                                    for d in failed_runs[0].get('delegates', [])])
+                                    for d in last_failed_run.get('delegates', [])])
             f.write(f"DELEGATES_USED={delegates_used}\n")
             
             # Add labels from the delegates
             all_labels = []
-            for d_info in failed_runs[0].get('delegates', []):
+            for d_info in last_failed_run.get('delegates', []):
                 all_labels.extend(d_info.get('delegate_info', {}).get('labels', []))
             
             if all_labels:
                 unique_labels = ','.join(set(all_labels))
                 f.write(f"DELEGATE_LABELS={unique_labels}\n")
-                
-    return 0
 
 # Add other pipeline command functions here... 
\ No newline at end of file
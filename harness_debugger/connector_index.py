@@ -0,0 +1,65 @@
+"""Inverted index from delegate selectors to connectors."""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+class ConnectorIndex:
+    """
+    Answer "which connectors use these delegate selectors" without API calls
+
+    Built once from a connector sweep. Each selector maps to the positions of
+    the connectors that use it, so a query costs O(matches) rather than a pass
+    over every connector.
+
+    Args:
+        connectors (Iterable[Dict]): Connector records with a delegateSelectors list
+    """
+
+    def __init__(self, connectors: Iterable[Dict]):
+        self.connectors = list(connectors)
+        self._by_selector = defaultdict(list)
+        for position, connector in enumerate(self.connectors):
+            for selector in set(connector.get("delegateSelectors") or []):
+                self._by_selector[selector].append(position)
+
+    def __len__(self):
+        return len(self.connectors)
+
+    @property
+    def selectors(self) -> List[str]:
+        """Every selector used by at least one connector."""
+        return sorted(self._by_selector)
+
+    def count(self, selector: str) -> int:
+        """Number of connectors that use a selector."""
+        return len(self._by_selector.get(selector, ()))
+
+    def match(self, selectors: Iterable[str], match_all: bool = False) -> List[Dict]:
+        """
+        Find connectors by delegate selector
+
+        Args:
+            selectors (Iterable[str]): Delegate selectors to look up
+            match_all (bool): Require every selector (AND) instead of any of them (OR)
+
+        Returns:
+            List[Dict]: Matching connectors, in sweep order
+        """
+        postings = [self._by_selector.get(selector, []) for selector in dict.fromkeys(selectors)]
+        if not postings:
+            return []
+
+        if match_all:
+            # Intersect starting from the shortest posting list
+            postings.sort(key=len)
+            positions = set(postings[0])
+            for posting in postings[1:]:
+                if not positions:
+                    break
+                positions.intersection_update(posting)
+        else:
+            positions = set()
+            for posting in postings:
+                positions.update(posting)
+
+        return [self.connectors[position] for position in sorted(positions)]
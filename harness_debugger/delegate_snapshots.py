@@ -0,0 +1,208 @@
+"""Saved delegate listings, and what changed between two of them, for `delegate list --changed-since`."""
+
+import calendar
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional
+
+from harness_debugger.records import DelegateRecord
+from harness_debugger.utils import jsonlib
+from harness_debugger.utils.constants import *
+from harness_debugger.utils.paths import default_cache_dir
+
+# Fields whose change marks a delegate as changed. Heartbeats move on every
+# poll, so they are compared by staleness instead of hashed.
+HASHED_FIELDS = ("name", "hostname", "ip", "status", "version", "labels", "connected_at_ms", "profile")
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds in a duration such as 90s, 15m, 2h or 1d; None if value is not one."""
+    match = _DURATION.match(value.strip().lower())
+    if not match:
+        return None
+    return float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+def record_hash(delegate: DelegateRecord) -> str:
+    """Digest of the hashed fields of a delegate (label order does not count)."""
+    values = [getattr(delegate, field) for field in HASHED_FIELDS]
+    values[HASHED_FIELDS.index("labels")] = sorted(delegate.labels)
+    return hashlib.blake2b(repr(values).encode(), digest_size=8).hexdigest()
+
+class DelegateSnapshot:
+    """
+    The delegates of one account at one point in time
+
+    `delegates` maps each delegate ID to (record hash, DelegateRecord).
+
+    Args:
+        taken_at_ms (int): When the listing was fetched, epoch millis
+        delegates (Dict): Delegate ID to (hash, record)
+        path (str): File the snapshot was loaded from or saved to
+    """
+
+    def __init__(self, taken_at_ms: int, delegates: Dict[str, tuple], path: Optional[str] = None):
+        self.taken_at_ms = taken_at_ms
+        self.delegates = delegates
+        self.path = path
+
+    @classmethod
+    def of(cls, delegates: Iterable[DelegateRecord], taken_at_ms: Optional[int] = None) -> "DelegateSnapshot":
+        """Snapshot a listing, hashing each record."""
+        return cls(taken_at_ms or int(time.time() * 1000),
+                   {delegate.id: (record_hash(delegate), delegate) for delegate in delegates})
+
+    @classmethod
+    def load(cls, path: str) -> "DelegateSnapshot":
+        with open(path, "rb") as f:
+            data = jsonlib.loads(f.read())
+        delegates = {delegate_id: (digest, DelegateRecord(**fields))
+                     for delegate_id, (digest, fields) in data["delegates"].items()}
+        return cls(data["taken_at_ms"], delegates, path)
+
+    def to_dict(self) -> Dict:
+        return {
+            "taken_at_ms": self.taken_at_ms,
+            "delegates": {
+                delegate_id: [digest, {slot: getattr(delegate, slot) for slot in DelegateRecord.__slots__}]
+                for delegate_id, (digest, delegate) in self.delegates.items()
+            },
+        }
+
+    @property
+    def name(self) -> str:
+        return os.path.splitext(os.path.basename(self.path))[0] if self.path else ""
+
+class SnapshotStore:
+    """
+    Delegate snapshots of one account, one JSON file each, newest kept
+
+    Args:
+        account_id (str): Account the snapshots belong to
+        directory (str): Where to keep them (defaults to delegate-snapshots in the cache directory)
+        keep (int): Snapshots kept per account; older ones are deleted on save
+    """
+
+    def __init__(self, account_id: str, directory: Optional[str] = None, keep: int = DEFAULT_DELEGATE_SNAPSHOTS):
+        self.directory = directory or os.path.join(default_cache_dir(), "delegate-snapshots")
+        self.prefix = "delegates-" + re.sub(r"[^\w.-]", "_", account_id or "default") + "-"
+        self.keep = keep
+
+    def paths(self) -> List[str]:
+        """Snapshot files of this account, oldest first (names sort by time)."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, name) for name in sorted(names)
+                if name.startswith(self.prefix) and name.endswith(".json")]
+
+    def _taken_at_ms(self, path: str) -> int:
+        stamp = os.path.basename(path)[len(self.prefix):-len(".json")]
+        return calendar.timegm(time.strptime(stamp[:15], "%Y%m%dT%H%M%S")) * 1000 + int(stamp[15:18])
+
+    def save(self, snapshot: DelegateSnapshot) -> str:
+        """Write the snapshot atomically, delete the oldest beyond `keep`, and return its path."""
+        os.makedirs(self.directory, exist_ok=True)
+        seconds, millis = divmod(snapshot.taken_at_ms, 1000)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(seconds)) + f"{millis:03d}Z"
+        path = os.path.join(self.directory, f"{self.prefix}{stamp}.json")
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".delegates-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(jsonlib.dumps(snapshot.to_dict()))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        snapshot.path = path
+        for old in self.paths()[:-self.keep] if self.keep > 0 else []:
+            os.unlink(old)
+        return path
+
+    def resolve(self, spec: str, now_ms: Optional[int] = None) -> Optional[DelegateSnapshot]:
+        """
+        Find the baseline snapshot for --changed-since
+
+        Args:
+            spec (str): 'last' for the newest snapshot; a duration (15m, 2h, 1d)
+                for the newest one at least that old, or the oldest there is if
+                none is; a snapshot name; or a snapshot file path
+            now_ms (int): Current time, epoch millis
+
+        Returns:
+            DelegateSnapshot, or None if this account has no snapshots yet
+
+        Raises:
+            ValueError: If spec names a snapshot that does not exist
+        """
+        if os.path.isfile(spec):
+            return DelegateSnapshot.load(spec)
+        paths = self.paths()
+        seconds = parse_duration(spec)
+        if spec == "last" or seconds is not None:
+            if not paths:
+                return None
+            if seconds is not None:
+                cutoff_ms = (now_ms or int(time.time() * 1000)) - seconds * 1000
+                old_enough = [path for path in paths if self._taken_at_ms(path) <= cutoff_ms]
+                return DelegateSnapshot.load(old_enough[-1] if old_enough else paths[0])
+            return DelegateSnapshot.load(paths[-1])
+        path = os.path.join(self.directory, spec if spec.endswith(".json") else spec + ".json")
+        if os.path.isfile(path):
+            return DelegateSnapshot.load(path)
+        raise ValueError(f"No delegate snapshot named {spec!r} (expected 'last', a duration like 15m, "
+                         f"a snapshot name or a file)")
+
+def _is_stale(delegate: DelegateRecord, at_ms: int, stale_after_ms: int) -> bool:
+    return not delegate.last_heartbeat_ms or at_ms - delegate.last_heartbeat_ms > stale_after_ms
+
+def diff_snapshots(old: DelegateSnapshot, new: DelegateSnapshot,
+                   stale_after_s: float = DEFAULT_HEARTBEAT_STALE_SECONDS) -> List[Dict]:
+    """
+    What changed between two snapshots, in one pass over their hash maps
+
+    Unchanged delegates cost one hash comparison and two staleness checks;
+    only delegates whose hash differs have their fields compared.
+
+    Args:
+        old (DelegateSnapshot): Baseline
+        new (DelegateSnapshot): Current listing
+        stale_after_s (float): Seconds without a heartbeat before a delegate counts as stale
+
+    Returns:
+        One entry per delegate that was added, removed, changed or whose
+        heartbeat went stale or recovered: {"change", "id", "fields",
+        "delegate"}, where fields maps each changed field to [old, new]
+        (heartbeat to the old and new epoch millis) and delegate is the
+        current record (the last one seen, if removed)
+    """
+    stale_after_ms = stale_after_s * 1000
+    changes = []
+    for delegate_id, (digest, delegate) in new.delegates.items():
+        previous = old.delegates.get(delegate_id)
+        if previous is None:
+            changes.append({"change": "added", "id": delegate_id, "fields": {}, "delegate": delegate})
+            continue
+        old_digest, old_delegate = previous
+        fields = {}
+        if digest != old_digest:
+            for field in HASHED_FIELDS:
+                before, after = getattr(old_delegate, field), getattr(delegate, field)
+                if before != after:
+                    fields[field[:-len("_ms")] if field.endswith("_ms") else field] = [before, after]
+        was_stale = _is_stale(old_delegate, old.taken_at_ms, stale_after_ms)
+        is_stale = _is_stale(delegate, new.taken_at_ms, stale_after_ms)
+        if was_stale != is_stale:
+            fields["heartbeat"] = [old_delegate.last_heartbeat_ms, delegate.last_heartbeat_ms]
+        if fields:
+            change = "changed" if set(fields) - {"heartbeat"} else ("stale" if is_stale else "recovered")
+            changes.append({"change": change, "id": delegate_id, "fields": fields, "delegate": delegate})
+    for delegate_id, (_, delegate) in old.delegates.items():
+        if delegate_id not in new.delegates:
+            changes.append({"change": "removed", "id": delegate_id, "fields": {}, "delegate": delegate})
+    return changes
@@ -0,0 +1,18 @@
+"""Exceptions raised by the API clients."""
+
+class HarnessAPIError(Exception):
+    """Raised when the Harness API answers with a non-SUCCESS status."""
+
+class RequestRefused(Exception):
+    """
+    Raised instead of a request that the command's deadline or a circuit breaker refuses
+
+    Not a HarnessAPIError: the results so far are partial rather than failed,
+    so the helpers that report API errors and carry on must not swallow it.
+    """
+
+class DeadlineExceeded(RequestRefused):
+    """Raised instead of a request once the command's --deadline has run out."""
+
+class CircuitOpenError(RequestRefused):
+    """Raised instead of a request to an endpoint whose circuit breaker is open."""
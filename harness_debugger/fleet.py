@@ -0,0 +1,160 @@
+"""Failure scans across many pipelines, stages and projects with one shared client."""
+
+from collections import Counter
+from fnmatch import fnmatchcase
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from harness_debugger.utils.concurrency import ordered_map
+from harness_debugger.utils.constants import *
+
+def expand_names(patterns: Iterable[str], discover: Callable[[], Iterable[str]]) -> List[str]:
+    """
+    Expand a list of names and globs
+
+    Plain names are used as given; discover() is only called when a glob
+    (*, ? or [...]) needs the full list to match against.
+
+    Returns:
+        List[str]: Names in first-seen order, without duplicates
+    """
+    patterns = list(patterns)
+    names = [pattern for pattern in patterns if not any(char in pattern for char in "*?[")]
+    globs = [pattern for pattern in patterns if pattern not in names]
+    if globs:
+        names.extend(name for name in discover() if name and any(fnmatchcase(name, glob) for glob in globs))
+    return list(dict.fromkeys(names))
+
+class FleetReport:
+    """Failed runs aggregated per pipeline, per stage and per delegate."""
+
+    def __init__(self):
+        self.targets = 0
+        self.by_pipeline = Counter()
+        self.by_stage = Counter()
+        self.delegate_runs = Counter()
+        self.delegate_steps = Counter()
+        self.delegate_names = {}
+        self.errors = {}
+        self._seen = set()
+
+    @property
+    def failed_runs(self) -> int:
+        return len(self._seen)
+
+    def add(self, project_id: str, pipeline_id: str, stage: str, runs: Iterable[Dict],
+            error: Optional[str] = None):
+        """Add the result of scanning one project/pipeline/stage target."""
+        self.targets += 1
+        if error:
+            self.errors[(project_id, pipeline_id, stage)] = error
+        for run in runs:
+            # A run can match more than one stage pattern; count it once per pipeline
+            key = (project_id, run["execution_id"])
+            if key not in self._seen:
+                self._seen.add(key)
+                self.by_pipeline[(project_id, pipeline_id)] += 1
+            self.by_stage[run["stage"]] += 1
+
+            delegate_ids = set()
+            for step in run.get("delegates") or []:
+                delegate = step.get("delegate_info") or {}
+                delegate_id = delegate.get("id", "Unknown")
+                self.delegate_names.setdefault(delegate_id, delegate.get("name", "Unknown"))
+                delegate_ids.add(delegate_id)
+                if step.get("step_status") == "FAILED":
+                    self.delegate_steps[delegate_id] += 1
+            self.delegate_runs.update(delegate_ids)
+
+    def rows(self) -> Iterator[Dict]:
+        """One flat record per aggregate, each group sorted by failed runs (most first)."""
+        for (project_id, pipeline_id), count in self.by_pipeline.most_common():
+            yield {"group": "pipeline", "project": project_id, "pipeline": pipeline_id, "failed_runs": count}
+        for stage, count in self.by_stage.most_common():
+            yield {"group": "stage", "stage": stage, "failed_runs": count}
+        for delegate_id, count in self.delegate_runs.most_common():
+            yield {"group": "delegate", "delegate_id": delegate_id, "delegate": self.delegate_names[delegate_id],
+                   "failed_runs": count, "failed_steps": self.delegate_steps[delegate_id]}
+        for (project_id, pipeline_id, stage), error in self.errors.items():
+            yield {"group": "error", "project": project_id, "pipeline": pipeline_id, "stage": stage, "error": error}
+
+    def to_dict(self) -> Dict:
+        groups = {"pipeline": [], "stage": [], "delegate": [], "error": []}
+        for row in self.rows():
+            groups[row.pop("group")].append(row)
+        return {
+            "targets": self.targets,
+            "failed_runs": self.failed_runs,
+            "pipelines": groups["pipeline"],
+            "stages": groups["stage"],
+            "delegates": groups["delegate"],
+            "errors": groups["error"]
+        }
+
+def fleet_targets(client, projects: Iterable[str], pipelines: Iterable[str], stages: Iterable[str],
+                  max_workers: int = DEFAULT_FLEET_WORKERS) -> List[Tuple[str, str, str]]:
+    """
+    Expand project, pipeline and stage lists into (project, pipeline, stage) targets
+
+    Projects are discovered from the client's org and pipelines from each
+    project only when a glob asks for it; pipeline discovery runs concurrently.
+    """
+    stages = list(dict.fromkeys(stages))
+    project_ids = expand_names(projects, client.iter_projects)
+    pipelines = list(pipelines)
+
+    def project_pipelines(project_id):
+        return expand_names(pipelines, client.with_scope(project_id=project_id).iter_pipelines)
+
+    return [
+        (project_id, pipeline_id, stage)
+        for project_id, pipeline_ids in zip(project_ids, ordered_map(project_pipelines, project_ids, max_workers))
+        for pipeline_id in pipeline_ids
+        for stage in stages
+    ]
+
+def scan_fleet(client, targets: Iterable[Tuple[str, str, str]], days: int = 7,
+               max_workers: int = DEFAULT_FLEET_WORKERS, history=None) -> FleetReport:
+    """
+    Scan many pipeline stages for failed runs and aggregate the results
+
+    Targets run on a bounded worker pool. They all share the client's
+    connection pool, request scheduler, response cache and delegate resolver,
+    so each delegate is fetched once for the whole fleet. A target that fails
+    is recorded in the report's errors instead of aborting the scan.
+
+    Args:
+        client: HarnessClient (or BlockingAsyncClient) to share between targets
+        targets (Iterable[Tuple[str, str, str]]): (project, pipeline, stage) to scan; stage may be a glob
+        days (int): Number of days to look back
+        max_workers (int): Maximum targets scanned concurrently
+        history (HistoryStore): Where to record the runs found, if anywhere
+
+    Returns:
+        FleetReport: Aggregated failures
+    """
+    # Split the connection pool between targets instead of oversubscribing it
+    detail_workers = max(1, client.pool_size // max_workers)
+    scoped_clients = {}
+
+    def scan(target):
+        project_id, pipeline_id, stage = target
+        runs = []
+        try:
+            for run in scoped_clients[project_id].iter_failed_runs(stage, pipeline_id, days,
+                                                                   max_workers=detail_workers):
+                runs.append(run)
+        except Exception as e:
+            return target, runs, str(e) or type(e).__name__
+        return target, runs, None
+
+    targets = list(targets)
+    for project_id, _, _ in targets:
+        if project_id not in scoped_clients:
+            scoped_clients[project_id] = client.with_scope(project_id=project_id)
+
+    report = FleetReport()
+    for (project_id, pipeline_id, stage), runs, error in ordered_map(scan, targets, max_workers):
+        report.add(project_id, pipeline_id, stage, runs, error)
+        if history is not None and runs:
+            history.save(runs, (client.account_id, client.org_id, project_id))
+    return report
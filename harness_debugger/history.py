@@ -0,0 +1,436 @@
+"""Local SQLite store of failed pipeline runs, queried offline by `history query`."""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from harness_debugger.records import format_epoch_ms
+from harness_debugger.utils import jsonlib
+from harness_debugger.utils.constants import *
+from harness_debugger.utils.formatting import json_default
+from harness_debugger.utils.paths import default_cache_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    org_id TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    execution_id TEXT NOT NULL,
+    pipeline_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    failure_message TEXT,
+    record TEXT,
+    UNIQUE (account_id, execution_id, stage)
+);
+CREATE INDEX IF NOT EXISTS runs_pipeline ON runs (pipeline_id, stage, start_ts);
+CREATE INDEX IF NOT EXISTS runs_stage ON runs (stage, start_ts);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status, start_ts);
+CREATE INDEX IF NOT EXISTS runs_start ON runs (start_ts);
+
+CREATE TABLE IF NOT EXISTS steps (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    start_ts INTEGER NOT NULL,
+    step_name TEXT,
+    step_id TEXT,
+    step_status TEXT,
+    error_message TEXT,
+    duration_ms INTEGER,
+    delegate_id TEXT,
+    delegate_name TEXT,
+    delegate_version TEXT
+);
+CREATE INDEX IF NOT EXISTS steps_run ON steps (run_id);
+CREATE INDEX IF NOT EXISTS steps_delegate ON steps (delegate_id, start_ts);
+CREATE INDEX IF NOT EXISTS steps_delegate_name ON steps (delegate_name, start_ts);
+
+CREATE TABLE IF NOT EXISTS step_labels (
+    step INTEGER NOT NULL REFERENCES steps (id) ON DELETE CASCADE,
+    label TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS step_labels_label ON step_labels (label, step);
+CREATE INDEX IF NOT EXISTS step_labels_step ON step_labels (step);
+"""
+
+# Columns filtered by exact value, or by GLOB when the value contains *, ? or [
+_RUN_FILTERS = {"project": "project_id", "pipeline": "pipeline_id", "stage": "stage", "status": "status"}
+
+def default_history_path() -> str:
+    """history.sqlite3 in the cache directory."""
+    return os.path.join(default_cache_dir(), "history.sqlite3")
+
+def _is_glob(value: str) -> bool:
+    return any(char in value for char in "*?[")
+
+class HistoryStore:
+    """
+    Failed runs fetched by the pipeline commands, indexed for offline queries
+
+    Runs are keyed by account, execution and stage, so fetching the same run
+    again replaces it. The full record (log excerpts and all delegate fields
+    included) is kept for compact_after_days; after that only the indexed
+    fields remain and records are rebuilt from them. Runs older than
+    retention_days, and the oldest beyond max_runs, are deleted whenever a
+    session that wrote runs is closed, at most every maintain_interval
+    seconds while one stays open, or by maintain(). A single instance is
+    thread-safe.
+
+    Args:
+        path (str): SQLite file (defaults to history.sqlite3 in the cache directory)
+        retention_days (int): Age after which runs are deleted; 0 keeps them forever
+        max_runs (int): Most runs kept; 0 for no limit
+        compact_after_days (int): Age after which full records are dropped
+    """
+
+    maintain_interval = 60 * 60
+
+    def __init__(self, path: Optional[str] = None, retention_days: int = DEFAULT_HISTORY_RETENTION_DAYS,
+                 max_runs: int = DEFAULT_HISTORY_MAX_RUNS,
+                 compact_after_days: int = DEFAULT_HISTORY_COMPACT_AFTER_DAYS):
+        self.path = path or default_history_path()
+        self.retention_days = retention_days
+        self.max_runs = max_runs
+        self.compact_after_days = compact_after_days
+        self._written = False
+        self._maintained = time.monotonic()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        # auto_vacuum only takes effect before the first table is created
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Writing
+
+    def add_runs(self, runs: Iterable[Dict], scope: Tuple[str, Optional[str], Optional[str]]) -> int:
+        """
+        Store failed-run records in one transaction
+
+        Args:
+            runs (Iterable[Dict]): Records as yielded by get_failed_runs
+            scope (Tuple): (account, org, project) the runs were fetched from
+
+        Returns:
+            int: Number of runs stored
+        """
+        account_id, org_id, project_id = (part or "" for part in scope)
+        count = 0
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for run in runs:
+                    self._insert(run, account_id, org_id, project_id)
+                    count += 1
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._written = self._written or count > 0
+        # Long-lived writers such as pipeline watch apply retention as they go
+        if self._written and time.monotonic() - self._maintained >= self.maintain_interval:
+            self.maintain()
+        return count
+
+    def _insert(self, run: Dict, account_id: str, org_id: str, project_id: str):
+        start_ts = run.get("start_ts") or 0
+        # Replacing a run deletes its steps and labels through the foreign keys
+        self._db.execute("DELETE FROM runs WHERE account_id = ? AND execution_id = ? AND stage = ?",
+                         (account_id, run["execution_id"], run.get("stage") or ""))
+        run_id = self._db.execute(
+            "INSERT INTO runs (account_id, org_id, project_id, execution_id, pipeline_id, stage, status, "
+            "start_ts, failure_message, record) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (account_id, org_id, project_id, run["execution_id"], run.get("pipeline_id") or "",
+             run.get("stage") or "", run.get("status") or "UNKNOWN", start_ts, run.get("failure_message"),
+             jsonlib.dumps(run, default=json_default()))
+        ).lastrowid
+        for step in run.get("delegates") or []:
+            delegate = step.get("delegate_info") or {}
+            step_row = self._db.execute(
+                "INSERT INTO steps (run_id, start_ts, step_name, step_id, step_status, error_message, duration_ms, "
+                "delegate_id, delegate_name, delegate_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, start_ts, step.get("step_name"), step.get("step_id"), step.get("step_status"),
+                 step.get("error_message"), step.get("duration_ms"), delegate.get("id"), delegate.get("name"),
+                 delegate.get("version"))
+            ).lastrowid
+            labels = delegate.get("labels") or []
+            if labels:
+                self._db.executemany("INSERT INTO step_labels (step, label) VALUES (?, ?)",
+                                     [(step_row, label) for label in labels])
+
+    def record_runs(self, runs: Iterable[Dict], scope: Tuple[str, Optional[str], Optional[str]],
+                    batch_size: int = DEFAULT_HISTORY_BATCH_SIZE, close: bool = False) -> Iterator[Dict]:
+        """
+        Yield runs unchanged while storing them, batch_size runs per transaction
+
+        A run is yielded before it is written, so output keeps streaming; a
+        store that cannot be written to is reported once and then skipped.
+        With close=True the store is closed when the runs are exhausted.
+        """
+        pending = []
+        try:
+            for run in runs:
+                yield run
+                pending.append(run)
+                if len(pending) >= batch_size:
+                    self.save(pending, scope)
+                    pending = []
+        finally:
+            if pending:
+                self.save(pending, scope)
+            if close:
+                self.close()
+
+    def save(self, runs: Iterable[Dict], scope: Tuple[str, Optional[str], Optional[str]]) -> int:
+        """add_runs, printing a warning instead of raising when the database cannot be written."""
+        try:
+            return self.add_runs(runs, scope)
+        except sqlite3.Error as e:
+            from colorama import Fore
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}Could not record runs in {self.path}: {e}", file=sys.stderr)
+            return 0
+
+    # Retention and compaction
+
+    def maintain(self, vacuum: bool = False) -> Dict:
+        """
+        Apply retention, the run cap and compaction
+
+        Args:
+            vacuum (bool): Rebuild the file to its minimal size, instead of only
+                returning the free pages at its end
+
+        Returns:
+            Dict: expired, trimmed and compacted run counts, and the file size in bytes
+        """
+        self._maintained = time.monotonic()
+        now_ms = int(time.time() * 1000)
+        day_ms = 24 * 60 * 60 * 1000
+        with self._lock:
+            expired = trimmed = compacted = 0
+            if self.retention_days:
+                expired = self._db.execute("DELETE FROM runs WHERE start_ts < ?",
+                                           (now_ms - self.retention_days * day_ms,)).rowcount
+            if self.max_runs:
+                trimmed = self._db.execute(
+                    "DELETE FROM runs WHERE id IN (SELECT id FROM runs ORDER BY start_ts DESC LIMIT -1 OFFSET ?)",
+                    (self.max_runs,)).rowcount
+            if self.compact_after_days:
+                compacted = self._db.execute("UPDATE runs SET record = NULL WHERE record IS NOT NULL AND start_ts < ?",
+                                             (now_ms - self.compact_after_days * day_ms,)).rowcount
+            # Sampled statistics (a few ms) let the planner start delegate and label
+            # queries from the time range instead of walking every step
+            self._db.execute("PRAGMA analysis_limit = 1000")
+            self._db.execute("ANALYZE")
+            if vacuum:
+                self._db.execute("VACUUM")
+            elif expired or trimmed or compacted:
+                self._db.execute("PRAGMA incremental_vacuum")
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"expired": expired, "trimmed": trimmed, "compacted": compacted, "bytes": self.size()}
+
+    def size(self) -> int:
+        """Size of the database file in bytes."""
+        page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+        return page_count * self._db.execute("PRAGMA page_size").fetchone()[0]
+
+    def close(self):
+        """Apply retention if this session stored runs, then close the database."""
+        if self._written:
+            self._written = False
+            self.maintain()
+        with self._lock:
+            self._db.close()
+
+    # Queries
+
+    def _where(self, filters: Dict) -> Tuple[str, List]:
+        """SQL conditions on runs for query filters (see query_runs)."""
+        clauses, params = [], []
+        for name, column in _RUN_FILTERS.items():
+            value = filters.get(name)
+            if value:
+                clauses.append(f"runs.{column} {'GLOB' if _is_glob(value) else '='} ?")
+                params.append(value)
+        if filters.get("since_ms") is not None:
+            clauses.append("runs.start_ts >= ?")
+            params.append(filters["since_ms"])
+        if filters.get("until_ms") is not None:
+            clauses.append("runs.start_ts < ?")
+            params.append(filters["until_ms"])
+        if filters.get("delegate"):
+            clauses.append("runs.id IN (SELECT run_id FROM steps WHERE delegate_id = ? "
+                           "UNION SELECT run_id FROM steps WHERE delegate_name = ?)")
+            params += [filters["delegate"], filters["delegate"]]
+        if filters.get("label"):
+            clauses.append("runs.id IN (SELECT steps.run_id FROM step_labels "
+                           "JOIN steps ON steps.id = step_labels.step WHERE step_labels.label = ?)")
+            params.append(filters["label"])
+        return " AND ".join(clauses) or "1", params
+
+    def query_runs(self, limit: Optional[int] = None, **filters) -> List[Dict]:
+        """
+        Stored runs matching the filters, newest first
+
+        Args:
+            limit (int): Most runs returned
+            project, pipeline, stage, status (str): Exact values, or globs
+            delegate (str): Delegate ID or name that ran any step of the run
+            label (str): Label of a delegate that ran any step of the run
+            since_ms, until_ms (int): Start time range, epoch millis
+
+        Returns:
+            List[Dict]: Failed-run records, as pipeline check prints them; compacted
+                runs are rebuilt from their indexed fields and marked "compacted"
+        """
+        where, params = self._where(filters)
+        sql = (f"SELECT id, project_id, execution_id, pipeline_id, stage, status, start_ts, failure_message, record "
+               f"FROM runs WHERE {where} ORDER BY start_ts DESC, id DESC")
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            compacted = [row[0] for row in rows if row[8] is None]
+            steps = self._steps(compacted) if compacted else {}
+
+        runs = []
+        for run_id, project_id, execution_id, pipeline_id, stage, status, start_ts, message, record in rows:
+            if record is not None:
+                runs.append(jsonlib.loads(record))
+                continue
+            runs.append({
+                "execution_id": execution_id,
+                "pipeline_id": pipeline_id,
+                "stage": stage,
+                "start_ts": start_ts,
+                "start_time": format_epoch_ms(start_ts),
+                "status": status,
+                "failure_message": message,
+                "delegates": steps.get(run_id, []),
+                "compacted": True
+            })
+        return runs
+
+    def _steps(self, run_ids: List[int]) -> Dict[int, List[Dict]]:
+        """Step entries of compacted runs, rebuilt from the steps and labels tables."""
+        steps = {}
+        for start in range(0, len(run_ids), 500):
+            chunk = run_ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT steps.run_id, steps.step_name, steps.step_id, steps.step_status, steps.error_message, "
+                f"steps.duration_ms, steps.delegate_id, steps.delegate_name, steps.delegate_version, "
+                f"group_concat(step_labels.label, char(31)) FROM steps "
+                f"LEFT JOIN step_labels ON step_labels.step = steps.id "
+                f"WHERE steps.run_id IN ({marks}) GROUP BY steps.id ORDER BY steps.id", chunk).fetchall()
+            for run_id, name, step_id, status, error, duration, delegate_id, delegate_name, version, labels in rows:
+                steps.setdefault(run_id, []).append({
+                    "step_name": name,
+                    "step_id": step_id,
+                    "step_status": status,
+                    "error_message": error,
+                    "duration_ms": duration,
+                    "delegate_info": {"id": delegate_id, "name": delegate_name, "version": version,
+                                      "labels": labels.split("\x1f") if labels else []}
+                })
+        return steps
+
+    def aggregate(self, group_by: str, limit: Optional[int] = None, **filters) -> List[Dict]:
+        """
+        Count stored runs matching the filters per group
+
+        Args:
+            group_by (str): pipeline, stage, status, message or day (per run), or
+                delegate or label (per step, also counting failed steps)
+            limit (int): Most groups returned
+            **filters: As for query_runs
+
+        Returns:
+            List[Dict]: One row per group with failed_runs, last_failure and, for
+                delegate and label, failed_steps; most failed runs first (days in order)
+        """
+        where, params = self._where(filters)
+        last = "MAX(runs.start_ts) AS last_ts"
+        if group_by in ("delegate", "label"):
+            key = ("steps.delegate_id, MAX(steps.delegate_name)" if group_by == "delegate" else "step_labels.label")
+            joins = "JOIN steps ON steps.run_id = runs.id"
+            if group_by == "label":
+                joins += " JOIN step_labels ON step_labels.step = steps.id"
+            group = "steps.delegate_id" if group_by == "delegate" else "step_labels.label"
+            sql = (f"SELECT {key}, COUNT(DISTINCT runs.id) AS failed_runs, "
+                   f"COUNT(DISTINCT CASE WHEN steps.step_status = 'FAILED' THEN steps.id END), {last} "
+                   f"FROM runs {joins} WHERE {where} GROUP BY {group} ORDER BY failed_runs DESC")
+        else:
+            columns = {
+                "pipeline": "runs.project_id, runs.pipeline_id",
+                "stage": "runs.stage",
+                "status": "runs.status",
+                "message": "runs.failure_message",
+                "day": "date(runs.start_ts / 1000, 'unixepoch')",
+            }[group_by]
+            order = "1" if group_by == "day" else "failed_runs DESC"
+            sql = (f"SELECT {columns}, COUNT(*) AS failed_runs, {last} FROM runs WHERE {where} "
+                   f"GROUP BY {columns} ORDER BY {order}")
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        results = []
+        for row in rows:
+            if group_by == "delegate":
+                result = {"delegate_id": row[0], "delegate": row[1], "failed_runs": row[2], "failed_steps": row[3]}
+            elif group_by == "label":
+                result = {"label": row[0], "failed_runs": row[1], "failed_steps": row[2]}
+            elif group_by == "pipeline":
+                result = {"project": row[0], "pipeline": row[1], "failed_runs": row[2]}
+            else:
+                result = {group_by: row[0], "failed_runs": row[1]}
+            result["last_failure"] = format_epoch_ms(row[-1])
+            results.append(result)
+        return results
+
+    def stats(self) -> Dict:
+        """Stored runs, steps, time range and file size."""
+        with self._lock:
+            runs, first, last, compacted = self._db.execute(
+                "SELECT COUNT(*), MIN(start_ts), MAX(start_ts), SUM(record IS NULL) FROM runs").fetchone()
+            steps = self._db.execute("SELECT COUNT(*) FROM steps").fetchone()[0]
+            size = self.size()
+        return {"runs": runs, "compacted_runs": compacted or 0, "steps": steps,
+                "first_run": format_epoch_ms(first), "last_run": format_epoch_ms(last),
+                "bytes": size, "path": self.path}
+
+def open_history(args, writing: bool = True) -> Optional[HistoryStore]:
+    """
+    Open the history store configured by the global --history options
+
+    Returns None when writing and --history was not given, or when the store
+    cannot be opened (a warning is printed), so commands can carry on without it.
+    """
+    if writing and not getattr(args, "history", False):
+        return None
+    try:
+        return HistoryStore(getattr(args, "history_file", None),
+                            retention_days=getattr(args, "history_retention_days", DEFAULT_HISTORY_RETENTION_DAYS),
+                            max_runs=getattr(args, "history_max_runs", DEFAULT_HISTORY_MAX_RUNS))
+    except (OSError, sqlite3.Error) as e:
+        from colorama import Fore
+        print(f"{EMOJI_WARNING}{Fore.YELLOW}Execution history unavailable: {e}", file=sys.stderr)
+        return None
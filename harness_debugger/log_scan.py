@@ -0,0 +1,177 @@
+"""Streaming error extraction from step logs."""
+
+import json
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from harness_debugger.utils.concurrency import ordered_map
+from harness_debugger.utils.constants import *
+
+_ANSI_CODE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+class LineSplitter:
+    """
+    Split byte chunks into text lines as they arrive
+
+    At most max_line_length bytes of a line are buffered; the rest of an
+    overlong line is dropped, so memory stays bounded whatever the input.
+    """
+
+    def __init__(self, max_line_length: int = DEFAULT_LOG_MAX_LINE_LENGTH):
+        self.max_line_length = max_line_length
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """Add a chunk and return the lines it completed."""
+        lines = []
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            end = len(chunk) if newline == -1 else newline
+            room = self.max_line_length - len(self._buffer)
+            if room > 0:
+                self._buffer += chunk[start:min(end, start + room)]
+            if newline == -1:
+                return lines
+            lines.append(self._buffer.decode("utf-8", "replace").rstrip("\r"))
+            self._buffer = bytearray()
+            start = newline + 1
+
+    def close(self) -> List[str]:
+        """Return the last line if the input did not end with a newline."""
+        if not self._buffer:
+            return []
+        line, self._buffer = self._buffer.decode("utf-8", "replace").rstrip("\r"), bytearray()
+        return [line]
+
+def split_lines(chunks: Iterable[bytes], max_line_length: int = DEFAULT_LOG_MAX_LINE_LENGTH) -> Iterator[str]:
+    """Split a stream of byte chunks into text lines (see LineSplitter)."""
+    splitter = LineSplitter(max_line_length)
+    for chunk in chunks:
+        yield from splitter.feed(chunk)
+    yield from splitter.close()
+
+def log_text(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Turn log-service blob lines into plain log lines
+
+    The blob is newline-delimited JSON with the text in "out"; lines that are
+    not JSON (or were cut short) are passed through. Color codes are removed.
+    """
+    for line in lines:
+        if line.startswith("{"):
+            try:
+                line = json.loads(line).get("out", "")
+            except (ValueError, AttributeError):
+                pass
+        for text in line.rstrip("\n").split("\n"):
+            yield _ANSI_CODE.sub("", text) if "\x1b" in text else text
+
+class LogScanner:
+    """
+    Keep the lines of a log that match error patterns, with context
+
+    Lines are consumed one at a time. Only `context` lines before the current
+    one, the excerpts being built and the last `max_excerpts` excerpts are
+    held, so a multi-gigabyte log is scanned in constant memory. Excerpts that
+    touch or overlap are merged, as with grep -C.
+
+    Args:
+        patterns (Iterable[str]): Regular expressions; a line matching any of them is kept
+        context (int): Lines kept before and after each matching line
+        max_excerpts (int): Excerpts kept per log; earlier ones are dropped, since
+            the cause of a failure is usually near the end
+        max_excerpt_lines (int): Longest excerpt; a longer run of matches starts a new one
+    """
+
+    def __init__(self, patterns: Optional[Iterable[str]] = None, context: int = DEFAULT_LOG_CONTEXT,
+                 max_excerpts: int = DEFAULT_LOG_MAX_EXCERPTS,
+                 max_excerpt_lines: int = DEFAULT_LOG_MAX_EXCERPT_LINES):
+        patterns = list(patterns or DEFAULT_LOG_PATTERNS)
+        self.pattern = re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+        self.context = max(0, context)
+        self.max_excerpts = max(1, max_excerpts)
+        self.max_excerpt_lines = max(1, max_excerpt_lines)
+
+    def scan(self, lines: Iterable[str]) -> Dict:
+        """
+        Scan log lines
+
+        Returns:
+            Dict: lines_scanned, matches (matching lines seen), excerpts (each with
+                first_line, lines and the 1-based line numbers that matched) and
+                truncated (True if earlier excerpts were dropped)
+        """
+        before = deque(maxlen=self.context)
+        excerpts = deque(maxlen=self.max_excerpts)
+        current = None
+        after = 0
+        matches = 0
+        started = 0
+        number = 0
+
+        for number, line in enumerate(lines, 1):
+            if self.pattern.search(line):
+                matches += 1
+                if current is None or len(current["lines"]) >= self.max_excerpt_lines:
+                    previous = excerpts[-1] if excerpts else None
+                    first_line = number - len(before)
+                    if (current is None and previous is not None
+                            and previous["first_line"] + len(previous["lines"]) == first_line
+                            and len(previous["lines"]) + len(before) < self.max_excerpt_lines):
+                        # Touches the previous excerpt: keep growing it
+                        current = previous
+                    else:
+                        current = {"first_line": first_line, "lines": [], "matches": []}
+                        excerpts.append(current)
+                        started += 1
+                    current["lines"].extend(before)
+                    before.clear()
+                current["lines"].append(line)
+                current["matches"].append(number)
+                after = self.context
+            elif current is not None and after > 0:
+                current["lines"].append(line)
+                after -= 1
+            else:
+                current = None
+                before.append(line)
+
+        return {
+            "lines_scanned": number,
+            "matches": matches,
+            "excerpts": list(excerpts),
+            "truncated": started > len(excerpts)
+        }
+
+def attach_step_logs(client, runs: Iterable[Dict], scanner: LogScanner,
+                     max_workers: int = DEFAULT_LOG_WORKERS) -> Iterator[Dict]:
+    """
+    Scan the log of every failed step of each run and add the result to the step as "log"
+
+    Runs are scanned on max_workers threads and yielded in input order as soon
+    as they are ready, so output keeps streaming. A log that cannot be
+    downloaded is recorded as {"error": message} instead of failing the run.
+
+    Args:
+        client: HarnessClient (or BlockingAsyncClient) used to download the logs
+        runs (Iterable[Dict]): Failed-run records, as yielded by get_failed_runs
+        scanner (LogScanner): Patterns and limits to apply
+        max_workers (int): Runs scanned concurrently
+    """
+    def scan_run(run):
+        scanned = {}
+        for step in run.get("delegates") or []:
+            log_key = step.get("log_key")
+            if step.get("step_status") != "FAILED" or not log_key:
+                continue
+            if log_key not in scanned:
+                try:
+                    scanned[log_key] = scanner.scan(client.iter_step_log(log_key))
+                except Exception as e:
+                    scanned[log_key] = {"error": str(e)}
+            step["log"] = scanned[log_key]
+        return run
+
+    return ordered_map(scan_run, runs, max_workers)
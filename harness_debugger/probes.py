@@ -0,0 +1,177 @@
+"""Network probes run from this machine: DNS, TCP connect, TLS and an HTTP HEAD request."""
+
+import asyncio
+import socket
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from harness_debugger.utils.constants import *
+
+def normalize_url(url: str) -> str:
+    """Add https:// to a bare host name."""
+    return url if url.startswith(('http://', 'https://')) else f"https://{url}"
+
+def connectivity_commands(urls: Iterable[str]) -> Dict[str, Dict]:
+    """
+    Shell commands that test each URL from another machine
+
+    Args:
+        urls (Iterable[str]): URLs to test
+
+    Returns:
+        Dict[str, Dict]: hostname, port and a curl command, by URL
+    """
+    commands = {}
+    for url in map(normalize_url, urls):
+        parsed = urlsplit(url)
+        commands[url] = {
+            "hostname": parsed.hostname,
+            "port": parsed.port or (443 if parsed.scheme == "https" else 80),
+            "command": f"curl -sS -o /dev/null -w '%{{http_code}}\\n' --max-time 10 -I {url}",
+        }
+    return commands
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+async def _connect(loop, addresses, remaining: Callable[[], float]) -> socket.socket:
+    """
+    Connect to the first address that accepts, trying them in resolver order
+
+    remaining() is asked again before each address, so all of them together
+    stay within the probe's timeout.
+    """
+    error = None
+    for family, sock_type, proto, _, sockaddr in addresses:
+        sock = socket.socket(family, sock_type, proto)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, sockaddr), remaining())
+            return sock
+        except OSError as e:
+            sock.close()
+            error = e
+        except BaseException:
+            sock.close()
+            raise
+    raise error or OSError("no addresses")
+
+async def probe(url: str, timeout: float = DEFAULT_PROBE_TIMEOUT, ssl_context: Optional[ssl.SSLContext] = None,
+                executor: Optional[ThreadPoolExecutor] = None) -> Dict:
+    """
+    Probe one URL: resolve it, connect, negotiate TLS (for https) and send a HEAD request
+
+    Each phase is timed separately. The probe stops at the first phase that
+    fails or runs past the timeout, which covers the whole probe.
+
+    Args:
+        url (str): URL to probe (https:// is assumed without a scheme)
+        timeout (float): Seconds allowed for the whole probe
+        ssl_context (ssl.SSLContext): Context for https (defaults to the system trust store)
+        executor (ThreadPoolExecutor): Where host names are resolved (defaults to the loop's)
+
+    Returns:
+        Dict: url, host, port, address, dns_ms, connect_ms, tls_ms, http_ms, total_ms,
+            status (HTTP status code), ok, and error/failed_phase when the probe failed
+    """
+    url = normalize_url(url)
+    parsed = urlsplit(url)
+    secure = parsed.scheme == "https"
+    host = parsed.hostname
+    port = parsed.port or (443 if secure else 80)
+    path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+    result = {"url": url, "host": host, "port": port, "address": None, "dns_ms": None, "connect_ms": None,
+              "tls_ms": None, "http_ms": None, "total_ms": None, "status": None, "ok": False}
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    remaining = lambda: max(deadline - loop.time(), 0)
+    started = time.perf_counter()
+    phase = "dns"
+    sock = writer = None
+    try:
+        mark = time.perf_counter()
+        addresses = await asyncio.wait_for(
+            loop.run_in_executor(executor, socket.getaddrinfo, host, port, 0, socket.SOCK_STREAM), remaining())
+        result["dns_ms"] = _elapsed_ms(mark)
+
+        phase = "connect"
+        mark = time.perf_counter()
+        sock = await _connect(loop, addresses, remaining)
+        result["connect_ms"] = _elapsed_ms(mark)
+        result["address"] = sock.getpeername()[0]
+
+        phase = "tls" if secure else "http"
+        mark = time.perf_counter()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(
+            sock=sock, ssl=(ssl_context or ssl.create_default_context()) if secure else None,
+            server_hostname=host if secure else None), remaining())
+        sock = None
+        if secure:
+            result["tls_ms"] = _elapsed_ms(mark)
+
+        phase = "http"
+        mark = time.perf_counter()
+        host_header = host if parsed.port is None else f"{host}:{port}"
+        writer.write(f"HEAD {path} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: harness-debugger\r\n"
+                     f"Accept: */*\r\nConnection: close\r\n\r\n".encode("latin-1"))
+        status_line = await asyncio.wait_for(reader.readline(), remaining())
+        parts = status_line.decode("latin-1").split()
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise OSError(f"not an HTTP response: {status_line[:40]!r}")
+        result["http_ms"] = _elapsed_ms(mark)
+        result["status"] = int(parts[1])
+        result["ok"] = True
+    except asyncio.TimeoutError:
+        result["failed_phase"] = phase
+        result["error"] = f"timed out after {timeout:g}s"
+    except (OSError, ssl.SSLError, UnicodeError) as e:
+        result["failed_phase"] = phase
+        result["error"] = str(e) or type(e).__name__
+    finally:
+        if sock is not None:
+            sock.close()
+        if writer is not None:
+            # A probe has nothing more to say: drop the connection without a TLS close handshake
+            writer.transport.abort()
+    result["total_ms"] = _elapsed_ms(started)
+    return result
+
+async def probe_all(urls: Iterable[str], timeout: float = DEFAULT_PROBE_TIMEOUT,
+                    concurrency: int = DEFAULT_PROBE_CONCURRENCY,
+                    ssl_context: Optional[ssl.SSLContext] = None) -> List[Dict]:
+    """
+    Probe many URLs at once; see probe()
+
+    Up to `concurrency` probes run at the same time, so the whole check takes
+    about as long as the slowest probe. Host names are resolved on a pool of
+    the same size, which is not waited for afterwards: a resolver call that
+    outlives its timeout cannot hold up the result.
+
+    Returns:
+        List[Dict]: Probe results, in the order of urls
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    limit = asyncio.Semaphore(max(1, concurrency))
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(urls))),
+                                  thread_name_prefix="harness-debugger-dns")
+
+    async def limited(url):
+        async with limit:
+            return await probe(url, timeout, ssl_context, executor)
+
+    try:
+        return await asyncio.gather(*(limited(url) for url in urls))
+    finally:
+        executor.shutdown(wait=False)
+
+def run_probes(urls: Iterable[str], timeout: float = DEFAULT_PROBE_TIMEOUT,
+               concurrency: int = DEFAULT_PROBE_CONCURRENCY,
+               ssl_context: Optional[ssl.SSLContext] = None) -> List[Dict]:
+    """Blocking version of probe_all, for callers without an event loop."""
+    return asyncio.run(probe_all(urls, timeout, concurrency, ssl_context))
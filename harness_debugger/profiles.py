@@ -0,0 +1,292 @@
+"""Named credential sets (profiles), and running one command against several of them at once."""
+
+import argparse
+import configparser
+import copy
+import os
+import queue
+import sys
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from colorama import Fore
+
+from harness_debugger.utils import jsonlib
+from harness_debugger.utils.constants import *
+from harness_debugger.utils.output import ThreadOutput
+from harness_debugger.utils.paths import default_profiles_path
+
+# Key added to every merged record; delegate records already have a "profile" field
+PROFILE_KEY = "profile_name"
+
+class Profile:
+    """
+    One named credential set from the profiles file
+
+    Args:
+        name (str): Section name
+        api_key (str): API key, given directly or read from the variable named by api_key_env
+        account_id (str): Harness account ID
+        org_id (str): Default organization for commands run with this profile
+        project_id (str): Default project
+        gateway_url (str): Gateway for this account (defaults to HARNESS_GATEWAY_URL or app.harness.io)
+        rate_limits (List[str]): CLASS=RATE[:BURST] limits for this profile's own scheduler
+    """
+
+    __slots__ = ("name", "api_key", "account_id", "org_id", "project_id", "gateway_url", "rate_limits")
+
+    def __init__(self, name: str, api_key: str, account_id: str, org_id: Optional[str] = None,
+                 project_id: Optional[str] = None, gateway_url: Optional[str] = None,
+                 rate_limits: Sequence[str] = ()):
+        self.name = name
+        self.api_key = api_key
+        self.account_id = account_id
+        self.org_id = org_id
+        self.project_id = project_id
+        self.gateway_url = gateway_url
+        self.rate_limits = list(rate_limits)
+
+    def __repr__(self):
+        return f"Profile(name={self.name!r}, account_id={self.account_id!r})"
+
+def load_profiles(path: Optional[str] = None) -> Dict[str, Profile]:
+    """
+    Read the profiles file: an INI file with one section per profile
+
+        [prod]
+        account_id = abc123
+        api_key_env = HARNESS_PROD_API_KEY
+        org_id = default
+        rate_limit = delegates=5:10 default=20
+
+    Args:
+        path (str): Profiles file (defaults to default_profiles_path())
+
+    Returns:
+        Dict[str, Profile]: Profiles by name, in file order
+
+    Raises:
+        ValueError: If the file is missing or unreadable, or a profile lacks an account or API key
+    """
+    path = path or default_profiles_path()
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        with open(path) as f:
+            parser.read_file(f)
+    except (OSError, configparser.Error) as e:
+        raise ValueError(f"Could not read profiles file {path}: {e}")
+
+    profiles = {}
+    for name in parser.sections():
+        section = parser[name]
+        api_key = section.get("api_key") or os.environ.get(section.get("api_key_env", ""))
+        if not section.get("account_id") or not api_key:
+            raise ValueError(f"Profile {name!r} in {path} needs account_id and api_key "
+                             f"(or api_key_env naming a set environment variable)")
+        profiles[name] = Profile(name, api_key, section["account_id"], section.get("org_id"),
+                                 section.get("project_id"), section.get("gateway_url"),
+                                 section.get("rate_limit", "").split())
+    return profiles
+
+def select_profiles(profiles: Dict[str, Profile], names: Optional[Sequence[str]]) -> List[Profile]:
+    """
+    The profiles named by --profiles, or every profile for --all-profiles (names=None)
+
+    Raises:
+        ValueError: If a name is not in the file, or there are no profiles
+    """
+    if names is None:
+        selected = list(profiles.values())
+    else:
+        unknown = [name for name in names if name not in profiles]
+        if unknown:
+            raise ValueError(f"Unknown profile(s): {', '.join(unknown)} (known: {', '.join(profiles) or 'none'})")
+        selected = [profiles[name] for name in dict.fromkeys(names)]
+    if not selected:
+        raise ValueError("No profiles selected")
+    return selected
+
+class _LineWriter:
+    """
+    File-like sink that hands each complete line to a callback
+
+    Carriage-return redraws (progress bars) collapse to what a terminal would
+    show last on that line.
+    """
+
+    def __init__(self, on_line):
+        self._on_line = on_line
+        self._partial = ""
+
+    def write(self, text: str) -> int:
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._emit(line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._partial:
+            self._emit(self._partial)
+            self._partial = ""
+
+    def _emit(self, line: str):
+        line = line.rsplit("\r", 1)[-1]
+        if line.strip():
+            self._on_line(line)
+
+def tag_record(profile: str, record) -> Dict:
+    """A record of one profile's output, tagged with the profile name."""
+    if isinstance(record, dict):
+        return {PROFILE_KEY: profile, **record}
+    return {PROFILE_KEY: profile, "record": record}
+
+def run_profiles(cli, args, cache=None, profiler=None, schedulers: Optional[Dict] = None) -> int:
+    """
+    Run the command once per selected profile, concurrently, and merge the output
+
+    Each profile gets its own client, connection pool and scheduler (the
+    global --rate-limit options plus the profile's own rate_limit); the
+    response cache and the profiler are shared. The command runs with NDJSON
+    output and its records are merged, in the order they arrive and tagged
+    with PROFILE_KEY, into one NDJSON stream, one JSON array or one text
+    table. Anything else a command prints is passed to stderr prefixed with
+    the profile name.
+
+    Args:
+        cli (HarnessDebuggerCLI): Builds the clients and dispatches the command
+        args (argparse.Namespace): Parsed command line, with --profiles or --all-profiles
+        cache: Response cache shared by the profiles' clients
+        profiler: on_request hook shared by the profiles' clients
+        schedulers (Dict): Filled with each profile's RequestScheduler, by name
+
+    Returns:
+        int: 0 if the command succeeded for every profile, EXIT_INCOMPLETE if
+            some profiles' results are only partial, otherwise 1
+    """
+    clients = {}
+    try:
+        profiles = select_profiles(load_profiles(args.profiles_file), None if args.all_profiles else args.profiles)
+        for profile in profiles:
+            client_args = cli._client_args(args, cache, profiler, profile)
+            clients[profile.name] = cli._create_client(args, client_args)
+            if schedulers is not None:
+                schedulers[profile.name] = client_args['scheduler']
+    except (ValueError, ImportError, argparse.ArgumentTypeError) as e:
+        # ArgumentTypeError: a bad rate_limit in the profiles file
+        for client in clients.values():
+            client.close()
+        print(f"{EMOJI_ERROR}{Fore.RED}{e}", file=sys.stderr)
+        return 1
+
+    events = queue.Queue()
+    stdout, stderr = ThreadOutput(sys.stdout), ThreadOutput(sys.stderr)
+
+    def run(profile):
+        def on_stdout(line):
+            try:
+                events.put(("record", profile.name, jsonlib.loads(line)))
+            except ValueError:
+                events.put(("message", profile.name, line))
+
+        out = _LineWriter(on_stdout)
+        err = _LineWriter(lambda line: events.put(("message", profile.name, line)))
+        profile_args = copy.copy(args)
+        profile_args.output = 'ndjson'
+        profile_args.org = args.org or profile.org_id
+        profile_args.project = args.project or profile.project_id
+        exit_code = 1
+        stdout.capture(out)
+        stderr.capture(err)
+        try:
+            with clients[profile.name] as client:
+                exit_code = cli._dispatch_within_deadline(profile_args, client)
+        except Exception as e:
+            print(f"{EMOJI_ERROR}{Fore.RED}{type(e).__name__}: {e}", file=err)
+        finally:
+            stdout.capture(None)
+            stderr.capture(None)
+            out.close()
+            err.close()
+            events.put(("done", profile.name, exit_code))
+
+    exit_codes = {}
+
+    def merged_records():
+        """Tagged records as they arrive; messages go to stderr on the way."""
+        while len(exit_codes) < len(profiles):
+            kind, name, payload = events.get()
+            if kind == "record":
+                yield tag_record(name, payload)
+            elif kind == "message":
+                print(f"[{name}] {payload}", file=stderr._stream, flush=True)
+            else:
+                exit_codes[name] = payload
+
+    workers = [threading.Thread(target=run, args=(profile,), daemon=True) for profile in profiles]
+    sys.stdout, sys.stderr = stdout, stderr
+    try:
+        for worker in workers:
+            worker.start()
+        records = merged_records()
+        if args.output == 'ndjson':
+            for record in records:
+                print(jsonlib.dumps(record), file=stdout._stream, flush=True)
+        elif args.output == 'json':
+            print(jsonlib.dumps(list(records), indent=2), file=stdout._stream)
+        else:
+            _print_table(args, records, stdout._stream)
+    finally:
+        sys.stdout, sys.stderr = stdout._stream, stderr._stream
+    for worker in workers:
+        worker.join()
+
+    failed = [name for name in (profile.name for profile in profiles) if exit_codes.get(name)]
+    for name in failed:
+        print(f"{EMOJI_ERROR}{Fore.RED}[{name}] exited with status {exit_codes[name]}", file=sys.stderr)
+    if not failed:
+        return 0
+    # Partial results (--deadline, circuit breakers) only, or real failures
+    return EXIT_INCOMPLETE if all(exit_codes[name] == EXIT_INCOMPLETE for name in failed) else 1
+
+def _flat(value) -> bool:
+    """Whether a value fits in a table cell: a scalar or a list of scalars."""
+    if isinstance(value, list):
+        return not any(isinstance(item, (dict, list)) for item in value)
+    return not isinstance(value, dict)
+
+def _cell(value) -> str:
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    return value
+
+def _print_table(args, records, stream):
+    """
+    One table of every profile's records, printed as they arrive
+
+    The columns are the flat fields of the first record; nested values (such
+    as a run's steps) are left out, and --output json or ndjson has them.
+    """
+    from itertools import chain
+    from harness_debugger.utils.table import StreamingTable
+
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        print(f"{EMOJI_WARNING}{Fore.YELLOW}No results from any profile", file=stream)
+        return
+
+    columns = [key for key, value in first.items() if _flat(value)]
+    headers = [key.replace("_", " ").title() for key in columns]
+    rows = ([_cell(record.get(key)) if _flat(record.get(key)) else None for key in columns]
+            for record in chain([first], records))
+
+    def title(count):
+        return f"\n{EMOJI_INFO}{Fore.CYAN}Results from every profile:"
+
+    table = StreamingTable(headers, stream=stream, sample_size=args.table_sample, max_width=args.max_col_width)
+    count = table.write(rows, title=title)
+    print(f"{EMOJI_INFO}{Fore.CYAN}{count} results", file=stream)
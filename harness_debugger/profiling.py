@@ -0,0 +1,189 @@
+"""Per-request instrumentation: request events and the `--profile` report."""
+
+import json
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+class RequestEvent:
+    """
+    One API call as seen by a client's on_request hook
+
+    A call covers every attempt made for it, so `seconds` includes scheduler
+    waits, retries and backoff. Cache hits are reported too, with no status,
+    no bytes and cache_hit set.
+    """
+
+    __slots__ = ("endpoint", "endpoint_class", "status", "seconds", "bytes",
+                 "retries", "throttled", "cache_hit", "error", "started")
+
+    def __init__(self, endpoint: str, endpoint_class: str):
+        self.endpoint = endpoint
+        self.endpoint_class = endpoint_class
+        self.status = None
+        self.seconds = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.throttled = 0
+        self.cache_hit = False
+        self.error = None
+        self.started = time.perf_counter()
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__ if slot != "started"}
+
+class _EndpointProfile:
+    __slots__ = ("durations", "statuses", "errors", "retries", "throttled", "cache_hits", "bytes")
+
+    def __init__(self):
+        self.durations = []
+        self.statuses = Counter()
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.cache_hits = 0
+        self.bytes = 0
+
+def _percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated percentile (q in 0..1) of sorted values."""
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+def _status_label(event: RequestEvent) -> str:
+    if event.cache_hit:
+        return "cached"
+    return str(event.status) if event.status is not None else "error"
+
+def _prometheus_labels(labels: Dict[str, str]) -> str:
+    """Render a label set, escaping values as the text exposition format requires."""
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+class RequestProfiler:
+    """
+    Collects RequestEvents and summarizes API cost per endpoint
+
+    Pass an instance as a client's on_request hook; it is safe to share
+    between threads and between scoped client views.
+
+    Args:
+        labels (Dict[str, str]): Constant labels added to every exported series,
+            e.g. {"command": "pipeline check", "step": "build"}
+    """
+
+    def __init__(self, labels: Optional[Dict[str, str]] = None):
+        self.labels = dict(labels or {})
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent):
+        with self._lock:
+            profile = self._endpoints.get(event.endpoint)
+            if profile is None:
+                profile = self._endpoints[event.endpoint] = _EndpointProfile()
+            profile.durations.append(event.seconds)
+            profile.statuses[_status_label(event)] += 1
+            profile.errors += event.error is not None
+            profile.retries += event.retries
+            profile.throttled += event.throttled
+            profile.cache_hits += event.cache_hit
+            profile.bytes += event.bytes
+
+    def summary(self) -> List[Dict]:
+        """
+        Per-endpoint rows, most expensive first
+
+        time_share is the endpoint's share of the summed call time; calls
+        overlap when paging concurrently, so it is not a share of wall time.
+
+        Returns:
+            List[Dict]: endpoint, requests, errors, retries, throttled, cache_hits,
+                bytes, p50_ms, p95_ms, max_ms, total_ms and time_share
+        """
+        with self._lock:
+            profiles = {endpoint: (sorted(profile.durations), profile)
+                        for endpoint, profile in self._endpoints.items()}
+        total_seconds = sum(sum(durations) for durations, _ in profiles.values())
+
+        rows = []
+        for endpoint, (durations, profile) in profiles.items():
+            endpoint_seconds = sum(durations)
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(durations),
+                "errors": profile.errors,
+                "retries": profile.retries,
+                "throttled": profile.throttled,
+                "cache_hits": profile.cache_hits,
+                "bytes": profile.bytes,
+                "p50_ms": _percentile(durations, 0.5) * 1000,
+                "p95_ms": _percentile(durations, 0.95) * 1000,
+                "max_ms": durations[-1] * 1000,
+                "total_ms": endpoint_seconds * 1000,
+                "time_share": endpoint_seconds / total_seconds if total_seconds else 0.0
+            })
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def to_json(self) -> str:
+        return json.dumps({"labels": self.labels, "endpoints": self.summary()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render the profile in the Prometheus text exposition format."""
+        with self._lock:
+            profiles = {endpoint: (sorted(profile.durations), profile, Counter(profile.statuses))
+                        for endpoint, profile in self._endpoints.items()}
+
+        def series(endpoint, **extra):
+            return _prometheus_labels({**self.labels, "endpoint": endpoint, **extra})
+
+        lines = [
+            "# HELP harness_debugger_requests_total Harness API calls by endpoint and response status.",
+            "# TYPE harness_debugger_requests_total counter",
+        ]
+        for endpoint, (_, _, statuses) in sorted(profiles.items()):
+            for status, count in sorted(statuses.items()):
+                lines.append(f"harness_debugger_requests_total{series(endpoint, status=status)} {count}")
+
+        lines += [
+            "# HELP harness_debugger_request_duration_seconds Harness API call time, including retries.",
+            "# TYPE harness_debugger_request_duration_seconds summary",
+        ]
+        for endpoint, (durations, _, _) in sorted(profiles.items()):
+            for q in (0.5, 0.95):
+                lines.append(f"harness_debugger_request_duration_seconds{series(endpoint, quantile=str(q))} "
+                             f"{_percentile(durations, q):.6f}")
+            lines.append(f"harness_debugger_request_duration_seconds_sum{series(endpoint)} {sum(durations):.6f}")
+            lines.append(f"harness_debugger_request_duration_seconds_count{series(endpoint)} {len(durations)}")
+
+        counters = (
+            ("response_bytes_total", "Response body bytes received.", "bytes"),
+            ("request_retries_total", "Retried attempts.", "retries"),
+            ("requests_throttled_total", "Attempts answered with 429.", "throttled"),
+            ("cache_hits_total", "Calls answered from the response cache.", "cache_hits"),
+        )
+        for name, help_text, attribute in counters:
+            lines += [f"# HELP harness_debugger_{name} {help_text}", f"# TYPE harness_debugger_{name} counter"]
+            for endpoint, (_, profile, _) in sorted(profiles.items()):
+                lines.append(f"harness_debugger_{name}{series(endpoint)} {getattr(profile, attribute)}")
+        return "\n".join(lines) + "\n"
+
+    def format_table(self) -> str:
+        """The `--profile` summary table."""
+        from tabulate import tabulate
+
+        rows = self.summary()
+        table = [[
+            row["endpoint"], row["requests"], row["errors"], row["retries"], row["cache_hits"],
+            f"{row['bytes'] / 1024:.1f}", f"{row['p50_ms']:.1f}", f"{row['p95_ms']:.1f}",
+            f"{row['max_ms']:.1f}", f"{row['time_share']:.0%}"
+        ] for row in rows]
+        headers = ["Endpoint", "Calls", "Errors", "Retries", "Cached", "KiB", "p50 ms", "p95 ms", "Max ms", "Time"]
+        return tabulate(table, headers=headers, tablefmt="simple")
@@ -0,0 +1,111 @@
+"""Compact record types for Harness API objects."""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+def format_epoch_ms(value) -> str:
+    """Format an epoch-millis timestamp for display."""
+    if not value:
+        return "Unknown"
+    return datetime.fromtimestamp(int(value) / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+class DelegateRecord:
+    """
+    One delegate, normalized from either the setup/delegates or the delegate-setup API
+
+    Timestamps are kept as epoch millis and only formatted when read through
+    the `last_heartbeat` / `connected_at` keys, so listing thousands of
+    delegates for JSON output or ID lookups never pays for strftime. Records
+    read like the dicts the client used to return: `record["name"]`,
+    `record.get("labels", [])` and `dict(record)` all work.
+    """
+
+    __slots__ = ("id", "name", "hostname", "ip", "status", "version", "labels",
+                 "last_heartbeat_ms", "connected_at_ms", "profile")
+
+    # Keys of the dict form, in display order
+    FIELDS = ("id", "name", "hostname", "ip", "status", "version", "labels",
+              "last_heartbeat", "connected_at", "profile")
+
+    def __init__(self, id: str, name: str = "Unknown", hostname: str = "Unknown", ip: str = "Unknown",
+                 status: str = "Unknown", version: str = "Unknown", labels: Optional[List[str]] = None,
+                 last_heartbeat_ms: Optional[int] = None, connected_at_ms: Optional[int] = None,
+                 profile: Optional[str] = "None"):
+        self.id = id
+        self.name = name
+        self.hostname = hostname
+        self.ip = ip
+        self.status = status
+        self.version = version
+        self.labels = labels if labels is not None else []
+        self.last_heartbeat_ms = last_heartbeat_ms
+        self.connected_at_ms = connected_at_ms
+        self.profile = profile
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "DelegateRecord":
+        """Build a record from a setup/delegates response or a delegate-setup listing entry."""
+        get = data.get
+        return cls(
+            get("uuid", "Unknown"), get("name", "Unknown"), get("hostName", "Unknown"), get("ip", "Unknown"),
+            get("status", "Unknown"), get("version", "Unknown"), get("selectors") or [],
+            # The single-delegate API spells it lastHeartBeat, the listing lastHeartbeat
+            get("lastHeartbeat") or get("lastHeartBeat") or None, get("connectedAt") or None,
+            get("delegateProfileId", "None")
+        )
+
+    @property
+    def last_heartbeat(self) -> str:
+        return format_epoch_ms(self.last_heartbeat_ms)
+
+    @property
+    def connected_at(self) -> str:
+        return format_epoch_ms(self.connected_at_ms)
+
+    def to_dict(self, numeric_timestamps: bool = False) -> Dict:
+        """
+        Dict form for output
+
+        Args:
+            numeric_timestamps (bool): Emit last_heartbeat/connected_at as epoch
+                millis (null if unknown) instead of formatted local time
+        """
+        record = {field: self[field] for field in self.FIELDS}
+        if numeric_timestamps:
+            record["last_heartbeat"] = self.last_heartbeat_ms
+            record["connected_at"] = self.connected_at_ms
+        return record
+
+    # Read-only mapping interface, so records can stand in for the old dicts
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def __contains__(self, key) -> bool:
+        return key in self.FIELDS
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, DelegateRecord):
+            return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"DelegateRecord(id={self.id!r}, name={self.name!r}, status={self.status!r})"
@@ -0,0 +1,154 @@
+"""Command deadlines and per-endpoint circuit breakers for API requests."""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from harness_debugger.errors import CircuitOpenError, DeadlineExceeded
+from harness_debugger.utils.constants import DEFAULT_BREAKER_COOLDOWN, DEFAULT_BREAKER_FAILURES
+
+class Deadline:
+    """
+    Time budget of one command, shared by every request it makes
+
+    Each request attempt gets what is left of the budget as its timeout (or
+    less), and none is started once it is spent, so concurrent work winds
+    down together when the budget runs out.
+
+    Args:
+        seconds (float): Budget, from now
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        # Set once a request was refused or cut short, i.e. the command's output is partial
+        self.exceeded = False
+
+    def remaining(self) -> float:
+        """Seconds left; zero or less once the deadline has passed."""
+        return self.expires_at - time.monotonic()
+
+    def check(self):
+        """Raise DeadlineExceeded if the deadline has passed."""
+        if self.remaining() <= 0:
+            raise self.error()
+
+    def error(self) -> DeadlineExceeded:
+        """Mark the deadline as exceeded and return the error to raise, e.g. for a request it cut short."""
+        self.exceeded = True
+        return DeadlineExceeded(f"the {self.seconds:g}s deadline ran out")
+
+    def timeout(self, limit: Optional[float] = None) -> float:
+        """
+        Timeout for the next request: limit, shortened to what is left
+
+        Raises:
+            DeadlineExceeded: If nothing is left
+        """
+        self.check()
+        remaining = max(self.remaining(), 0.001)
+        return remaining if limit is None else min(limit, remaining)
+
+class CircuitBreaker:
+    """
+    Refuses calls to one endpoint after repeated failures
+
+    After `threshold` consecutive failures (dropped connections, timeouts,
+    5xx) the circuit opens and calls fail at once with CircuitOpenError. After
+    `cooldown` seconds one trial call is let through, the others still being
+    refused: a success closes the circuit, a failure opens it for another
+    cooldown, and an outcome that says nothing about the endpoint (a 429, a
+    call the deadline cut short) lets the next call be the trial.
+
+    Args:
+        endpoint (str): Endpoint name, for messages
+        threshold (int): Consecutive failures that open the circuit; 0 never opens it
+        cooldown (float): Seconds the circuit stays open
+    """
+
+    def __init__(self, endpoint: str, threshold: int = DEFAULT_BREAKER_FAILURES,
+                 cooldown: float = DEFAULT_BREAKER_COOLDOWN):
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial = False
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError if the circuit is open; otherwise the call may go ahead
+
+        Returns:
+            bool: True if this call is the trial of a half-open circuit; pass it back to record()
+        """
+        with self._lock:
+            if self.threshold <= 0 or self.failures < self.threshold:
+                return False
+            now = time.monotonic()
+            if now < self.open_until:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.endpoint} failed {self.failures} times in a row; "
+                                       f"not calling it for another {self.open_until - now:.0f}s")
+            if self.trial:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.endpoint} failed {self.failures} times in a row; "
+                                       f"waiting for a trial call")
+            # This call is the trial; keep refusing the rest until it reports back
+            self.trial = True
+            return True
+
+    def record(self, ok: Optional[bool], trial: bool = False):
+        """
+        Record the outcome of a call that went ahead; every call must report one
+
+        Args:
+            ok (bool): True for a success, False for a failure, None if the
+                call says nothing about the endpoint (neither counts, but a
+                trial call frees the way for the next one)
+            trial (bool): What before_call() returned for this call; only the
+                trial call ends the trial, not calls admitted before the circuit opened
+        """
+        with self._lock:
+            if trial:
+                self.trial = False
+            if ok is None:
+                return
+            if ok:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.threshold > 0 and self.failures >= self.threshold:
+                self.open_until = time.monotonic() + self.cooldown
+
+class CircuitBreakers:
+    """
+    One CircuitBreaker per endpoint, created on first use
+
+    A client's with_scope copies share it, like the scheduler.
+
+    Args:
+        threshold (int): Consecutive failures that open an endpoint's circuit; 0 disables the breakers
+        cooldown (float): Seconds a circuit stays open before a trial call
+    """
+
+    def __init__(self, threshold: int = DEFAULT_BREAKER_FAILURES, cooldown: float = DEFAULT_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(endpoint, self.threshold, self.cooldown)
+            return breaker
+
+    def rejected(self) -> Dict[str, int]:
+        """Calls refused so far, by endpoint, for endpoints that refused any."""
+        with self._lock:
+            return {endpoint: breaker.rejected for endpoint, breaker in self._breakers.items() if breaker.rejected}
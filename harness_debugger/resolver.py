@@ -0,0 +1,273 @@
+"""Batched, deduplicated delegate lookups for the Harness API client."""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator
+
+from harness_debugger.errors import RequestRefused
+from harness_debugger.utils.concurrency import gather_bounded, ordered_map
+from harness_debugger.utils.constants import DEFAULT_BULK_THRESHOLD, DEFAULT_RESOLVER_SIZE
+
+class DelegateResolver:
+    """
+    Resolve delegate IDs to delegate information with as few API calls as possible
+
+    Resolved delegates are kept in a bounded LRU for the lifetime of the
+    resolver. Concurrent requests for the same ID share one in-flight call.
+    Once more than bulk_threshold distinct IDs have missed the LRU, the whole
+    delegate listing is fetched once and used to answer everything else.
+
+    Args:
+        fetch_one (Callable): Returns delegate information for one ID ({} if unknown)
+        fetch_all (Callable): Returns an iterator over every delegate in the account
+        max_entries (int): Maximum delegates kept in the LRU
+        bulk_threshold (int): Distinct misses before switching to the bulk listing
+        max_workers (int): Maximum concurrent single-delegate lookups
+    """
+
+    def __init__(self, fetch_one: Callable[[str], Dict], fetch_all: Callable[[], Iterator[Dict]],
+                 max_entries: int = DEFAULT_RESOLVER_SIZE, bulk_threshold: int = DEFAULT_BULK_THRESHOLD,
+                 max_workers: int = 4):
+        self._fetch_one = fetch_one
+        self._fetch_all = fetch_all
+        self.max_entries = max_entries
+        self.bulk_threshold = bulk_threshold
+        self.max_workers = max_workers
+
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._listing_lock = threading.Lock()
+        self._listed = False
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _remember(self, delegate_id: str, delegate: Dict):
+        """Add a delegate to the LRU, evicting the least recently used entry if full. Caller holds _lock."""
+        self._entries[delegate_id] = delegate
+        self._entries.move_to_end(delegate_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def resolve(self, delegate_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Resolve a set of delegate IDs
+
+        Args:
+            delegate_ids (Iterable[str]): Delegate IDs; duplicates and empty IDs are ignored
+
+        Returns:
+            Dict[str, Dict]: Delegate information per ID ({} for IDs that could not be resolved)
+        """
+        results = {}
+        owned = {}
+        waiting = {}
+        with self._lock:
+            for delegate_id in set(filter(None, delegate_ids)):
+                if delegate_id in self._entries:
+                    self._entries.move_to_end(delegate_id)
+                    results[delegate_id] = self._entries[delegate_id]
+                    self.hits += 1
+                elif delegate_id in self._in_flight:
+                    waiting[delegate_id] = self._in_flight[delegate_id]
+                    self.coalesced += 1
+                else:
+                    owned[delegate_id] = self._in_flight[delegate_id] = Future()
+                    self.misses += 1
+            use_listing = not self._listed and self.misses > self.bulk_threshold
+
+        if owned:
+            try:
+                fetched = self._fetch(list(owned), use_listing)
+            except BaseException as e:
+                with self._lock:
+                    for delegate_id, future in owned.items():
+                        del self._in_flight[delegate_id]
+                        future.set_exception(e)
+                raise
+
+            with self._lock:
+                for delegate_id, future in owned.items():
+                    delegate = fetched.get(delegate_id) or {}
+                    if delegate:
+                        self._remember(delegate_id, delegate)
+                    del self._in_flight[delegate_id]
+                    future.set_result(delegate)
+                    results[delegate_id] = delegate
+
+        for delegate_id, future in waiting.items():
+            results[delegate_id] = future.result()
+        return results
+
+    def _fetch(self, delegate_ids, use_listing: bool) -> Dict[str, Dict]:
+        """Fetch delegates missing from the LRU, from the bulk listing where possible."""
+        fetched = {}
+        if use_listing:
+            try:
+                fetched = self._load_listing(delegate_ids)
+            except RequestRefused:
+                raise
+            except Exception:
+                # The listing is only an optimization; fall back to single lookups
+                fetched = {}
+
+        remaining = [delegate_id for delegate_id in delegate_ids if delegate_id not in fetched]
+        if len(remaining) == 1:
+            fetched[remaining[0]] = self._fetch_one(remaining[0])
+        elif remaining:
+            for delegate_id, delegate in zip(remaining, ordered_map(self._fetch_one, remaining, self.max_workers)):
+                fetched[delegate_id] = delegate
+        return fetched
+
+    def _load_listing(self, delegate_ids) -> Dict[str, Dict]:
+        """Fetch the delegate listing once, keep it in the LRU and return the requested IDs."""
+        wanted = set(delegate_ids)
+        found = {}
+        with self._listing_lock:
+            if self._listed:
+                with self._lock:
+                    return {i: self._entries[i] for i in wanted if i in self._entries}
+
+            listing = []
+            try:
+                for delegate in self._fetch_all():
+                    if delegate.get("id") in wanted:
+                        found[delegate["id"]] = delegate
+                    else:
+                        listing.append(delegate)
+            finally:
+                # A failed listing falls back to single lookups instead of being retried on every miss
+                self._listed = True
+
+            # Warm the LRU with the rest of the fleet, keeping room for the requested IDs
+            room = self.max_entries - len(found)
+            with self._lock:
+                for delegate in listing[-room:] if room > 0 else []:
+                    self._remember(delegate["id"], delegate)
+        return found
+
+    def stats(self) -> Dict:
+        """Lookup counters for reporting."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._entries),
+                "listed": self._listed
+            }
+
+class AsyncDelegateResolver(DelegateResolver):
+    """
+    DelegateResolver for AsyncHarnessClient: the same LRU, coalescing and
+    switch to the bulk listing, with lookups awaited on the event loop
+
+    Use one instance from one event loop.
+
+    Args:
+        fetch_one (Callable): Coroutine function returning delegate information for one ID ({} if unknown)
+        fetch_all (Callable): Returns an async iterator over every delegate in the account
+        max_entries (int): Maximum delegates kept in the LRU
+        bulk_threshold (int): Distinct misses before switching to the bulk listing
+        max_workers (int): Maximum concurrent single-delegate lookups
+    """
+
+    def __init__(self, fetch_one: Callable[[str], Awaitable[Dict]], fetch_all: Callable[[], AsyncIterator[Dict]],
+                 max_entries: int = DEFAULT_RESOLVER_SIZE, bulk_threshold: int = DEFAULT_BULK_THRESHOLD,
+                 max_workers: int = 4):
+        super().__init__(fetch_one, fetch_all, max_entries, bulk_threshold, max_workers)
+        # Created on first use so it binds to the running event loop
+        self._listing_lock = None
+
+    async def resolve(self, delegate_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Resolve a set of delegate IDs (see DelegateResolver.resolve)."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        results = {}
+        owned = {}
+        waiting = {}
+        # Everything runs on one loop, so the bookkeeping needs no lock between awaits
+        for delegate_id in set(filter(None, delegate_ids)):
+            if delegate_id in self._entries:
+                self._entries.move_to_end(delegate_id)
+                results[delegate_id] = self._entries[delegate_id]
+                self.hits += 1
+            elif delegate_id in self._in_flight:
+                waiting[delegate_id] = self._in_flight[delegate_id]
+                self.coalesced += 1
+            else:
+                owned[delegate_id] = self._in_flight[delegate_id] = loop.create_future()
+                self.misses += 1
+        use_listing = not self._listed and self.misses > self.bulk_threshold
+
+        if owned:
+            try:
+                fetched = await self._fetch(list(owned), use_listing)
+            except BaseException as e:
+                for delegate_id, future in owned.items():
+                    del self._in_flight[delegate_id]
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+                        # Waiters see it; without any, it must not be logged as never retrieved
+                        future.exception()
+                raise
+
+            for delegate_id, future in owned.items():
+                delegate = fetched.get(delegate_id) or {}
+                if delegate:
+                    with self._lock:
+                        self._remember(delegate_id, delegate)
+                del self._in_flight[delegate_id]
+                future.set_result(delegate)
+                results[delegate_id] = delegate
+
+        for delegate_id, future in waiting.items():
+            results[delegate_id] = await future
+        return results
+
+    async def _fetch(self, delegate_ids, use_listing: bool) -> Dict[str, Dict]:
+        fetched = {}
+        if use_listing:
+            try:
+                fetched = await self._load_listing(delegate_ids)
+            except RequestRefused:
+                raise
+            except Exception:
+                # The listing is only an optimization; fall back to single lookups
+                fetched = {}
+
+        remaining = [delegate_id for delegate_id in delegate_ids if delegate_id not in fetched]
+        found = await gather_bounded((self._fetch_one(delegate_id) for delegate_id in remaining), self.max_workers)
+        fetched.update(zip(remaining, found))
+        return fetched
+
+    async def _load_listing(self, delegate_ids) -> Dict[str, Dict]:
+        import asyncio
+        if self._listing_lock is None:
+            self._listing_lock = asyncio.Lock()
+        wanted = set(delegate_ids)
+        found = {}
+        async with self._listing_lock:
+            if self._listed:
+                return {i: self._entries[i] for i in wanted if i in self._entries}
+
+            listing = []
+            try:
+                async for delegate in self._fetch_all():
+                    if delegate.get("id") in wanted:
+                        found[delegate["id"]] = delegate
+                    else:
+                        listing.append(delegate)
+            finally:
+                self._listed = True
+
+            room = self.max_entries - len(found)
+            with self._lock:
+                for delegate in listing[-room:] if room > 0 else []:
+                    self._remember(delegate["id"], delegate)
+        return found
@@ -0,0 +1,255 @@
+"""Rate-limit-aware admission control for Harness API requests."""
+
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from harness_debugger.utils.constants import DEFAULT_MAX_CONCURRENCY, DEFAULT_RATE_LIMITS
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds from now."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, holding at most `burst`
+
+    Not thread-safe on its own; RequestScheduler guards it with its lock.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Take a token if one is available; otherwise return the seconds until one will be."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class _EndpointState:
+    """Bucket, adaptive concurrency limit and counters for one endpoint class."""
+
+    def __init__(self, rate: float, burst: float, max_concurrency: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.successes = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.requests = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # (loop, future) of async acquirers waiting for a release
+        self.waiters = []
+
+class _Slot:
+    """Admission granted by the scheduler; the caller records the response on it."""
+
+    __slots__ = ("endpoint_class", "status", "retry_after")
+
+    def __init__(self, endpoint_class: str):
+        self.endpoint_class = endpoint_class
+        self.status = None
+        self.retry_after = None
+
+def _wake(waiter):
+    """Resolve an async acquirer's future, unless it already gave up waiting."""
+    if not waiter.done():
+        waiter.set_result(None)
+
+class RequestScheduler:
+    """
+    Shared scheduler that every API request passes through
+
+    Each endpoint class gets its own token bucket and concurrency limit. A 429
+    halves the class's concurrency limit and blocks it for the Retry-After
+    period; every `limit` consecutive successes raise the limit by one again
+    (AIMD). One scheduler can be shared by several clients, by threads and by
+    the async client.
+
+    Args:
+        rate_limits (Dict[str, Tuple[float, float]]): (requests per second, burst) per endpoint
+            class; the "default" entry applies to classes without their own
+        max_concurrency (int): Upper bound for each class's adaptive concurrency limit
+    """
+
+    def __init__(self, rate_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS, **(rate_limits or {}))
+        self.max_concurrency = max_concurrency
+        self._states = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+
+    def _state(self, endpoint_class: str) -> _EndpointState:
+        """Per-class state, created on first use. Caller holds _lock."""
+        state = self._states.get(endpoint_class)
+        if state is None:
+            rate, burst = self.rate_limits.get(endpoint_class, self.rate_limits["default"])
+            state = self._states[endpoint_class] = _EndpointState(rate, burst, self.max_concurrency)
+        return state
+
+    def _try_acquire(self, state: _EndpointState) -> Optional[float]:
+        """
+        Admit a request if possible. Caller holds _lock.
+
+        Returns:
+            0 if admitted, seconds to wait for a rate-limit token or Retry-After,
+            or None if the class is at its concurrency limit (wait for a release)
+        """
+        now = time.monotonic()
+        if now < state.blocked_until:
+            return state.blocked_until - now
+        if state.in_flight >= state.limit:
+            return None
+        wait = state.bucket.take(now)
+        if wait == 0:
+            state.in_flight += 1
+            state.requests += 1
+        return wait
+
+    def _enqueue(self, state: _EndpointState):
+        state.queued += 1
+        state.max_queued = max(state.max_queued, state.queued)
+
+    def _dequeue(self, state: _EndpointState, waited: float):
+        state.queued -= 1
+        state.total_wait += waited
+        state.max_wait = max(state.max_wait, waited)
+
+    def acquire(self, endpoint_class: str, deadline=None) -> _Slot:
+        """
+        Block until a request for endpoint_class may be sent
+
+        Args:
+            endpoint_class (str): Endpoint class of the request
+            deadline (Deadline): Stop waiting when it passes
+
+        Raises:
+            DeadlineExceeded: If the deadline passes first
+        """
+        started = time.monotonic()
+        with self._lock:
+            state = self._state(endpoint_class)
+            self._enqueue(state)
+            try:
+                while True:
+                    wait = self._try_acquire(state)
+                    if wait == 0:
+                        break
+                    if deadline is not None:
+                        deadline.check()
+                        wait = min(wait, deadline.remaining()) if wait is not None else deadline.remaining()
+                    self._released.wait(timeout=wait)
+            finally:
+                self._dequeue(state, time.monotonic() - started)
+        return _Slot(endpoint_class)
+
+    async def acquire_async(self, endpoint_class: str, deadline=None) -> _Slot:
+        """Wait, without blocking the event loop, until a request for endpoint_class may be sent (see acquire)."""
+        # Only the async client gets here; keep asyncio off the sync CLI's import path
+        import asyncio
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        with self._lock:
+            state = self._state(endpoint_class)
+            self._enqueue(state)
+        try:
+            while True:
+                waiter = None
+                with self._lock:
+                    wait = self._try_acquire(state)
+                    if wait is None:
+                        # Releases may come from other threads; release() resolves this on our loop
+                        waiter = loop.create_future()
+                        state.waiters.append((loop, waiter))
+                if wait == 0:
+                    break
+                limit = None
+                if deadline is not None:
+                    deadline.check()
+                    limit = deadline.remaining()
+                try:
+                    if waiter is not None:
+                        await asyncio.wait_for(waiter, limit)
+                    else:
+                        await asyncio.sleep(wait if limit is None else min(wait, limit))
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    if waiter is not None:
+                        with self._lock:
+                            if (loop, waiter) in state.waiters:
+                                state.waiters.remove((loop, waiter))
+        finally:
+            with self._lock:
+                self._dequeue(state, time.monotonic() - started)
+        return _Slot(endpoint_class)
+
+    def release(self, slot: _Slot):
+        """Return a slot, adapting the class's concurrency to the response it got."""
+        with self._lock:
+            state = self._state(slot.endpoint_class)
+            state.in_flight -= 1
+            if slot.status == 429:
+                state.throttled += 1
+                state.successes = 0
+                state.limit = max(1, state.limit // 2)
+                if slot.retry_after:
+                    state.blocked_until = max(state.blocked_until, time.monotonic() + slot.retry_after)
+            elif slot.status is not None and slot.status < 500:
+                state.successes += 1
+                if state.successes >= state.limit and state.limit < state.max_concurrency:
+                    state.limit += 1
+                    state.successes = 0
+            self._released.notify_all()
+            waiters, state.waiters = state.waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    @contextmanager
+    def slot(self, endpoint_class: str, deadline=None):
+        """Hold a slot for the duration of a request: `with scheduler.slot("delegates") as slot:`."""
+        slot = self.acquire(endpoint_class, deadline)
+        try:
+            yield slot
+        finally:
+            self.release(slot)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Queue depth, wait times, throttling and current concurrency per endpoint class."""
+        with self._lock:
+            return {
+                endpoint_class: {
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                    "in_flight": state.in_flight,
+                    "queued": state.queued,
+                    "max_queued": state.max_queued,
+                    "concurrency_limit": state.limit,
+                    "total_wait": state.total_wait,
+                    "max_wait": state.max_wait,
+                    "avg_wait": state.total_wait / state.requests if state.requests else 0.0
+                }
+                for endpoint_class, state in self._states.items()
+            }
@@ -0,0 +1,78 @@
+"""Concurrency helpers shared by the API client and commands."""
+
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], max_workers: int,
+                window: Optional[int] = None) -> Iterator[R]:
+    """
+    Apply func to items on a bounded thread pool, yielding results in input order
+    
+    Unlike ThreadPoolExecutor.map, items are consumed lazily and at most `window`
+    calls are pending at once, so memory stays bounded for long or unbounded
+    inputs. Pending calls are cancelled if the consumer stops iterating early.
+    Each call runs in a copy of the caller's context, so context variables
+    (e.g. batch output capture) carry over into the workers.
+    
+    Args:
+        func (Callable): Function to apply to each item
+        items (Iterable): Input items, consumed lazily
+        max_workers (int): Maximum number of worker threads
+        window (int): Maximum calls submitted but not yet yielded (defaults to 2 * max_workers)
+        
+    Yields:
+        The result of func for each item, in input order
+    """
+    max_workers = max(1, max_workers)
+    window = max(1, window or 2 * max_workers)
+    pending = deque()
+    items = iter(items)
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for item in items:
+            pending.append(executor.submit(contextvars.copy_context().run, func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+async def gather_bounded(awaitables: Iterable, limit: Optional[int] = None) -> list:
+    """
+    Like asyncio.gather, with at most `limit` awaitables running at once
+
+    When one fails, the others are cancelled (and awaited, so none is left
+    running or with an unretrieved error) before the error is raised.
+
+    Args:
+        awaitables (Iterable): Coroutines to run
+        limit (int): Maximum running at once (defaults to no limit)
+
+    Returns:
+        list: Their results, in order
+    """
+    # Only the async client gets here; keep asyncio off the sync CLI's import path
+    import asyncio
+    semaphore = asyncio.Semaphore(limit) if limit else None
+
+    async def bounded(awaitable):
+        async with semaphore:
+            return await awaitable
+
+    tasks = [asyncio.ensure_future(bounded(awaitable) if semaphore else awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -11,4 +11,125 @@ EMOJI_TIME = "⏱️  "
 EMOJI_LABEL = "🏷️  "
 EMOJI_CONNECTOR = "🔌 "
 EMOJI_CHECK = "🔍 "
-EMOJI_NETWORK = "🌐 " 
\ No newline at end of file
+EMOJI_NETWORK = "🌐 "
+EMOJI_LOG = "📄 "
+
+# HTTP client defaults
+DEFAULT_GATEWAY_URL = "https://app.harness.io/gateway"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+MAX_BACKOFF_SECONDS = 30
+
+# Seconds allowed for each request attempt (connect, and each read), shortened
+# further by a command's --deadline; and the exit status of a command that ran
+# out of deadline or was refused by a circuit breaker (its output is partial)
+DEFAULT_REQUEST_TIMEOUT = 30.0
+EXIT_INCOMPLETE = 3
+
+# Circuit breakers: consecutive failures (dropped connections, timeouts, 5xx)
+# that open an endpoint's circuit, and seconds it stays open before a trial call
+DEFAULT_BREAKER_FAILURES = 5
+DEFAULT_BREAKER_COOLDOWN = 30.0
+
+# Pagination defaults
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_PAGE_WORKERS = 8
+
+# Maximum concurrent per-execution detail requests
+DEFAULT_DETAIL_WORKERS = 8
+
+# Maximum in-flight requests for AsyncHarnessClient
+DEFAULT_ASYNC_CONCURRENCY = 50
+
+# Response cache defaults (TTLs in seconds, per resource)
+DEFAULT_CACHE_TTLS = {
+    "delegates": 60,
+    "delegate": 60,
+    "connectors": 300,
+}
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Delegate resolver: LRU size and distinct misses before using the bulk listing
+DEFAULT_RESOLVER_SIZE = 10000
+DEFAULT_BULK_THRESHOLD = 10
+
+# JSON: backends in order of preference (HARNESS_DEBUGGER_JSON picks one), the
+# read size when listing pages are decoded as they download, and the page size
+# (Content-Length) above which they are (smaller pages decode faster whole, see
+# benchmarks/bench_json.py)
+JSON_BACKENDS = ("orjson", "ujson", "json")
+DEFAULT_JSON_CHUNK_SIZE = 64 * 1024
+DEFAULT_STREAM_DECODE_BYTES = 8 * 1024 * 1024
+
+# Import-time budget for harness_debugger.cli, in microseconds (see tests/test_cli.py)
+STARTUP_IMPORT_BUDGET_US = 30000
+
+# Request scheduler: (requests per second, burst) per endpoint class, and the
+# upper bound for each class's adaptive concurrency limit
+DEFAULT_RATE_LIMITS = {
+    "default": (100.0, 200),
+}
+DEFAULT_MAX_CONCURRENCY = 16
+
+# pipeline watch: seconds between polls, and how far before the high-water mark
+# each poll looks for runs that were still in progress last time
+DEFAULT_WATCH_INTERVAL = 60
+DEFAULT_WATCH_LOOKBACK_MINUTES = 120
+
+# pipeline scan: pipeline stages scanned concurrently
+DEFAULT_FLEET_WORKERS = 4
+
+# Text tables: rows buffered to size the columns before streaming the rest,
+# column width when not sampling, and the pager used by --pager
+DEFAULT_TABLE_SAMPLE = 200
+DEFAULT_TABLE_COLUMN_WIDTH = 24
+DEFAULT_PAGER = "less -FRX"
+
+# Step logs (pipeline check --logs): lines that look like the cause of a failure,
+# context lines kept around each match, the last N excerpts kept per step, the
+# longest line kept (the rest is cut), download chunk size and concurrent downloads.
+# The patterns start with literal text so the regex engine can skip ahead; a
+# leading \b or \w makes every line several times slower to scan.
+DEFAULT_LOG_PATTERNS = (
+    r"(?:ERROR|FATAL|CRITICAL)\b",
+    r"(?:Exception|Error)\b",
+    r"Traceback \(most recent call last\)",
+    r"^panic: ",
+    r"exit (?:code|status) [1-9]",
+    r"command not found",
+)
+DEFAULT_LOG_CONTEXT = 3
+DEFAULT_LOG_MAX_EXCERPTS = 10
+DEFAULT_LOG_MAX_EXCERPT_LINES = 200
+DEFAULT_LOG_MAX_LINE_LENGTH = 2000
+DEFAULT_LOG_CHUNK_SIZE = 64 * 1024
+DEFAULT_LOG_WORKERS = 4
+
+# delegate test-connectivity: services checked when no --urls are given, and
+# for --run, the seconds allowed per probe and probes run at once
+DEFAULT_CONNECTIVITY_URLS = (
+    "https://app.harness.io",
+    "https://github.com",
+    "https://registry-1.docker.io",
+    "https://storage.googleapis.com",
+)
+DEFAULT_PROBE_TIMEOUT = 5.0
+DEFAULT_PROBE_CONCURRENCY = 50
+
+# delegate list --changed-since: snapshots kept per account, and seconds without
+# a heartbeat before a delegate counts as stale
+DEFAULT_DELEGATE_SNAPSHOTS = 20
+DEFAULT_HEARTBEAT_STALE_SECONDS = 300
+
+# batch: commands run concurrently on the shared client
+DEFAULT_BATCH_WORKERS = 4
+
+# Execution history (--history): days runs are kept, most runs kept (oldest go
+# first), days before a run's full record is dropped in favor of its indexed
+# fields, runs written per transaction, and the groups history query counts by
+DEFAULT_HISTORY_RETENTION_DAYS = 90
+DEFAULT_HISTORY_MAX_RUNS = 100000
+DEFAULT_HISTORY_COMPACT_AFTER_DAYS = 14
+DEFAULT_HISTORY_BATCH_SIZE = 100
+HISTORY_GROUPS = ("pipeline", "stage", "status", "delegate", "label", "message", "day")
@@ -1,10 +1,10 @@
 """Formatting utilities for CLI output."""
 
-import json
+import sys
 from datetime import datetime
 from colorama import Fore, Style
-import tabulate
 
+from harness_debugger.utils import jsonlib
 from harness_debugger.utils.constants import *
 
 def print_welcome():
@@ -13,24 +13,21 @@ def print_welcome():
     print(f"{EMOJI_INFO} {Fore.WHITE}Harness Debugger - Pipeline & Delegate Troubleshooting Tool")
     print(f"{Style.BRIGHT}{Fore.CYAN}{'=' * 60}{Style.RESET_ALL}\n")
 
-def format_connector_table(connectors):
-    """Format connectors as a table."""
-    table_data = []
-    for connector in connectors:
-        created_by = connector.get("createdBy", {}).get("name", "Unknown")
-        created_at = datetime.fromtimestamp(int(connector.get("createdAt", 0)) / 1000).strftime("%Y-%m-%d %H:%M:%S") if connector.get("createdAt") else "Unknown"
-        
-        table_data.append([
-            connector.get("name", "Unknown"),
-            connector.get("id", "Unknown"),
-            connector.get("connectorType", "Unknown"),
-            ", ".join(connector.get("delegateSelectors", [])) or "None",
-            created_by,
-            created_at
-        ])
-    
-    headers = ["Name", "ID", "Type", "Delegate Selectors", "Created By", "Created At"]
-    return tabulate.tabulate(table_data, headers=headers, tablefmt="pretty")
+CONNECTOR_HEADERS = ["Name", "ID", "Type", "Delegate Selectors", "Created By", "Created At"]
+
+def connector_row(connector):
+    """Table row for a connector, in CONNECTOR_HEADERS order."""
+    created_by = connector.get("createdBy", {}).get("name", "Unknown")
+    created_at = datetime.fromtimestamp(int(connector.get("createdAt", 0)) / 1000).strftime("%Y-%m-%d %H:%M:%S") if connector.get("createdAt") else "Unknown"
+    
+    return [
+        connector.get("name", "Unknown"),
+        connector.get("id", "Unknown"),
+        connector.get("connectorType", "Unknown"),
+        ", ".join(connector.get("delegateSelectors", [])) or "None",
+        created_by,
+        created_at
+    ]
 
 def format_delegate_info(delegate):
     """Format delegate information for display."""
@@ -57,4 +54,40 @@ def format_delegate_info(delegate):
     else:
         output.append(f"  {EMOJI_LABEL}{Fore.YELLOW}Labels: {Fore.RED}None")
     
-    return "\n".join(output) 
\ No newline at end of file
+    return "\n".join(output) 
+
+def json_default(numeric_timestamps=False):
+    """
+    Build a jsonlib.dumps `default` hook for the client's record types
+    
+    Records such as DelegateRecord are written through their to_dict;
+    anything else unknown to json falls back to str.
+    
+    Args:
+        numeric_timestamps (bool): Write record timestamps as epoch millis
+    """
+    def default(value):
+        if hasattr(value, "to_dict"):
+            return value.to_dict(numeric_timestamps)
+        return str(value)
+    return default
+
+def write_ndjson(records, stream=None, numeric_timestamps=False):
+    """
+    Write records as newline-delimited JSON, flushing after each one
+    
+    Records are consumed lazily, so a generator is streamed to the consumer
+    as it is produced and never held in memory.
+    
+    Returns:
+        int: Number of records written
+    """
+    stream = stream or sys.stdout
+    default = json_default(numeric_timestamps)
+    count = 0
+    for record in records:
+        stream.write(jsonlib.dumps(record, default=default))
+        stream.write("\n")
+        stream.flush()
+        count += 1
+    return count
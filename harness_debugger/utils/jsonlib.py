@@ -0,0 +1,240 @@
+"""JSON through the fastest installed backend, and incremental decoding of large listing pages."""
+
+import codecs
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Union
+
+from harness_debugger.utils.constants import *
+
+def _orjson():
+    import orjson
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(value, indent=None, default=None):
+        # orjson only indents by two spaces, which is what the CLI prints
+        return orjson.dumps(value, default=default,
+                            option=options | orjson.OPT_INDENT_2 if indent else options).decode()
+    return orjson.loads, dumps, (orjson.JSONEncodeError,)
+
+def _ujson():
+    import ujson
+
+    def dumps(value, indent=None, default=None):
+        return ujson.dumps(value, indent=indent or 0, default=default, escape_forward_slashes=False)
+    return ujson.loads, dumps, (TypeError, OverflowError)
+
+def _stdlib():
+    return json.loads, _stdlib_dumps, ()
+
+def _stdlib_dumps(value, indent=None, default=None):
+    return json.dumps(value, indent=indent, default=default, separators=None if indent else (",", ":"))
+
+_BACKENDS = {"orjson": _orjson, "ujson": _ujson, "json": _stdlib}
+_backend = None
+
+def _load_backend():
+    """Pick the backend on first use, so importing this module stays cheap."""
+    global _backend
+    if _backend is None:
+        choice = os.environ.get("HARNESS_DEBUGGER_JSON", "").strip().lower()
+        for name in ([choice] if choice in _BACKENDS else []) + list(JSON_BACKENDS):
+            try:
+                _backend = (name,) + _BACKENDS[name]()
+                break
+            except ImportError:
+                continue
+    return _backend
+
+def backend() -> str:
+    """
+    Name of the JSON backend in use: orjson, ujson or json
+
+    HARNESS_DEBUGGER_JSON selects one explicitly; otherwise the first of
+    JSON_BACKENDS that is installed is used.
+    """
+    return _load_backend()[0]
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document (bytes or text)."""
+    name, fast_loads = _load_backend()[:2]
+    try:
+        return fast_loads(data)
+    except ValueError:
+        if name == "json":
+            raise
+        # Let the standard library decide, and word the error, for anything the fast path refuses
+        return json.loads(data)
+
+def dumps(value: Any, indent: Optional[int] = None, default: Optional[Callable] = None) -> str:
+    """
+    Encode value as JSON text
+
+    Args:
+        value: Value to encode
+        indent (int): Indent nested values (the fast backends always use two
+            spaces); compact separators without it
+        default (Callable): Called for values the encoder does not know
+    """
+    fast_dumps, errors = _load_backend()[2:]
+    try:
+        return fast_dumps(value, indent, default)
+    except errors:
+        # e.g. integers beyond 64 bits, which only the standard library encodes
+        return _stdlib_dumps(value, indent, default)
+
+def decode_page(body: Union[bytes, str], item: Callable[[Any], Any],
+                path: Sequence[str] = ("data", "content")) -> Any:
+    """
+    Decode a whole listing response with the fast backend, then convert its items
+
+    Same result as read_page; faster for a body that is already in memory, at
+    the cost of holding every raw item until they are converted.
+
+    Args:
+        body: The response body (bytes or text)
+        item (Callable): Converts one raw item; None drops it
+        path (Sequence[str]): Keys leading to the item array
+    """
+    document = loads(body)
+    parent = document
+    for key in path[:-1]:
+        parent = parent.get(key) if isinstance(parent, dict) else None
+    if isinstance(parent, dict) and isinstance(parent.get(path[-1]), list):
+        parent[path[-1]] = [result for result in map(item, parent[path[-1]]) if result is not None]
+    return document
+
+# Incremental decoding
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+class _Reader:
+    """A window over a stream of JSON text that decodes one value at a time."""
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        if isinstance(chunks, (bytes, bytearray, str)):
+            data, size = chunks, DEFAULT_JSON_CHUNK_SIZE
+            chunks = (data[start:start + size] for start in range(0, len(data), size))
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, at_least: int = 1) -> bool:
+        """Append at least `at_least` more characters to the window; False at end of input."""
+        parts = [self._buffer[self._pos:]]
+        added = 0
+        while added < at_least and not self._eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                text = self._decoder.decode(b"", final=True)
+            else:
+                text = chunk if isinstance(chunk, str) else self._decoder.decode(chunk)
+            parts.append(text)
+            added += len(text)
+        self._buffer, self._pos = "".join(parts), 0
+        return added > 0
+
+    def peek(self) -> str:
+        """The next non-whitespace character without consuming it ('' at end of input)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}, found {found or 'end of input'!r}",
+                                       self._buffer, self._pos)
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Most likely cut off by the end of the window: double it and retry
+                if not self._fill(max(len(self._buffer) - self._pos, DEFAULT_JSON_CHUNK_SIZE)):
+                    raise
+                continue
+            # A value that ends exactly at the window's edge may be a number that continues
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def document(self, path: Sequence[str], item: Callable[[Any], Any]) -> Any:
+        value = self._object(path, item) if self.peek() == "{" else self.value()
+        if self.peek():
+            raise json.JSONDecodeError("Extra data", self._buffer, self._pos)
+        return value
+
+    def _object(self, path: Sequence[str], item: Callable[[Any], Any]) -> Dict:
+        self.expect("{")
+        result = {}
+        if self.peek() == "}":
+            self._pos += 1
+            return result
+        while True:
+            if self.peek() != '"':
+                raise json.JSONDecodeError("Expecting property name", self._buffer, self._pos)
+            key = self.value()
+            self.expect(":")
+            if path and key == path[0] and len(path) == 1 and self.peek() == "[":
+                result[key] = self._array(item)
+            elif path and key == path[0] and len(path) > 1 and self.peek() == "{":
+                result[key] = self._object(path[1:], item)
+            else:
+                result[key] = self.value()
+            if self.peek() == "}":
+                self._pos += 1
+                return result
+            self.expect(",")
+
+    def _array(self, item: Callable[[Any], Any]) -> list:
+        self.expect("[")
+        results = []
+        if self.peek() == "]":
+            self._pos += 1
+            return results
+        while True:
+            result = item(self.value())
+            if result is not None:
+                results.append(result)
+            if self.peek() == "]":
+                self._pos += 1
+                return results
+            self.expect(",")
+
+def read_page(chunks: Iterable[Union[bytes, str]], item: Callable[[Any], Any],
+              path: Sequence[str] = ("data", "content")) -> Any:
+    """
+    Decode a listing response incrementally, converting its items as they are parsed
+
+    Only one raw item is in memory at a time: each element of the array at
+    `path` is decoded on its own and replaced by item(element), and dropped
+    when that returns None. Everything else in the document is decoded as
+    usual.
+
+    Args:
+        chunks: The response body (bytes or text), or an iterable of its pieces
+            split anywhere; a whole body is read DEFAULT_JSON_CHUNK_SIZE at a time
+        item (Callable): Converts one raw item; None drops it
+        path (Sequence[str]): Keys leading to the item array
+
+    Returns:
+        The decoded document, with the converted items in place of the array
+
+    Raises:
+        json.JSONDecodeError: If the body is not valid JSON
+    """
+    return _Reader(chunks).document(tuple(path), item)
@@ -0,0 +1,43 @@
+"""Per-command capture of sys.stdout/sys.stderr for commands running side by side."""
+
+import contextvars
+from typing import Optional, TextIO
+
+from colorama import Style
+
+class ThreadOutput:
+    """
+    Stand-in for sys.stdout/sys.stderr that gives each concurrently running command its own buffer
+
+    Used by batch (one buffer per command) and by --profiles (one per profile).
+    The buffer is held in a context variable, so it follows the command into
+    the threads of ordered_map and the tasks of the async client. Code that is
+    not capturing writes to the real stream. Color codes are reset after every
+    captured write, as colorama's autoreset would have done.
+    """
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+        self._buffer = contextvars.ContextVar(f"output-buffer-{id(self)}", default=None)
+
+    def capture(self, buffer: Optional[TextIO]):
+        """Send this context's writes to buffer from now on; None writes to the real stream again."""
+        self._buffer.set(buffer)
+
+    def write(self, text: str) -> int:
+        buffer = self._buffer.get()
+        if buffer is None:
+            return self._stream.write(text)
+        buffer.write(text + Style.RESET_ALL if "\x1b[" in text else text)
+        return len(text)
+
+    def flush(self):
+        if self._buffer.get() is None:
+            self._stream.flush()
+
+    def isatty(self) -> bool:
+        # Captured output is not written to a terminal while the command runs
+        return self._buffer.get() is None and self._stream.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
@@ -0,0 +1,28 @@
+"""Filesystem locations used by the Harness Debugger CLI tool."""
+
+import os
+
+def default_cache_dir() -> str:
+    """
+    Directory for cached responses and other local state
+    
+    Honors HARNESS_DEBUGGER_CACHE_DIR, then XDG_CACHE_HOME, then ~/.cache.
+    """
+    path = os.environ.get("HARNESS_DEBUGGER_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "harness-debugger")
+    return path
+
+def default_profiles_path() -> str:
+    """
+    The profiles file (named credential sets)
+    
+    Honors HARNESS_DEBUGGER_PROFILES, then profiles.ini under XDG_CONFIG_HOME
+    or ~/.config.
+    """
+    path = os.environ.get("HARNESS_DEBUGGER_PROFILES")
+    if not path:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+        path = os.path.join(base, "harness-debugger", "profiles.ini")
+    return path
@@ -0,0 +1,174 @@
+"""Streaming text tables for large result sets."""
+
+import os
+import re
+import shlex
+import subprocess
+import sys
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from harness_debugger.utils.constants import *
+
+try:
+    from wcwidth import wcswidth
+except ImportError:  # tabulate's optional wide-character support; plain len() otherwise
+    wcswidth = None
+
+_ANSI_CODE = re.compile(r"\x1b\[[0-9;]*m")
+
+def _visible_width(text: str) -> int:
+    """Terminal width of text, ignoring color codes."""
+    if "\x1b" in text:
+        text = _ANSI_CODE.sub("", text)
+    if text.isascii():
+        return len(text)
+    if wcswidth is not None:
+        width = wcswidth(text)
+        if width >= 0:
+            return width
+    return len(text)
+
+def _truncate(text: str, width: int) -> str:
+    """Cut text to width columns, ending in an ellipsis. Color codes are dropped from cut cells."""
+    plain = _ANSI_CODE.sub("", text)
+    while plain and _visible_width(plain) > width - 1:
+        plain = plain[:-1]
+    return plain + "…"
+
+class StreamingTable:
+    """
+    Render rows as a text table while they are still being produced
+
+    Column widths come from the headers and the first `sample_size` rows,
+    which are buffered; every later row is printed as soon as it arrives and
+    cells wider than their column are truncated. With sample_size=0 nothing
+    is buffered and every column is `max_width` (or DEFAULT_TABLE_COLUMN_WIDTH)
+    wide. When the whole result fits in the sample and no cell is capped, the
+    output is identical to tabulate's "pretty" format.
+
+    Args:
+        headers (Sequence[str]): Column headers
+        stream: Where to write (defaults to sys.stdout)
+        sample_size (int): Rows buffered to size the columns
+        max_width (int): Cap on column width; wider cells are truncated
+    """
+
+    def __init__(self, headers: Sequence[str], stream=None, sample_size: int = DEFAULT_TABLE_SAMPLE,
+                 max_width: Optional[int] = None):
+        self.headers = [str(header) for header in headers]
+        self.stream = stream
+        self.sample_size = sample_size
+        self.max_width = max_width
+        self.widths = None
+
+    @classmethod
+    def from_args(cls, headers: Sequence[str], args) -> "StreamingTable":
+        """A table configured by the global --table-sample and --max-col-width options."""
+        return cls(headers, sample_size=args.table_sample, max_width=args.max_col_width)
+
+    def _size_columns(self, sample: List[List[str]]) -> List[int]:
+        if not self.sample_size:
+            fixed = self.max_width or DEFAULT_TABLE_COLUMN_WIDTH
+            return [max(fixed, _visible_width(header)) for header in self.headers]
+        widths = [_visible_width(header) for header in self.headers]
+        for row in sample:
+            widths = [max(width, _visible_width(cell)) for width, cell in zip(widths, row)]
+        if self.max_width:
+            widths = [max(min(width, self.max_width), _visible_width(header))
+                      for width, header in zip(widths, self.headers)]
+        return widths
+
+    def _border(self) -> str:
+        return "+" + "+".join("-" * (width + 2) for width in self.widths) + "+"
+
+    def _line(self, cells: List[str]) -> str:
+        padded = []
+        for cell, width in zip(cells, self.widths):
+            cell_width = _visible_width(cell)
+            if cell_width > width:
+                cell = _truncate(cell, width)
+                cell_width = _visible_width(cell)
+            left = (width - cell_width) // 2
+            padded.append(" " * left + cell + " " * (width - cell_width - left))
+        return "| " + " | ".join(padded) + " |"
+
+    def write(self, rows: Iterable[Sequence], title: Optional[Callable[[Optional[int]], str]] = None) -> int:
+        """
+        Print rows as they arrive, flushing after each one
+
+        Args:
+            rows (Iterable[Sequence]): Table rows; cells are converted with str()
+                (None becomes an empty cell)
+            title (Callable): Called before the table is printed with the row
+                count, or None if more rows than the sample are still coming;
+                returns a line to print above the table
+
+        Returns:
+            int: Number of rows written (nothing is printed for zero rows)
+        """
+        stream = self.stream or sys.stdout
+        rows = iter(rows)
+        to_cells = lambda row: ["" if cell is None else str(cell) for cell in row]
+
+        # Even without sampling, wait for the first row so an empty result prints nothing
+        buffered = max(self.sample_size, 1)
+        sample = [to_cells(row) for row in islice(rows, buffered)]
+        complete = len(sample) < buffered
+        if not sample:
+            return 0
+        self.widths = self._size_columns(sample)
+
+        if title is not None:
+            print(title(len(sample) if complete else None), file=stream)
+        border = self._border()
+        print(border, file=stream)
+        print(self._line(self.headers), file=stream)
+        print(border, file=stream)
+        for cells in sample:
+            print(self._line(cells), file=stream)
+        stream.flush()
+
+        count = len(sample)
+        for row in rows:
+            print(self._line(to_cells(row)), file=stream)
+            stream.flush()
+            count += 1
+
+        print(border, file=stream)
+        return count
+
+@contextmanager
+def paged_output(enabled: bool = True):
+    """
+    Send everything printed inside the block through $PAGER (default: less -FRX)
+
+    Paging only happens when enabled and stdout is a terminal. Output streams
+    into the pager while it is produced; quitting the pager early ends the
+    block quietly.
+    """
+    if not enabled or not sys.stdout.isatty():
+        yield
+        return
+
+    pager = os.environ.get("PAGER") or DEFAULT_PAGER
+    try:
+        process = subprocess.Popen(shlex.split(pager), stdin=subprocess.PIPE, text=True)
+    except OSError:
+        yield
+        return
+
+    stdout = sys.stdout
+    sys.stdout = process.stdin
+    try:
+        yield
+    except BrokenPipeError:
+        pass
+    finally:
+        sys.stdout = stdout
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        process.wait()
@@ -0,0 +1,91 @@
+"""Persisted high-water marks for `pipeline watch`."""
+
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, Optional
+
+from colorama import Fore
+
+from harness_debugger.utils.constants import EMOJI_WARNING
+from harness_debugger.utils.formatting import json_default
+from harness_debugger.utils.paths import default_cache_dir
+
+class WatchMark:
+    """
+    Polling progress for one pipeline stage
+
+    since_ms is the start of the last successful poll: executions that started
+    before it have already been seen. `seen` maps the failed execution IDs
+    still inside the look-back window to their start time, so a run reported
+    once is never fetched or reported again.
+    """
+
+    def __init__(self, since_ms: Optional[int] = None, seen: Optional[Dict[str, int]] = None,
+                 last_run: Optional[Dict] = None):
+        self.since_ms = since_ms
+        self.seen = dict(seen or {})
+        self.last_run = last_run
+
+    def record(self, run: Dict):
+        """Remember a reported failed run."""
+        self.seen[run["execution_id"]] = run.get("start_ts") or 0
+        if self.last_run is None or (run.get("start_ts") or 0) >= (self.last_run.get("start_ts") or 0):
+            self.last_run = run
+
+    def advance(self, since_ms: int, window_start_ms: int):
+        """Move the mark forward after a complete poll and forget runs that left the window."""
+        self.since_ms = since_ms
+        self.seen = {execution_id: start_ts for execution_id, start_ts in self.seen.items()
+                     if start_ts >= window_start_ms}
+
+    def to_dict(self) -> Dict:
+        return {"since_ms": self.since_ms, "seen": self.seen, "last_run": self.last_run}
+
+class WatchState:
+    """
+    High-water marks for every watched pipeline stage, kept in one JSON file
+
+    A state file that cannot be read (e.g. truncated by a crash on a
+    filesystem without atomic rename) is reported and treated as empty: the
+    next poll covers the whole window again.
+
+    Args:
+        path (str): State file (defaults to watch-state.json in the cache directory)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(default_cache_dir(), "watch-state.json")
+        self._marks = {}
+        try:
+            with open(self.path) as f:
+                self._marks = {key: WatchMark(**mark) for key, mark in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, AttributeError) as e:
+            self._marks = {}
+            print(f"{EMOJI_WARNING}{Fore.YELLOW}Ignoring unreadable watch state {self.path}: {e}", file=sys.stderr)
+
+    @staticmethod
+    def key(scope, pipeline_id: str, stage_name: str) -> str:
+        return "/".join([*(part or "" for part in scope), pipeline_id, stage_name])
+
+    def mark(self, key: str) -> WatchMark:
+        """Return the mark for key, creating an empty one on first use."""
+        if key not in self._marks:
+            self._marks[key] = WatchMark()
+        return self._marks[key]
+
+    def save(self):
+        """Write the state atomically, so an interrupted watch never leaves a truncated file."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".watch-state-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({key: mark.to_dict() for key, mark in self._marks.items()}, f, default=json_default())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -12,6 +12,15 @@ setup(
         "tabulate",
     ],
     extras_require={
+        "async": [
+            "aiohttp",
+        ],
+        "analytics": [
+            "numpy",
+        ],
+        "json": [
+            "orjson",
+        ],
         "dev": [
             "pytest",
             "flake8",
@@ -0,0 +1,425 @@
+"""Local stand-in for the Harness gateway, shared by tests and benchmarks."""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_delegate(index):
+    """Build a synthetic delegate in the shape returned by the Harness API."""
+    return {
+        "uuid": f"delegate-{index:05d}",
+        "name": f"delegate-{index:05d}",
+        "hostName": f"delegate-host-{index % 50}",
+        "ip": f"10.0.{index // 250}.{index % 250}",
+        "status": "ENABLED" if index % 10 else "DISCONNECTED",
+        "version": f"1.0.{8000 + index % 3}",
+        "selectors": [f"pool-{index % 5}", "shared"],
+        "lastHeartbeat": 1700000000000 + index * 1000,
+        "lastHeartBeat": 1700000000000 + index * 1000,
+        "connectedAt": 1690000000000 + index * 1000,
+        "delegateProfileId": None,
+    }
+
+
+def make_connector(index):
+    """Build a synthetic connectors/listV2 entry; scopes rotate account/org/project."""
+    scope = index % 3
+    return {
+        "connector": {
+            "name": f"connector-{index:05d}",
+            "identifier": f"connector_{index:05d}",
+            "type": ("Github", "DockerRegistry", "K8sCluster")[index % 3],
+            "orgIdentifier": "default" if scope >= 1 else None,
+            "projectIdentifier": "project" if scope == 2 else None,
+            "spec": {"delegateSelectors": [f"pool-{index % 5}"]},
+        },
+        "createdAt": 1690000000000 + index * 1000,
+        "lastModifiedAt": 1695000000000 + index * 1000,
+        "status": {"status": "SUCCESS"},
+    }
+
+
+def make_execution(index, delegates, now_ms, pipeline_id="pipeline-1", stage="build", failure_every=3,
+                   project_id="project-1"):
+    """
+    Build a synthetic execution (summary plus stage graph), newest first
+
+    Every `failure_every`-th execution fails in `stage`; its last step fails on
+    one of the delegates.
+    """
+    failed = failure_every and index % failure_every == 0
+    status = "Failed" if failed else "Success"
+    start_ts = now_ms - (index + 1) * 60000
+    stage_node_id = f"stage-node-{index:05d}"
+    summary = {
+        "planExecutionId": f"exec-{index:05d}",
+        "pipelineIdentifier": pipeline_id,
+        "projectIdentifier": project_id,
+        "status": status,
+        "startTs": start_ts,
+        "endTs": start_ts + 45000,
+        "failureInfo": {"message": "Stage failed" if failed else ""},
+        "layoutNodeMap": {
+            stage_node_id: {
+                "nodeUuid": stage_node_id,
+                "nodeIdentifier": stage,
+                "name": stage,
+                "status": status,
+                "nodeType": "CI",
+            }
+        },
+    }
+    node_map = {}
+    for step_index, step_name in enumerate(("checkout", "compile", "test")):
+        step_failed = failed and step_name == "test"
+        delegate = delegates[(index + step_index) % len(delegates)] if delegates else None
+        node_map[f"{stage_node_id}-{step_name}"] = {
+            "name": step_name,
+            "identifier": step_name,
+            "status": "Failed" if step_failed else "Success",
+            "startTs": start_ts + step_index * 15000,
+            "endTs": start_ts + (step_index + 1) * 15000,
+            "failureInfo": {"message": "Tests failed" if step_failed else ""},
+            "logBaseKey": f"exec-{index:05d}/{step_name}",
+            "delegateInfoList": [{"id": delegate["uuid"], "name": delegate["name"]}] if delegate else [],
+        }
+    return summary, {"executionGraph": {"nodeMap": node_map}}
+
+
+def make_log_line(position, text):
+    """One line of a log-service blob: newline-delimited JSON with the text in "out"."""
+    return json.dumps({"level": "info", "pos": position, "out": text + "\n", "time": "2024-01-01T00:00:00Z"})
+
+
+def iter_step_log(log_key, lines, failed):
+    """
+    Yield the blob lines of a synthetic step log
+
+    A failed step's log ends with a Python traceback and a non-zero exit status.
+    """
+    for position in range(lines):
+        yield make_log_line(position, f"[{log_key}] progress {position}: all good")
+    if failed:
+        tail = [
+            "Traceback (most recent call last):",
+            '  File "test_api.py", line 42, in test_status',
+            "    assert response.status == 200",
+            "AssertionError: expected 200, got 500",
+            "\x1b[31mERROR: 1 test failed\x1b[0m",
+            "exit status 1",
+        ]
+        for offset, text in enumerate(tail):
+            yield make_log_line(lines + offset, text)
+
+
+def _success(data):
+    return {"status": "SUCCESS", "data": data}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; don't let Nagle stall keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.stub.record_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        stub = self.server.stub
+        stub.record_request()
+        try:
+            self._respond(stub, method)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout or deadline) before the response was written
+            self.close_connection = True
+        finally:
+            stub.record_done()
+
+    def _respond(self, stub, method):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        if stub.latency:
+            time.sleep(stub.latency)
+        headers = {}
+        injected = stub.take_injected()
+        if injected is not None:
+            status, retry_after = injected
+            payload = {"status": "ERROR", "message": "Too many requests" if status == 429 else "Injected failure"}
+            if retry_after is not None:
+                headers["Retry-After"] = str(retry_after)
+        elif method == "GET" and url.path == "/log-service/blob":
+            return self._stream_log(stub, query.get("key", ""))
+        else:
+            status, payload = stub.route(method, url.path, query, body)
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_log(self, stub, log_key):
+        """Send a step log with chunked transfer encoding, without building it in memory."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        batch = []
+        for line in iter_step_log(log_key, stub.log_lines, log_key in stub.failed_log_keys):
+            batch.append(line)
+            if len(batch) == 500:
+                self._write_chunk("\n".join(batch) + "\n")
+                batch = []
+        if batch:
+            self._write_chunk("\n".join(batch) + "\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+
+class StubHarnessServer:
+    """
+    Serve synthetic Harness API responses from a background thread
+
+    Besides the data sizes, the stub can add `latency` seconds to every
+    response and inject failures: randomly, with `throttle_rate` (429 with
+    Retry-After: `retry_after`) and `error_rate` (503), or deterministically
+    for the next N requests with inject() / throttle(). Every step has a
+    `log_lines`-line log at /log-service/blob, streamed in chunks; the logs of
+    failed steps end with a traceback.
+    """
+
+    def __init__(self, delegates=10, connectors=0, executions=0, latency=0.0,
+                 host="127.0.0.1", port=0, pipelines=1, projects=1,
+                 throttle_rate=0.0, error_rate=0.0, retry_after=0, seed=0, log_lines=200):
+        self.delegates = [make_delegate(i) for i in range(delegates)]
+        self.connectors = [make_connector(i) for i in range(connectors)]
+        self.projects = [f"project-{i + 1}" for i in range(projects)]
+        self.pipelines = [f"pipeline-{i + 1}" for i in range(pipelines)]
+        now_ms = int(time.time() * 1000)
+        # Executions rotate through the pipelines, then the projects
+        self.executions = [
+            make_execution(i, self.delegates, now_ms, pipeline_id=self.pipelines[i % pipelines],
+                           project_id=self.projects[i // pipelines % projects])
+            for i in range(executions)
+        ]
+        # Lines in every step log; failed steps' logs end with an error
+        self.log_lines = log_lines
+        self.failed_log_keys = {
+            node["logBaseKey"]
+            for _, detail in self.executions
+            for node in detail["executionGraph"]["nodeMap"].values()
+            if node["status"] == "Failed"
+        }
+        self.latency = latency
+        self.request_count = 0
+        self.connection_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.throttled_count = 0
+        self.error_count = 0
+        self._injected = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_request(self):
+        with self._lock:
+            self.request_count += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def record_done(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def record_connection(self):
+        with self._lock:
+            self.connection_count += 1
+
+    def inject(self, status, count=1, retry_after=None):
+        """Answer the next `count` requests with `status` (and Retry-After, if given)."""
+        with self._lock:
+            self._injected.extend([(status, retry_after)] * count)
+
+    def throttle(self, count, retry_after=0):
+        """Answer the next `count` requests with 429 and the given Retry-After seconds."""
+        self.inject(429, count, retry_after)
+
+    def take_injected(self):
+        """(status, retry_after) to answer the current request with, or None to serve it normally."""
+        with self._lock:
+            if self._injected:
+                injected = self._injected.pop(0)
+            elif self.throttle_rate and self._random.random() < self.throttle_rate:
+                injected = (429, self.retry_after)
+            elif self.error_rate and self._random.random() < self.error_rate:
+                injected = (503, None)
+            else:
+                return None
+            if injected[0] == 429:
+                self.throttled_count += 1
+            else:
+                self.error_count += 1
+            return injected
+
+    def reset_counters(self):
+        with self._lock:
+            self.request_count = 0
+            self.connection_count = 0
+            self.throttled_count = 0
+            self.error_count = 0
+            self.max_in_flight = self.in_flight
+
+    def route(self, method, path, query, body):
+        """Return (status, payload) for a request."""
+        if method == "POST" and path == "/ng/api/delegate-setup":
+            return 200, self._delegate_page(body)
+        if method == "GET" and path.startswith("/api/setup/delegates/"):
+            delegate_id = path.rsplit("/", 1)[-1]
+            for delegate in self.delegates:
+                if delegate["uuid"] == delegate_id:
+                    return 200, _success(delegate)
+            return 404, {"status": "ERROR", "message": f"Delegate {delegate_id} not found"}
+        if method == "POST" and path == "/ng/api/connectors/listV2":
+            return 200, self._connector_page(query)
+        if method == "GET" and path == "/ng/api/projects":
+            projects = [{"project": {"identifier": p, "name": p, "orgIdentifier": query.get("orgIdentifier")}}
+                        for p in self.projects]
+            return 200, self._page(projects, int(query.get("pageIndex", 0)), int(query.get("pageSize", 100)))
+        if method == "POST" and path == "/pipeline/api/pipelines/list":
+            pipelines = [{"identifier": p, "name": p} for p in self.pipelines]
+            return 200, self._page(pipelines, int(query.get("page", 0)), int(query.get("size", 100)))
+        if method == "POST" and path == "/pipeline/api/pipelines/execution/summary":
+            return 200, self._execution_page(query, body)
+        if method == "GET" and path.startswith("/pipeline/api/pipelines/execution/v2/"):
+            execution_id = path.rsplit("/", 1)[-1]
+            for summary, detail in self.executions:
+                if summary["planExecutionId"] == execution_id:
+                    return 200, _success(dict(detail, pipelineExecutionSummary=summary))
+            return 404, {"status": "ERROR", "message": f"Execution {execution_id} not found"}
+        return 404, {"status": "ERROR", "message": f"No stub for {method} {path}"}
+
+    @staticmethod
+    def _page(items, page_index, page_size):
+        total = len(items)
+        start = page_index * page_size
+        return _success({
+            "content": items[start:start + page_size],
+            "pageIndex": page_index,
+            "pageSize": page_size,
+            "totalItems": total,
+            "totalPages": (total + page_size - 1) // page_size,
+        })
+
+    def _delegate_page(self, body):
+        return self._page(self.delegates, int(body.get("pageIndex", 0)), int(body.get("pageSize", 100)))
+
+    def _connector_page(self, query):
+        org = query.get("orgIdentifier")
+        project = query.get("projectIdentifier")
+        in_scope = [
+            item for item in self.connectors
+            if item["connector"]["orgIdentifier"] == org
+            and item["connector"]["projectIdentifier"] == (project if org else None)
+        ]
+        return self._page(in_scope, int(query.get("pageIndex", 0)), int(query.get("pageSize", 100)))
+
+    def _execution_page(self, query, body):
+        pipeline_id = query.get("pipelineIdentifier")
+        statuses = set(body.get("status") or [])
+        time_range = body.get("timeRange") or {}
+        start = time_range.get("startTime", 0)
+        end = time_range.get("endTime", float("inf"))
+        matching = [
+            summary for summary, _ in self.executions
+            if summary["pipelineIdentifier"] == pipeline_id
+            and query.get("projectIdentifier") in (None, summary["projectIdentifier"])
+            and (not statuses or summary["status"] in statuses)
+            and start <= summary["startTs"] <= end
+        ]
+        return self._page(matching, int(query.get("page", 0)), int(query.get("size", 100)))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Run the stub in the foreground, e.g. to point the CLI at it by hand."""
+    parser = argparse.ArgumentParser(description="Serve synthetic Harness API responses")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--delegates", type=int, default=100)
+    parser.add_argument("--connectors", type=int, default=100)
+    parser.add_argument("--executions", type=int, default=100)
+    parser.add_argument("--pipelines", type=int, default=1)
+    parser.add_argument("--projects", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--log-lines", type=int, default=200, help="Lines in every step log")
+    args = parser.parse_args()
+
+    server = StubHarnessServer(delegates=args.delegates, connectors=args.connectors, executions=args.executions,
+                               pipelines=args.pipelines, projects=args.projects, latency=args.latency,
+                               throttle_rate=args.throttle_rate, error_rate=args.error_rate,
+                               retry_after=args.retry_after, log_lines=args.log_lines, port=args.port)
+    print(f"Serving on {server.url} (HARNESS_GATEWAY_URL), Ctrl+C to stop", flush=True)
+    with server:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Tests for columnar failure-rate analytics."""
+import json
+import os
+import random
+import tempfile
+import unittest
+from harness_debugger.analytics import StepTable, np
+from harness_debugger.commands.analyze import read_runs
+
+def make_runs(count, seed=7):
+    """Synthetic failed-run records with three steps each."""
+    rng = random.Random(seed)
+    runs = []
+    for i in range(count):
+        steps = []
+        for step_name in ("checkout", "compile", "test"):
+            d = rng.randrange(12)
+            steps.append({
+                "step_name": step_name,
+                "step_status": "FAILED" if rng.random() < 0.2 else "SUCCESS",
+                "duration_ms": rng.randrange(100, 60000) if rng.random() > 0.05 else None,
+                "delegate_info": {"id": f"d{d}", "name": f"delegate-{d}", "version": f"1.0.{d % 3}",
+                                  "labels": [f"pool-{d % 4}", "shared"]},
+            })
+        runs.append({"execution_id": f"exec-{i}", "delegates": steps})
+    return runs
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestStepTable(unittest.TestCase):
+    def setUp(self):
+        self.runs = make_runs(500)
+        self.steps = [step for run in self.runs for step in run["delegates"]]
+        self.table = StepTable(self.runs)
+
+    def _expected(self, key):
+        groups = {}
+        for step in self.steps:
+            for group in key(step):
+                groups.setdefault(group, []).append(step)
+        total_failures = sum(step["step_status"] == "FAILED" for steps in groups.values() for step in steps)
+        expected = {}
+        for group, steps in groups.items():
+            failures = sum(step["step_status"] == "FAILED" for step in steps)
+            durations = [step["duration_ms"] for step in steps if step["duration_ms"] is not None]
+            expected[group] = (len(steps), failures, failures / len(steps), failures / total_failures,
+                               np.percentile(durations, 50), np.percentile(durations, 95))
+        return expected
+
+    def _assert_matches(self, dimension, key, group_key=None):
+        rows = self.table.group_by(dimension)
+        expected = self._expected(key)
+
+        self.assertEqual(len(rows), len(expected))
+        for row in rows:
+            steps, failures, rate, share, p50, p95 = expected[row[group_key or dimension]]
+            self.assertEqual((row["steps"], row["failures"]), (steps, failures))
+            self.assertAlmostEqual(row["failure_rate"], rate)
+            self.assertAlmostEqual(row["failure_share"], share)
+            self.assertAlmostEqual(row["p50_ms"], p50)
+            self.assertAlmostEqual(row["p95_ms"], p95)
+
+    def test_group_by_delegate(self):
+        self._assert_matches("delegate", lambda step: [step["delegate_info"]["id"]], group_key="delegate_id")
+        for row in self.table.group_by("delegate"):
+            self.assertEqual(row["delegate"], "delegate-" + row["delegate_id"][1:])
+
+    def test_delegates_sharing_a_name_are_kept_apart(self):
+        step = lambda delegate_id, status: {"step_status": status,
+                                            "delegate_info": {"id": delegate_id, "name": "build-pool", "labels": []}}
+        table = StepTable([{"delegates": [step("d1", "FAILED"), step("d2", "SUCCESS"), step("d1", "FAILED")]}])
+
+        rows = table.group_by("delegate")
+        self.assertEqual([(row["delegate_id"], row["delegate"], row["failures"]) for row in rows],
+                         [("d1", "build-pool", 2), ("d2", "build-pool", 0)])
+
+    def test_group_by_version(self):
+        self._assert_matches("version", lambda step: [step["delegate_info"]["version"]])
+
+    def test_group_by_label_counts_each_label_of_a_step(self):
+        self._assert_matches("label", lambda step: step["delegate_info"]["labels"])
+
+    def test_rows_are_sorted_by_failures_and_limited(self):
+        rows = self.table.group_by("delegate", top=3)
+
+        self.assertEqual(len(rows), 3)
+        failures = [row["failures"] for row in rows]
+        self.assertEqual(failures, sorted(failures, reverse=True))
+
+    def test_steps_without_delegate_details(self):
+        table = StepTable([{"delegates": [{"step_status": "FAILED", "delegate_info": {"id": "d1", "labels": []}}]}])
+
+        self.assertEqual(table.group_by("version"), [{
+            "version": "Unknown", "steps": 1, "failures": 1, "failure_rate": 1.0,
+            "failure_share": 1.0, "p50_ms": None, "p95_ms": None
+        }])
+
+class TestReadRuns(unittest.TestCase):
+    def test_reads_ndjson_and_json_arrays(self):
+        runs = make_runs(3)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ndjson_path = os.path.join(tmpdir, "runs.ndjson")
+            json_path = os.path.join(tmpdir, "runs.json")
+            with open(ndjson_path, "w") as f:
+                f.write("".join(json.dumps(run) + "\n" for run in runs[:2]))
+            with open(json_path, "w") as f:
+                json.dump(runs[2:] + [{"group": "stage"}], f, indent=2)
+
+            loaded = list(read_runs([ndjson_path, json_path]))
+
+        self.assertEqual([run["execution_id"] for run in loaded], ["exec-0", "exec-1", "exec-2"])
+
+if __name__ == '__main__':
+    unittest.main()
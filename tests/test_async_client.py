@@ -0,0 +1,115 @@
+"""Tests for the asyncio Harness API client."""
+import asyncio
+import socket
+import unittest
+from harness_debugger.async_client import AsyncHarnessClient, BlockingAsyncClient, aiohttp
+from harness_debugger.client import HarnessClient
+from tests.stub_server import StubHarnessServer
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncHarnessClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubHarnessServer(delegates=250, connectors=30, executions=12, latency=0.01).start()
+    
+    def tearDown(self):
+        self.server.stop()
+    
+    def _client(self, **kwargs):
+        return AsyncHarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                  gateway_url=self.server.url, **kwargs)
+    
+    async def test_get_delegate_info(self):
+        async with self._client() as client:
+            result = await client.get_delegate_info("delegate-00007")
+        
+        self.assertEqual(result.get("id"), "delegate-00007")
+        self.assertEqual(result.get("labels"), ["pool-2", "shared"])
+    
+    async def test_get_all_delegates_follows_pages(self):
+        async with self._client() as client:
+            delegates = await client.get_all_delegates(page_size=100)
+        
+        self.assertEqual(list(delegates), [d["uuid"] for d in self.server.delegates])
+    
+    async def test_pages_are_fetched_at_most_max_workers_at_a_time(self):
+        async with self._client() as client:
+            ids = [delegate["id"] async for delegate in client.iter_delegates(page_size=10, max_workers=3)]
+
+        self.assertEqual(ids, [d["uuid"] for d in self.server.delegates])
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 3)
+
+    async def test_fan_out_is_bounded_by_semaphore(self):
+        async with self._client(max_concurrency=5) as client:
+            ids = [f"delegate-{i:05d}" for i in range(40)]
+            results = await asyncio.gather(*(client.get_delegate_info(i) for i in ids))
+        
+        self.assertEqual([r["id"] for r in results], ids)
+        self.assertLessEqual(self.server.max_in_flight, 5)
+        self.assertLessEqual(self.server.connection_count, 5)
+    
+    async def test_get_connectors_by_selector(self):
+        async with self._client() as client:
+            connectors = await client.get_connectors("pool-0")
+        
+        self.assertTrue(connectors)
+        self.assertTrue(all("pool-0" in c["delegateSelectors"] for c in connectors))
+    
+    async def test_get_failed_runs(self):
+        async with self._client() as client:
+            runs = [run async for run in client.get_failed_runs("build", "pipeline-1", days=1)]
+        
+        self.assertEqual([r["execution_id"] for r in runs], ["exec-00000", "exec-00003", "exec-00006", "exec-00009"])
+        failed_steps = [d for d in runs[0]["delegates"] if d["step_status"] == "FAILED"]
+        self.assertEqual(failed_steps[0]["step_name"], "test")
+        self.assertEqual(failed_steps[0]["delegate_info"]["id"], "delegate-00002")
+
+    async def test_failed_runs_resolve_delegates_in_bulk(self):
+        lookups = []
+        def count_lookups(event):
+            if event.endpoint in ("GET /api/setup/delegates/{id}", "POST /ng/api/delegate-setup"):
+                lookups.append(event.endpoint)
+
+        # Few delegates, so the failed runs' steps share them
+        with StubHarnessServer(delegates=3, executions=12) as server:
+            async with AsyncHarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                          gateway_url=server.url, on_request=count_lookups) as client:
+                runs = [run async for run in client.get_failed_runs("build", "pipeline-1", days=1)]
+                first_pass = len(lookups)
+                again = [run async for run in client.get_failed_runs("build", "pipeline-1", days=1)]
+
+        # At most one request per distinct delegate (fewer once the listing takes over), none for repeats
+        delegate_ids = {d["delegate_info"]["id"] for run in runs for d in run["delegates"]}
+        steps = sum(len(run["delegates"]) for run in runs)
+        self.assertLess(len(delegate_ids), steps)
+        self.assertLessEqual(first_pass, len(delegate_ids))
+        self.assertEqual(len(lookups), first_pass)
+        self.assertEqual(again, runs)
+
+    async def test_request_timeouts_are_reported_like_other_request_errors(self):
+        # Connections are accepted by the kernel, but no response ever comes
+        with socket.socket() as listener:
+            listener.bind(("127.0.0.1", 0))
+            listener.listen(8)
+            gateway_url = "http://127.0.0.1:%d" % listener.getsockname()[1]
+            async with AsyncHarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                          gateway_url=gateway_url, timeout=0.3, max_retries=0) as client:
+                self.assertEqual(await client.get_delegate_info("delegate-00001"), {})
+                self.assertEqual(await client.get_all_delegates(), {})
+                self.assertEqual([d async for d in client.stream_delegates()], [])
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestBlockingAsyncClient(unittest.TestCase):
+    def test_matches_sync_client(self):
+        with StubHarnessServer(delegates=150, executions=6) as server:
+            kwargs = dict(api_key="test_api_key", account_id="test_account_id", gateway_url=server.url)
+            with HarnessClient(**kwargs) as sync_client:
+                expected_delegates = sync_client.get_all_delegates()
+                expected_runs = list(sync_client.get_failed_runs("build", "pipeline-1", 1))
+            with BlockingAsyncClient(AsyncHarnessClient(**kwargs)) as client:
+                self.assertEqual(client.get_all_delegates(), expected_delegates)
+                self.assertEqual(list(client.get_failed_runs("build", "pipeline-1", 1)), expected_runs)
+                self.assertEqual(len(list(client.iter_delegates())), 150)
+
+if __name__ == '__main__':
+    unittest.main()
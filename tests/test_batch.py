@@ -0,0 +1,64 @@
+"""Tests for running many commands in one process."""
+import json
+import unittest
+from tests.stub_server import StubHarnessServer
+from tests.test_cli import _python
+
+BATCH = """# comments and blank lines are skipped
+
+delegate list
+delegate info delegate-00001
+harness-debugger delegate info delegate-00001
+delegate info
+--output ndjson --org default connector list
+"""
+
+class TestBatch(unittest.TestCase):
+    def _batch(self, *options, stdin=BATCH):
+        with StubHarnessServer(delegates=5, connectors=3) as server:
+            env = {"HARNESS_API_KEY": "k", "HARNESS_ACCOUNT_ID": "a", "HARNESS_GATEWAY_URL": server.url}
+            result = _python("-m", "harness_debugger.cli", "--no-cache", *options, "batch", "-",
+                             env=env, input=stdin)
+            return result, server.request_count
+
+    def test_ndjson_records_in_input_order_on_one_client(self):
+        result, requests = self._batch("--output", "ndjson")
+
+        self.assertEqual(result.returncode, 1, result.stderr)
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual([record["index"] for record in records], [1, 2, 3, 4, 5])
+        self.assertEqual([record["exit_code"] for record in records], [0, 0, 0, 2, 0])
+        self.assertEqual(len(records[0]["output"]), 5)
+        self.assertEqual(records[1]["output"], records[2]["output"])
+        self.assertIn("required: delegate_id", records[3]["stderr"])
+        self.assertEqual([connector["id"] for connector in records[4]["output"]], ["connector_00000", "connector_00001"])
+        # The second lookup of delegate-00001 is served by the shared in-memory cache
+        self.assertEqual(requests, 4)
+
+    def test_text_output_is_delimited_per_command(self):
+        result, _ = self._batch(stdin="delegate info delegate-00002\ndelegate list\n")
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        headers = [line for line in result.stdout.splitlines() if line.startswith("==> ")]
+        self.assertEqual(headers, ["==> [1] delegate info delegate-00002 <==", "==> [2] delegate list <=="])
+        first, second = result.stdout.split("==> [2]")
+        self.assertIn("delegate-host-2", first)
+        self.assertIn("Found 5 delegates", second)
+
+    def test_output_of_worker_threads_is_captured_per_command(self):
+        with StubHarnessServer(delegates=5, executions=6) as server:
+            # Delegate lookups now fail, and are reported from the threads fetching the runs
+            server.delegates.clear()
+            env = {"HARNESS_API_KEY": "k", "HARNESS_ACCOUNT_ID": "a", "HARNESS_GATEWAY_URL": server.url}
+            result = _python("-m", "harness_debugger.cli", "--no-cache", "--output", "ndjson", "batch", "-",
+                             env=env, input="delegate list\npipeline check --pipeline pipeline-1 --stage build "
+                                            "--workers 4 --output-file /dev/null\n")
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertNotIn("delegate info", result.stderr)
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual(records[0]["stderr"].count("Error making API request for delegate info"), 0)
+        self.assertEqual(records[1]["stderr"].count("Error making API request for delegate info"), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""Tests for the persistent response cache."""
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from harness_debugger.cache import MemoryCache, ResponseCache
+from harness_debugger.client import HarnessClient
+from tests.stub_server import StubHarnessServer
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite3")
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_key_depends_on_scope_and_params(self):
+        key = ResponseCache.make_key(("acc", "", ""), "GET", "https://x/d", {"a": 1})
+        
+        self.assertEqual(key, ResponseCache.make_key(("acc", "", ""), "get", "https://x/d", {"a": 1}))
+        self.assertNotEqual(key, ResponseCache.make_key(("acc", "org", ""), "GET", "https://x/d", {"a": 1}))
+        self.assertNotEqual(key, ResponseCache.make_key(("acc", "", ""), "GET", "https://x/d", {"a": 2}))
+    
+    def test_entries_expire_after_resource_ttl(self):
+        cache = ResponseCache(self.path, ttls={"delegates": 10})
+        cache.set("k", "delegates", "body")
+        
+        self.assertEqual(cache.get("k"), "body")
+        with patch("harness_debugger.cache.time.time", return_value=time.time() + 11):
+            self.assertIsNone(cache.get("k"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+    
+    def test_uncached_resources_are_not_stored(self):
+        cache = ResponseCache(self.path, ttls={"delegates": 0})
+        cache.set("k", "delegates", "body")
+        cache.set("k2", "executions", "body")
+        
+        self.assertEqual(cache.stats()["entries"], 0)
+    
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResponseCache(self.path, max_bytes=25)
+        cache.set("a", "delegates", "x" * 10)
+        time.sleep(0.01)
+        cache.set("b", "delegates", "x" * 10)
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", "delegates", "x" * 10)
+        
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+    
+    def test_cache_is_shared_between_instances(self):
+        ResponseCache(self.path).set("k", "connectors", "body")
+        
+        self.assertEqual(ResponseCache(self.path).get("k"), "body")
+
+class TestMemoryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite3")
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_reads_through_and_writes_to_the_backing_cache(self):
+        backing = ResponseCache(self.path, ttls={"delegates": 10})
+        backing.set("old", "delegates", "stored")
+        cache = MemoryCache(backing)
+        cache.set("new", "delegates", "fresh")
+        
+        self.assertEqual((cache.get("old"), cache.get("old")), ("stored", "stored"))
+        self.assertEqual(backing.hits, 1)
+        self.assertEqual(ResponseCache(self.path).get("new"), "fresh")
+        with patch("harness_debugger.cache.time.time", return_value=time.time() + 11):
+            self.assertIsNone(cache.get("old"))
+    
+    def test_least_recently_used_entries_are_dropped(self):
+        cache = MemoryCache(max_bytes=25)
+        cache.set("a", "delegates", "x" * 10)
+        cache.set("b", "delegates", "x" * 10)
+        cache.get("a")
+        cache.set("c", "delegates", "x" * 10)
+        cache.set("d", "executions", "x")
+        
+        self.assertEqual([cache.get(key) is not None for key in "abcd"], [True, False, True, False])
+        self.assertEqual(cache.stats()["bytes"], 20)
+
+class TestClientCaching(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.server = StubHarnessServer(delegates=250, connectors=9).start()
+        self.cache = ResponseCache(os.path.join(self.tmpdir.name, "cache.sqlite3"))
+    
+    def tearDown(self):
+        self.server.stop()
+        self.tmpdir.cleanup()
+    
+    def _client(self, **kwargs):
+        return HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                             gateway_url=self.server.url, cache=self.cache, **kwargs)
+    
+    def test_second_listing_is_served_from_cache(self):
+        first = self._client().get_all_delegates()
+        requests_after_first = self.server.request_count
+        second = self._client().get_all_delegates()
+        
+        self.assertEqual(first, second)
+        self.assertEqual(self.server.request_count, requests_after_first)
+        self.assertEqual(self.cache.hits, 3)
+    
+    def test_refresh_bypasses_lookups(self):
+        self._client().get_connectors()
+        self.server.reset_counters()
+        self._client(refresh_cache=True).get_connectors()
+        
+        self.assertEqual(self.server.request_count, 1)
+    
+    def test_concurrent_misses_fetch_once(self):
+        self.server.latency = 0.1
+        client = self._client()
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(client.get_delegate_info, ["delegate-00001"] * 8))
+        
+        self.assertEqual(self.server.request_count, 1)
+        self.assertTrue(all(result == results[0] for result in results))
+    
+    def test_executions_are_not_cached(self):
+        client = self._client()
+        list(client.get_failed_runs("build", "pipeline-1", 1))
+        list(client.get_failed_runs("build", "pipeline-1", 1))
+        
+        self.assertEqual(self.server.request_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Tests for the command-line entry point."""
+import json
+import os
+import subprocess
+import sys
+import unittest
+from harness_debugger.utils.constants import STARTUP_IMPORT_BUDGET_US
+from tests.stub_server import StubHarnessServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported once a command actually needs them
+LAZY_MODULES = [
+    "requests", "tqdm", "tabulate", "dotenv", "colorama", "aiohttp", "sqlite3",
+    "harness_debugger.client", "harness_debugger.commands.delegate",
+    "harness_debugger.commands.connector", "harness_debugger.commands.pipeline",
+]
+
+def _python(*args, env=None, input=None):
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, cwd=REPO_ROOT, input=input,
+                          env=dict(os.environ, PYTHONPATH=REPO_ROOT, **(env or {})))
+
+def import_times(module):
+    """Return {module: cumulative import time in microseconds} from python -X importtime."""
+    result = _python("-X", "importtime", "-c", f"import {module}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_modules_are_not_imported_at_startup(self):
+        imported = import_times("harness_debugger.cli")
+        
+        self.assertIn("harness_debugger.cli", imported)
+        self.assertEqual([m for m in LAZY_MODULES if m in imported], [])
+    
+    def test_import_time_budget(self):
+        # Best of a few runs, to keep the budget meaningful on noisy machines
+        best = min(import_times("harness_debugger.cli")["harness_debugger.cli"] for _ in range(3))
+        
+        self.assertLess(best, STARTUP_IMPORT_BUDGET_US)
+
+class TestOutput(unittest.TestCase):
+    def test_json_output_has_no_banner(self):
+        with StubHarnessServer(delegates=3) as server:
+            result = _python("-m", "harness_debugger.cli", "--no-cache", "--output", "json",
+                             "delegate", "info", "delegate-00001",
+                             env={"HARNESS_API_KEY": "k", "HARNESS_ACCOUNT_ID": "a",
+                                  "HARNESS_GATEWAY_URL": server.url})
+        
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout)["id"], "delegate-00001")
+
+if __name__ == '__main__':
+    unittest.main()
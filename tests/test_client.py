@@ -1,30 +1,41 @@
 """Tests for the Harness API client."""
+import json
 import unittest
 from unittest.mock import patch, MagicMock
+import requests
 from harness_debugger.client import HarnessClient
+from tests.stub_server import StubHarnessServer
+
+def _response(status_code=200, payload=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload or {}
+    response.text = json.dumps(payload or {})
+    response.content = response.text.encode()
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+    return response
 
 class TestHarnessClient(unittest.TestCase):
     def setUp(self):
         # Set up test environment
         self.client = HarnessClient(
             api_key="test_api_key",
-            account_id="test_account_id"
+            account_id="test_account_id",
+            backoff_factor=0
         )
     
-    @patch('harness_debugger.client.requests.get')
-    def test_get_delegate_info(self, mock_get):
+    @patch('harness_debugger.client.requests.Session.request')
+    def test_get_delegate_info(self, mock_request):
         # Mock the API response
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_request.return_value = _response(payload={
             "status": "SUCCESS",
             "data": {
                 "uuid": "test-delegate-id",
                 "name": "test-delegate",
                 # Add other fields as needed
             }
-        }
-        mock_response.raise_for_status = MagicMock()
-        mock_get.return_value = mock_response
+        })
         
         # Call the method
         result = self.client.get_delegate_info("test-delegate-id")
@@ -32,8 +43,116 @@ class TestHarnessClient(unittest.TestCase):
         # Assert the result
         self.assertEqual(result.get("id"), "test-delegate-id")
         self.assertEqual(result.get("name"), "test-delegate")
+    
+    def test_session_is_pooled(self):
+        adapter = self.client.session.get_adapter("https://app.harness.io")
+        self.assertIs(adapter, self.client.session.get_adapter("https://app.harness.io/gateway/ng/api"))
+        self.assertEqual(self.client.session.headers["x-api-key"], "test_api_key")
+    
+    @patch('harness_debugger.client.requests.Session.request')
+    def test_idempotent_call_retries_on_5xx(self, mock_request):
+        mock_request.side_effect = [_response(503), _response(200, {"status": "SUCCESS"})]
+        
+        response = self.client._request("GET", "https://example.invalid/x")
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_request.call_count, 2)
+    
+    @patch('harness_debugger.client.requests.Session.request')
+    def test_idempotent_call_retries_dropped_connection(self, mock_request):
+        mock_request.side_effect = [requests.exceptions.ConnectionError(), _response(200)]
+        
+        self.client._request("GET", "https://example.invalid/x")
+        
+        self.assertEqual(mock_request.call_count, 2)
+    
+    @patch('harness_debugger.client.requests.Session.request')
+    def test_non_idempotent_call_is_not_retried(self, mock_request):
+        mock_request.return_value = _response(503)
+        
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.client._request("POST", "https://example.invalid/x")
+        
+        self.assertEqual(mock_request.call_count, 1)
+    
+    @patch('harness_debugger.client.requests.Session.request')
+    def test_retries_are_bounded(self, mock_request):
+        mock_request.return_value = _response(502)
+        
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.client._request("POST", "https://example.invalid/x", idempotent=True)
+        
+        self.assertEqual(mock_request.call_count, self.client.max_retries + 1)
+
+class TestDelegatePagination(unittest.TestCase):
+    def setUp(self):
+        self.server = StubHarnessServer(delegates=5050, latency=0.01).start()
+        self.client = HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                    gateway_url=self.server.url)
+    
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+    
+    def test_iter_delegates_returns_every_page_in_order(self):
+        ids = [delegate["id"] for delegate in self.client.iter_delegates(page_size=100)]
+        
+        self.assertEqual(ids, [delegate["uuid"] for delegate in self.server.delegates])
+        self.assertEqual(self.server.request_count, 51)
+    
+    def test_remaining_pages_are_fetched_concurrently(self):
+        list(self.client.iter_delegates(page_size=100, max_workers=4))
+        
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 4)
+    
+    def test_get_all_delegates_is_not_truncated(self):
+        delegates = self.client.get_all_delegates()
+        
+        self.assertEqual(len(delegates), 5050)
+        self.assertEqual(list(delegates)[-1], "delegate-05049")
+
+    def test_large_pages_are_decoded_as_they_download(self):
+        buffered = list(self.client.iter_delegates(page_size=500))
+        events = []
+        with patch("harness_debugger.client.DEFAULT_STREAM_DECODE_BYTES", 1024):
+            client = HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                   gateway_url=self.server.url, on_request=events.append)
+            with client:
+                streamed = list(client.iter_delegates(page_size=500))
+
+        self.assertEqual(streamed, buffered)
+        self.assertTrue(all(event.bytes > 1024 for event in events))
+
+class TestFailedRuns(unittest.TestCase):
+    def setUp(self):
+        self.server = StubHarnessServer(delegates=20, executions=600).start()
+        self.client = HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                    gateway_url=self.server.url)
+    
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+    
+    def test_failed_runs_are_streamed_newest_first(self):
+        runs = list(self.client.get_failed_runs("build", "pipeline-1", days=1, page_size=10))
+        
+        self.assertEqual(len(runs), 200)
+        self.assertEqual([r["execution_id"] for r in runs[:2]], ["exec-00000", "exec-00003"])
+        self.assertEqual(runs[0]["delegates"][2]["step_status"], "FAILED")
+        self.assertEqual(runs[0]["delegates"][2]["duration_ms"], 15000)
+    
+    def test_first_run_is_yielded_before_the_window_is_scanned(self):
+        runs = self.client.get_failed_runs("build", "pipeline-1", days=1, page_size=10, max_workers=2)
+        first = next(runs)
+        requests_for_first = self.server.request_count
+        runs.close()
         
-    # Add more tests for other methods
+        self.assertEqual(first["execution_id"], "exec-00000")
+        self.assertLess(requests_for_first, 60)
+    
+    def test_other_stages_are_ignored(self):
+        self.assertEqual(list(self.client.get_failed_runs("deploy", "pipeline-1", days=1)), [])
 
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    unittest.main()
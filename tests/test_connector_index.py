@@ -0,0 +1,50 @@
+"""Tests for the selector-to-connector index."""
+import unittest
+from harness_debugger.client import HarnessClient
+from harness_debugger.connector_index import ConnectorIndex
+from tests.stub_server import StubHarnessServer
+
+def _connector(identifier, *selectors):
+    return {"id": identifier, "delegateSelectors": list(selectors)}
+
+class TestConnectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ConnectorIndex([
+            _connector("a", "pool-1", "shared"),
+            _connector("b", "pool-2"),
+            _connector("c", "pool-1", "pool-2", "pool-1"),
+            _connector("d"),
+        ])
+    
+    def test_match_any(self):
+        self.assertEqual([c["id"] for c in self.index.match(["pool-2", "shared"])], ["a", "b", "c"])
+    
+    def test_match_all(self):
+        self.assertEqual([c["id"] for c in self.index.match(["pool-1", "pool-2"], match_all=True)], ["c"])
+        self.assertEqual(self.index.match(["pool-1", "unknown"], match_all=True), [])
+    
+    def test_counts_and_selectors(self):
+        self.assertEqual(self.index.count("pool-1"), 2)
+        self.assertEqual(self.index.count("unknown"), 0)
+        self.assertEqual(self.index.selectors, ["pool-1", "pool-2", "shared"])
+
+class TestConnectorSweep(unittest.TestCase):
+    def test_sweep_covers_every_scope_once(self):
+        with StubHarnessServer(delegates=0, connectors=30) as server:
+            with HarnessClient(api_key="test_api_key", account_id="test_account_id", org_id="default",
+                               project_id="project", gateway_url=server.url) as client:
+                self.assertEqual(len(client.get_connectors()), 30)
+                requests_for_sweep = server.request_count
+                
+                matches = client.find_connectors(["pool-0", "pool-1"])
+                single = client.get_connectors("pool-3")
+                
+                self.assertEqual(server.request_count, requests_for_sweep)
+        
+        self.assertEqual(requests_for_sweep, 3)
+        self.assertEqual(len(matches), 12)
+        self.assertEqual({c["orgIdentifier"] for c in matches}, {None, "default"})
+        self.assertTrue(all("pool-3" in c["delegateSelectors"] for c in single))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Tests for delegate snapshots and delegate list --changed-since."""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+from harness_debugger.cache import ResponseCache
+from harness_debugger.client import HarnessClient
+from harness_debugger.commands.delegate import list_delegates
+from harness_debugger.delegate_snapshots import DelegateSnapshot, SnapshotStore, diff_snapshots, parse_duration
+from harness_debugger.records import DelegateRecord
+from tests.stub_server import StubHarnessServer, make_delegate
+
+def records(raw_delegates):
+    return [DelegateRecord.from_api(delegate) for delegate in raw_delegates]
+
+class TestSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore("acct/1", directory=self.directory.name, keep=3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_diff(self):
+        now_ms = int(time.time() * 1000)
+        raw = [make_delegate(i) for i in range(5)]
+        for delegate in raw:
+            delegate["lastHeartbeat"] = now_ms - 1000
+        old = DelegateSnapshot.of(records(raw), now_ms - 60000)
+
+        raw[0]["version"] = "2.0.0"
+        raw[1]["selectors"] = list(reversed(raw[1]["selectors"]))
+        raw[2]["lastHeartbeat"] = now_ms - 400 * 1000
+        raw[3]["lastHeartbeat"] = now_ms
+        del raw[4]
+        raw.append(make_delegate(9))
+        raw[-1]["lastHeartbeat"] = now_ms
+        changes = diff_snapshots(old, DelegateSnapshot.of(records(raw), now_ms), stale_after_s=300)
+
+        self.assertEqual([(change["change"], change["id"]) for change in changes],
+                         [("changed", "delegate-00000"), ("stale", "delegate-00002"),
+                          ("added", "delegate-00009"), ("removed", "delegate-00004")])
+        self.assertEqual(changes[0]["fields"], {"version": ["1.0.8000", "2.0.0"]})
+        self.assertEqual(changes[1]["fields"], {"heartbeat": [now_ms - 1000, now_ms - 400 * 1000]})
+        self.assertEqual(changes[3]["delegate"].name, "delegate-00004")
+
+    def test_store_resolves_last_durations_names_and_paths(self):
+        now_ms = int(time.time() * 1000)
+        raw = [make_delegate(0)]
+        paths = [self.store.save(DelegateSnapshot.of(records(raw), now_ms - minutes * 60000))
+                 for minutes in (40, 20, 10, 5)]
+
+        self.assertEqual(len(self.store.paths()), 3)
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertEqual(self.store.resolve("last", now_ms).path, paths[3])
+        self.assertEqual(self.store.resolve("15m", now_ms).path, paths[1])
+        # Nothing is old enough: the oldest snapshot kept is used
+        self.assertEqual(self.store.resolve("1h", now_ms).path, paths[1])
+        loaded = self.store.resolve(os.path.basename(paths[2])[:-len(".json")])
+        self.assertEqual(loaded.taken_at_ms, now_ms - 10 * 60000)
+        self.assertEqual(loaded.delegates["delegate-00000"][1], records(raw)[0])
+        self.assertEqual(self.store.resolve(paths[2]).path, paths[2])
+        with self.assertRaises(ValueError):
+            self.store.resolve("yesterday")
+        self.assertIsNone(SnapshotStore("other", directory=self.directory.name).resolve("last"))
+        self.assertEqual(parse_duration("90s"), 90)
+        self.assertEqual(parse_duration("1.5h"), 5400)
+
+class TestChangedSince(unittest.TestCase):
+    def setUp(self):
+        self.server = StubHarnessServer(delegates=250).start()
+        self.client = HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                    gateway_url=self.server.url)
+        self.directory = tempfile.TemporaryDirectory()
+        self.environ = patch.dict(os.environ, {"HARNESS_DEBUGGER_CACHE_DIR": self.directory.name})
+        self.environ.start()
+        self.args = argparse.Namespace(changed_since="last", snapshot=False, stale_after=300,
+                                       output="json", timestamps="epoch", table_sample=0)
+
+    def tearDown(self):
+        self.environ.stop()
+        self.client.close()
+        self.server.stop()
+        self.directory.cleanup()
+
+    def _list(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+            self.assertEqual(list_delegates(self.args, self.client), 0)
+        return stdout.getvalue()
+
+    def test_only_changed_delegates_are_looked_up(self):
+        self.assertIn("saved this listing as the baseline", self._list())
+
+        self.server.delegates[10]["version"] = "2.0.0"
+        del self.server.delegates[20]
+        self.server.reset_counters()
+        result = json.loads(self._list())
+
+        self.assertEqual([(change["change"], change["id"]) for change in result["changes"]],
+                         [("removed", "delegate-00020"), ("changed", "delegate-00010")])
+        self.assertEqual(result["changes"][1]["delegate"]["version"], "2.0.0")
+        self.assertEqual(result["delegates"], 249)
+        # Three listing pages and one lookup, for the one delegate still there
+        self.assertEqual(self.server.request_count, 4)
+
+        self.server.reset_counters()
+        self.assertEqual(json.loads(self._list())["changes"], [])
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_cached_responses_are_not_compared(self):
+        # Polls within the cache TTL must still see the live listing and details
+        self.client.cache = ResponseCache(os.path.join(self.directory.name, "responses.sqlite3"))
+        try:
+            self._list()
+            self.server.delegates[10]["version"] = "2.0.0"
+            result = json.loads(self._list())
+        finally:
+            self.client.cache.close()
+
+        self.assertEqual([(change["change"], change["id"]) for change in result["changes"]],
+                         [("changed", "delegate-00010")])
+        self.assertEqual(result["changes"][0]["delegate"]["version"], "2.0.0")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Tests for fleet-wide failure scans."""
+import unittest
+from collections import Counter
+from harness_debugger.client import HarnessClient
+from harness_debugger.fleet import expand_names, fleet_targets, scan_fleet
+from tests.stub_server import StubHarnessServer
+
+class TestExpandNames(unittest.TestCase):
+    def test_plain_names_skip_discovery(self):
+        def discover():
+            raise AssertionError("discovery should not run")
+
+        self.assertEqual(expand_names(["a", "b", "a"], discover), ["a", "b"])
+
+    def test_globs_match_discovered_names(self):
+        names = expand_names(["deploy-*", "build"], lambda: ["deploy-1", "test-1", "deploy-2", "build"])
+
+        self.assertEqual(names, ["build", "deploy-1", "deploy-2"])
+
+class TestFleetScan(unittest.TestCase):
+    def setUp(self):
+        self.server = StubHarnessServer(delegates=20, executions=60, pipelines=2, projects=2).start()
+        self.client = HarnessClient(api_key="test_api_key", account_id="test_account_id", org_id="org",
+                                    gateway_url=self.server.url)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_targets_are_discovered_from_globs(self):
+        targets = fleet_targets(self.client, ["*"], ["pipeline-*"], ["build"])
+
+        self.assertEqual(targets, [
+            ("project-1", "pipeline-1", "build"), ("project-1", "pipeline-2", "build"),
+            ("project-2", "pipeline-1", "build"), ("project-2", "pipeline-2", "build"),
+        ])
+
+    def test_report_aggregates_every_target(self):
+        targets = fleet_targets(self.client, ["project-1", "project-2"], ["*"], ["bu*"])
+        report = scan_fleet(self.client, targets, days=1, max_workers=4)
+
+        expected = Counter(
+            (summary["projectIdentifier"], summary["pipelineIdentifier"])
+            for summary, _ in self.server.executions if summary["status"] == "Failed"
+        )
+        self.assertEqual(report.by_pipeline, expected)
+        self.assertEqual(report.failed_runs, 20)
+        self.assertEqual(report.by_stage, {"build": 20})
+        self.assertEqual(sum(report.delegate_steps.values()), 20)
+        self.assertEqual(report.errors, {})
+
+        # One shared client: each delegate is looked up at most once for the whole fleet
+        self.assertLessEqual(self.client.delegate_resolver.stats()["misses"], len(self.server.delegates))
+
+    def test_scoped_clients_share_the_connection_pool(self):
+        scoped = self.client.with_scope(project_id="project-2")
+
+        self.assertIs(scoped.session, self.client.session)
+        self.assertIs(scoped.scheduler, self.client.scheduler)
+        self.assertEqual(scoped.project_id, "project-2")
+        self.assertNotEqual(self.client.project_id, "project-2")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+"""Tests for output formatting helpers."""
+import io
+import json
+import unittest
+from harness_debugger.utils.formatting import write_ndjson
+
+class _RecordingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.flushed = []
+    
+    def flush(self):
+        self.flushed.append(self.getvalue())
+
+class TestWriteNdjson(unittest.TestCase):
+    def test_each_record_is_flushed_as_it_is_produced(self):
+        stream = _RecordingStream()
+        produced = []
+        
+        def records():
+            for i in range(3):
+                produced.append(i)
+                # Everything produced so far has already been written and flushed
+                self.assertEqual(len(stream.flushed), i)
+                yield {"id": i, "labels": ["a"]}
+        
+        count = write_ndjson(records(), stream)
+        
+        self.assertEqual(count, 3)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [0, 1, 2])
+        self.assertEqual(lines[0], '{"id":0,"labels":["a"]}')
+
+if __name__ == '__main__':
+    unittest.main()
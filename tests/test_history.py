@@ -0,0 +1,135 @@
+"""Tests for the local execution-history store and the history commands."""
+import json
+import os
+import tempfile
+import time
+import unittest
+from harness_debugger.history import HistoryStore
+from harness_debugger.records import DelegateRecord
+from tests.stub_server import StubHarnessServer
+from tests.test_cli import _python
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+def make_run(index, days_ago=0, pipeline_id="build-app", stage="build", delegates=("d1", "d2")):
+    start_ts = int(time.time() * 1000) - days_ago * DAY_MS - index
+    return {
+        "execution_id": f"exec-{index}",
+        "pipeline_id": pipeline_id,
+        "stage": stage,
+        "start_ts": start_ts,
+        "start_time": "2024-01-01 00:00:00",
+        "status": "FAILED",
+        "failure_message": f"failure {index % 2}",
+        "delegates": [
+            {"step_name": f"step-{position}", "step_id": f"step-{position}",
+             "step_status": "FAILED" if position == len(delegates) - 1 else "SUCCESS",
+             "error_message": "boom", "duration_ms": 1000,
+             "delegate_info": DelegateRecord(delegate_id, name=f"{delegate_id}-name", version="1.0",
+                                             labels=[f"pool-{delegate_id}", "shared"])}
+            for position, delegate_id in enumerate(delegates)
+        ]
+    }
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "history.sqlite3")
+        self.store = HistoryStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_filters_use_runs_steps_and_labels(self):
+        self.store.add_runs([make_run(1), make_run(2, days_ago=10, delegates=("d3",)),
+                             make_run(3, pipeline_id="deploy", stage="prod", delegates=("d2", "d3"))], ("acct", "org", "p"))
+
+        ids = lambda **filters: [run["execution_id"] for run in self.store.query_runs(**filters)]
+        self.assertEqual(ids(), ["exec-1", "exec-3", "exec-2"])
+        self.assertEqual(ids(pipeline="build-*"), ["exec-1", "exec-2"])
+        self.assertEqual(ids(delegate="d3"), ["exec-3", "exec-2"])
+        self.assertEqual(ids(delegate="d1-name"), ["exec-1"])
+        self.assertEqual(ids(label="pool-d3", since_ms=int(time.time() * 1000) - DAY_MS), ["exec-3"])
+        self.assertEqual(ids(stage="prod", project="p"), ["exec-3"])
+        self.assertEqual(ids(project="other"), [])
+        self.assertEqual(ids(limit=1), ["exec-1"])
+        # Full records come back as they were stored
+        self.assertEqual(self.store.query_runs(limit=1)[0]["delegates"][0]["delegate_info"]["labels"],
+                         ["pool-d1", "shared"])
+
+    def test_aggregates(self):
+        self.store.add_runs([make_run(1), make_run(2, delegates=("d3",)), make_run(3, delegates=("d2", "d3"))],
+                            ("acct", None, None))
+
+        delegates = self.store.aggregate("delegate")
+        self.assertEqual([(row["delegate_id"], row["failed_runs"], row["failed_steps"]) for row in delegates],
+                         [("d2", 2, 1), ("d3", 2, 2), ("d1", 1, 0)])
+        self.assertEqual(delegates[0]["delegate"], "d2-name")
+        self.assertEqual([(row["label"], row["failed_runs"]) for row in self.store.aggregate("label", limit=1)],
+                         [("shared", 3)])
+        self.assertEqual([(row["message"], row["failed_runs"]) for row in self.store.aggregate("message")],
+                         [("failure 1", 2), ("failure 0", 1)])
+        self.assertEqual(self.store.aggregate("pipeline", delegate="d1")[0]["failed_runs"], 1)
+
+    def test_fetching_a_run_again_replaces_it(self):
+        self.store.add_runs([make_run(1)], ("acct", "org", "p"))
+        run = make_run(1, delegates=("d9",))
+        self.store.add_runs([run], ("acct", "org", "p"))
+
+        self.assertEqual(self.store.stats()["runs"], 1)
+        self.assertEqual(self.store.stats()["steps"], 1)
+        self.assertEqual(self.store.query_runs(delegate="d1"), [])
+
+    def test_retention_cap_and_compaction(self):
+        self.store.retention_days, self.store.max_runs, self.store.compact_after_days = 30, 3, 5
+        self.store.add_runs([make_run(1), make_run(2, days_ago=6), make_run(3, days_ago=7),
+                             make_run(4, days_ago=8), make_run(5, days_ago=40)], ("acct", "org", "p"))
+
+        self.assertEqual(self.store.maintain(), dict(expired=1, trimmed=1, compacted=2, bytes=self.store.size()))
+        runs = self.store.query_runs()
+        self.assertEqual([run["execution_id"] for run in runs], ["exec-1", "exec-2", "exec-3"])
+        self.assertNotIn("compacted", runs[0])
+        # Compacted runs are rebuilt from the indexed fields
+        compacted = runs[1]
+        self.assertTrue(compacted["compacted"])
+        self.assertEqual([step["delegate_info"]["id"] for step in compacted["delegates"]], ["d1", "d2"])
+        self.assertEqual(compacted["delegates"][1]["delegate_info"]["labels"], ["pool-d2", "shared"])
+        self.assertEqual(compacted["delegates"][1]["step_status"], "FAILED")
+        self.assertEqual(self.store.query_runs(label="pool-d1", delegate="d2")[1]["execution_id"], "exec-2")
+
+    def test_record_runs_writes_in_batches_as_runs_stream(self):
+        runs = self.store.record_runs(iter([make_run(1), make_run(2)]), ("acct", "org", "p"), batch_size=1)
+        self.assertEqual(next(runs)["execution_id"], "exec-1")
+        self.assertEqual(next(runs)["execution_id"], "exec-2")
+        self.assertEqual(self.store.stats()["runs"], 1)
+        self.assertEqual(list(runs), [])
+        self.assertEqual(self.store.stats()["runs"], 2)
+
+class TestHistoryCommands(unittest.TestCase):
+    def test_pipeline_check_records_and_history_queries_offline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            env = {"HARNESS_API_KEY": "k", "HARNESS_ACCOUNT_ID": "a", "HARNESS_DEBUGGER_CACHE_DIR": directory}
+            with StubHarnessServer(delegates=5, executions=9) as server:
+                env["HARNESS_GATEWAY_URL"] = server.url
+                checked = _python("-m", "harness_debugger.cli", "--history", "--output", "ndjson", "--project",
+                                  "project-1", "pipeline", "check", "--pipeline", "pipeline-1", "--stage", "build",
+                                  env=env)
+            self.assertEqual(checked.returncode, 0, checked.stderr)
+
+            # The server is gone: history queries never touch the API
+            env["HARNESS_GATEWAY_URL"] = "http://127.0.0.1:9"
+            query = lambda *args: _python("-m", "harness_debugger.cli", "--output", "json", "history", "query", *args,
+                                          env=env)
+            listed = query()
+            grouped = query("--group-by", "pipeline")
+
+        fetched = [json.loads(line) for line in checked.stdout.splitlines()]
+        self.assertEqual(listed.returncode, 0, listed.stderr)
+        self.assertEqual([run["execution_id"] for run in json.loads(listed.stdout)],
+                         [run["execution_id"] for run in fetched])
+        self.assertEqual(json.loads(grouped.stdout)[0]["project"], "project-1")
+        self.assertEqual(json.loads(grouped.stdout)[0]["failed_runs"], len(fetched))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Tests for the JSON backend and incremental page decoding."""
+import json
+import unittest
+from datetime import datetime
+from harness_debugger.utils import jsonlib
+from tests.test_cli import _python
+
+PAGE = {
+    "status": "SUCCESS",
+    "data": {
+        "totalPages": 3,
+        "content": [{"uuid": f"d-{i}", "name": "délégué ✓", "size": 12345678901234567890 + i, "ratio": 1.5e-3}
+                    for i in range(20)] + [[], {}, 0],
+        "pageIndex": 0,
+    },
+    "metaData": None,
+}
+
+def chunked(body, size):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+class TestReadPage(unittest.TestCase):
+    def test_any_split_of_the_body_decodes_like_json_loads(self):
+        body = json.dumps(PAGE, ensure_ascii=False, indent=1).encode()
+        for size in (1, 2, 3, 7, 64, len(body)):
+            with self.subTest(size=size):
+                self.assertEqual(jsonlib.read_page(chunked(body, size), lambda item: item), PAGE)
+        self.assertEqual(jsonlib.read_page(body.decode(), lambda item: item), PAGE)
+
+    def test_items_are_converted_and_dropped(self):
+        body = json.dumps(PAGE).encode()
+        page = jsonlib.read_page(chunked(body, 5), lambda item: item["uuid"] if item and "uuid" in item else None)
+
+        self.assertEqual(page["data"]["content"], [f"d-{i}" for i in range(20)])
+        self.assertEqual(page["data"]["pageIndex"], 0)
+        self.assertEqual(page["metaData"], None)
+        self.assertEqual(jsonlib.read_page(b'{"data": {"content": [1, null, 2]}}', lambda item: item),
+                         {"data": {"content": [1, 2]}})
+
+    def test_other_shapes_are_decoded_whole(self):
+        convert = lambda item: self.fail("no item array at the path")
+        self.assertEqual(jsonlib.read_page(b'{"data": null}', convert), {"data": None})
+        self.assertEqual(jsonlib.read_page(b'{"data": {"content": 7}}', convert), {"data": {"content": 7}})
+        self.assertEqual(jsonlib.read_page(b'[1, 2]', convert), [1, 2])
+        self.assertEqual(jsonlib.read_page([b"12", b"34"], convert), 1234)
+
+    def test_decode_page_matches_read_page(self):
+        uuid = lambda item: item["uuid"] if item and "uuid" in item else None
+        same = lambda item: item
+        for body, convert in ((json.dumps(PAGE).encode(), uuid), (b'{"data": null}', same),
+                              (b'{"data": {"content": [1, null]}}', same), (b'[1, 2]', same)):
+            with self.subTest(body=body[:20]):
+                self.assertEqual(jsonlib.decode_page(body, convert), jsonlib.read_page(body, convert))
+
+    def test_invalid_bodies_raise(self):
+        for body in (b"", b'{"data": {"content": [1, 2}}', b'{"data": 1} x', b"{data: 1}", b'{"a": 1,}'):
+            with self.subTest(body=body), self.assertRaises(json.JSONDecodeError):
+                jsonlib.read_page(chunked(body, 3), lambda item: item)
+
+class TestBackend(unittest.TestCase):
+    def test_dumps_matches_the_standard_library(self):
+        value = {"b": [1, 2.5, None, True], "a": "x/ü", "big": 2 ** 70}
+
+        self.assertEqual(json.loads(jsonlib.dumps(value)), value)
+        self.assertNotIn(" ", jsonlib.dumps(value))
+        self.assertEqual(jsonlib.dumps({"a": [1]}, indent=2), json.dumps({"a": [1]}, indent=2))
+        self.assertEqual(jsonlib.loads(jsonlib.dumps(value).encode()), value)
+
+    def test_default_handles_unknown_types(self):
+        self.assertEqual(jsonlib.dumps({"at": datetime(2024, 1, 2)}, default=str), '{"at":"2024-01-02 00:00:00"}')
+
+    def test_backend_can_be_forced_to_the_standard_library(self):
+        result = _python("-c", "from harness_debugger.utils import jsonlib; print(jsonlib.backend())",
+                         env={"HARNESS_DEBUGGER_JSON": "json"})
+
+        self.assertEqual(result.stdout.strip(), "json", result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
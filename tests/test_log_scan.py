@@ -0,0 +1,97 @@
+"""Tests for streaming step log scanning."""
+import unittest
+from harness_debugger.async_client import AsyncHarnessClient, BlockingAsyncClient, aiohttp
+from harness_debugger.client import HarnessClient
+from harness_debugger.log_scan import LineSplitter, LogScanner, attach_step_logs, log_text, split_lines
+from tests.stub_server import StubHarnessServer, make_log_line
+
+class TestLineSplitting(unittest.TestCase):
+    def test_lines_split_across_chunks(self):
+        chunks = [b"first li", b"ne\nsec", b"ond\r\n\nthi", b"rd"]
+
+        self.assertEqual(list(split_lines(chunks)), ["first line", "second", "", "third"])
+
+    def test_overlong_lines_are_cut(self):
+        splitter = LineSplitter(max_line_length=5)
+
+        lines = splitter.feed(b"abc") + splitter.feed(b"defghij\nxy") + splitter.feed(b"z\n")
+
+        self.assertEqual(lines, ["abcde", "xyz"])
+        self.assertEqual(splitter.close(), [])
+
+    def test_blob_lines_are_decoded_and_uncolored(self):
+        lines = [make_log_line(0, "\x1b[31mERROR\x1b[0m: boom"), make_log_line(1, "a\nb"), "plain", '{"out": "cut']
+
+        self.assertEqual(list(log_text(lines)), ["ERROR: boom", "a", "b", "plain", '{"out": "cut'])
+
+class TestLogScanner(unittest.TestCase):
+    def test_matches_are_kept_with_context_and_touching_excerpts_merge(self):
+        lines = [f"line {i}" for i in range(1, 21)]
+        lines[4] = "ERROR one"      # line 5
+        lines[8] = "ERROR two"      # line 9: its context touches the first excerpt
+        lines[17] = "ERROR three"   # line 18
+
+        result = LogScanner(context=2).scan(lines)
+
+        self.assertEqual((result["lines_scanned"], result["matches"], result["truncated"]), (20, 3, False))
+        first, second = result["excerpts"]
+        self.assertEqual((first["first_line"], first["matches"]), (3, [5, 9]))
+        self.assertEqual(first["lines"], lines[2:11])
+        self.assertEqual((second["first_line"], second["lines"]), (16, lines[15:20]))
+
+    def test_only_the_last_excerpts_are_kept(self):
+        lines = ["ok"] * 10 + ["FATAL a"] + ["ok"] * 10 + ["FATAL b"] + ["ok"] * 10 + ["custom marker"]
+
+        result = LogScanner(["FATAL", "custom"], context=1, max_excerpts=2).scan(iter(lines))
+
+        self.assertTrue(result["truncated"])
+        self.assertEqual([excerpt["lines"][1] for excerpt in result["excerpts"]], ["FATAL b", "custom marker"])
+
+class TestAttachStepLogs(unittest.TestCase):
+    def _check(self, client):
+        runs = list(attach_step_logs(client, client.get_failed_runs("build", "pipeline-1", days=1),
+                                     LogScanner(context=1), max_workers=2))
+
+        failed_steps = 0
+        for run in runs:
+            for step in run["delegates"]:
+                if step["step_status"] != "FAILED":
+                    self.assertNotIn("log", step)
+                    continue
+                failed_steps += 1
+                log = step["log"]
+                self.assertEqual(log["lines_scanned"], 56)
+                lines = [line for excerpt in log["excerpts"] for line in excerpt["lines"]]
+                self.assertIn("AssertionError: expected 200, got 500", lines)
+                self.assertIn("ERROR: 1 test failed", lines)
+        self.assertGreater(failed_steps, 0)
+
+    def test_failed_steps_get_their_log_excerpts(self):
+        with StubHarnessServer(executions=6, log_lines=50) as server:
+            client = HarnessClient(api_key="test_api_key", account_id="test_account_id", gateway_url=server.url)
+            try:
+                self._check(client)
+            finally:
+                client.close()
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_failed_steps_get_their_log_excerpts_async(self):
+        with StubHarnessServer(executions=6, log_lines=50) as server:
+            with BlockingAsyncClient(AsyncHarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                                        gateway_url=server.url)) as client:
+                self._check(client)
+
+    def test_download_errors_are_recorded_on_the_step(self):
+        class Failing:
+            def iter_step_log(self, log_key):
+                raise RuntimeError(f"no log {log_key}")
+
+        run = {"delegates": [{"step_status": "FAILED", "log_key": "k"}, {"step_status": "FAILED", "log_key": None}]}
+
+        [result] = attach_step_logs(Failing(), [run], LogScanner())
+
+        self.assertEqual(result["delegates"][0]["log"], {"error": "no log k"})
+        self.assertNotIn("log", result["delegates"][1])
+
+if __name__ == '__main__':
+    unittest.main()
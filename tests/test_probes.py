@@ -0,0 +1,151 @@
+"""Tests for connectivity probes, against local listeners."""
+import asyncio
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from harness_debugger.client import HarnessClient
+from harness_debugger.probes import connectivity_commands, probe, run_probes
+from tests.stub_server import StubHarnessServer
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    delay = 0.3
+
+    def do_HEAD(self):
+        time.sleep(self.delay)
+        self.send_response(404 if self.path == "/missing" else 200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class TestProbes(unittest.TestCase):
+    def setUp(self):
+        self.http = _serve(_Server(("127.0.0.1", 0), _SlowHandler))
+        # Accepts connections (the kernel completes the handshake) but never answers
+        self.silent = socket.socket()
+        self.silent.bind(("127.0.0.1", 0))
+        self.silent.listen(64)
+
+    def tearDown(self):
+        self.http.shutdown()
+        self.http.server_close()
+        self.silent.close()
+
+    def test_phases_are_timed_and_http_status_is_reported(self):
+        port = self.http.server_address[1]
+
+        ok, missing = run_probes([f"http://localhost:{port}/", f"http://127.0.0.1:{port}/missing"])
+
+        self.assertTrue(ok["ok"])
+        self.assertEqual((ok["status"], missing["status"]), (200, 404))
+        self.assertEqual(ok["address"], "127.0.0.1")
+        self.assertIsNone(ok["tls_ms"])
+        for phase in ("dns_ms", "connect_ms", "http_ms"):
+            self.assertGreaterEqual(ok[phase], 0)
+        self.assertGreaterEqual(ok["http_ms"], 300)
+
+    def test_probes_run_concurrently(self):
+        port = self.http.server_address[1]
+
+        started = time.perf_counter()
+        results = run_probes([f"http://127.0.0.1:{port}/{i}" for i in range(50)])
+        elapsed = time.perf_counter() - started
+
+        self.assertTrue(all(result["ok"] for result in results))
+        self.assertEqual([result["url"] for result in results], [f"http://127.0.0.1:{port}/{i}" for i in range(50)])
+        # Sequentially this would take 50 * 0.3s
+        self.assertLess(elapsed, 2)
+
+    def test_failures_report_the_phase(self):
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+        silent_port = self.silent.getsockname()[1]
+
+        refused, no_tls, no_http, bad_name = run_probes(
+            [f"http://127.0.0.1:{closed_port}", f"https://127.0.0.1:{silent_port}",
+             f"http://127.0.0.1:{silent_port}", "https://name.invalid"], timeout=0.5)
+
+        self.assertEqual(refused["failed_phase"], "connect")
+        self.assertEqual((no_tls["failed_phase"], no_tls["error"]), ("tls", "timed out after 0.5s"))
+        self.assertEqual(no_http["failed_phase"], "http")
+        self.assertIsNotNone(no_http["connect_ms"])
+        self.assertEqual(bad_name["failed_phase"], "dns")
+        self.assertFalse(any(result["ok"] for result in (refused, no_tls, no_http, bad_name)))
+
+    def test_timeout_covers_every_address_of_a_host(self):
+        silent = ("127.0.0.1", self.silent.getsockname()[1])
+        addresses = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", silent)] * 2
+
+        async def probe_hanging_host():
+            async def never_connects(sock, address):
+                await asyncio.sleep(3600)
+            asyncio.get_running_loop().sock_connect = never_connects
+            return await probe("http://dual-stack.test/", timeout=0.5)
+
+        with patch("harness_debugger.probes.socket.getaddrinfo", return_value=addresses):
+            result = asyncio.run(probe_hanging_host())
+
+        self.assertEqual((result["failed_phase"], result["error"]), ("connect", "timed out after 0.5s"))
+        self.assertLess(result["total_ms"], 750)
+
+    @unittest.skipIf(shutil.which("openssl") is None, "openssl is not installed")
+    def test_tls_handshake_is_timed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+            subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+                            "-keyout", key, "-out", cert], check=True, capture_output=True)
+            server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            server_context.load_cert_chain(cert, key)
+            https = _Server(("127.0.0.1", 0), _SlowHandler)
+            https.socket = server_context.wrap_socket(https.socket, server_side=True)
+            _serve(https)
+            try:
+                url = f"https://localhost:{https.server_address[1]}/"
+                [trusted] = run_probes([url], ssl_context=ssl.create_default_context(cafile=cert))
+                [untrusted] = run_probes([url])
+            finally:
+                https.shutdown()
+                https.server_close()
+
+        self.assertEqual(trusted["status"], 200)
+        self.assertGreater(trusted["tls_ms"], 0)
+        self.assertEqual(untrusted["failed_phase"], "tls")
+        self.assertIn("CERTIFICATE_VERIFY_FAILED", untrusted["error"])
+
+class TestConnectivityCommands(unittest.TestCase):
+    def test_commands_for_a_delegate(self):
+        with StubHarnessServer(delegates=3) as server:
+            client = HarnessClient(api_key="test_api_key", account_id="test_account_id", gateway_url=server.url)
+            try:
+                delegate_id = next(iter(client.get_all_delegates()))
+                result = client.test_delegate_connectivity(delegate_id, ["github.com", "http://example.com:8080"])
+            finally:
+                client.close()
+
+        self.assertEqual(result["delegate"]["id"], delegate_id)
+        tests = result["connectivity_tests"]
+        self.assertEqual(list(tests), ["https://github.com", "http://example.com:8080"])
+        self.assertEqual((tests["http://example.com:8080"]["hostname"], tests["http://example.com:8080"]["port"]),
+                         ("example.com", 8080))
+        self.assertEqual(connectivity_commands(["a.io"])["https://a.io"]["port"], 443)
+
+if __name__ == '__main__':
+    unittest.main()
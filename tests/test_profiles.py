@@ -0,0 +1,108 @@
+"""Tests for profiles and running a command against several of them."""
+import json
+import os
+import tempfile
+import unittest
+from harness_debugger.profiles import _LineWriter, load_profiles, select_profiles
+from tests.stub_server import StubHarnessServer
+from tests.test_cli import _python
+
+class TestProfiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "profiles.ini")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, text):
+        with open(self.path, "w") as f:
+            f.write(text)
+
+    def test_load_and_select(self):
+        self._write("[prod]\naccount_id = a1\napi_key = k1\norg_id = o1\nrate_limit = delegates=5:10 default=20\n\n"
+                    "[staging]\naccount_id = a2\napi_key_env = TEST_PROFILES_KEY\n")
+        os.environ["TEST_PROFILES_KEY"] = "k2"
+        try:
+            profiles = load_profiles(self.path)
+        finally:
+            del os.environ["TEST_PROFILES_KEY"]
+
+        self.assertEqual(list(profiles), ["prod", "staging"])
+        self.assertEqual(profiles["prod"].rate_limits, ["delegates=5:10", "default=20"])
+        self.assertEqual(profiles["staging"].api_key, "k2")
+        self.assertIsNone(profiles["staging"].org_id)
+        self.assertEqual([profile.name for profile in select_profiles(profiles, ["staging", "prod", "staging"])],
+                         ["staging", "prod"])
+        self.assertEqual(len(select_profiles(profiles, None)), 2)
+        with self.assertRaisesRegex(ValueError, "Unknown profile"):
+            select_profiles(profiles, ["dev"])
+
+    def test_profiles_need_an_account_and_key(self):
+        self._write("[prod]\naccount_id = a1\napi_key_env = TEST_PROFILES_UNSET\n")
+        with self.assertRaisesRegex(ValueError, "needs account_id and api_key"):
+            load_profiles(self.path)
+        with self.assertRaisesRegex(ValueError, "Could not read"):
+            load_profiles(os.path.join(self.directory.name, "missing.ini"))
+
+    def test_line_writer_keeps_the_last_progress_redraw(self):
+        lines = []
+        writer = _LineWriter(lines.append)
+        writer.write("a\nb")
+        writer.write(" 10%\r b 100%\n\n")
+        writer.write("tail")
+        writer.close()
+
+        self.assertEqual(lines, ["a", " b 100%", "tail"])
+
+class TestProfilesCommand(unittest.TestCase):
+    def test_results_are_merged_and_tagged_and_failures_reported(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                StubHarnessServer(delegates=3) as prod, StubHarnessServer(delegates=2) as staging:
+            path = os.path.join(directory, "profiles.ini")
+            with open(path, "w") as f:
+                f.write(f"[prod]\naccount_id = a1\napi_key = k1\ngateway_url = {prod.url}\n\n"
+                        f"[staging]\naccount_id = a2\napi_key = k2\ngateway_url = {staging.url}\n\n"
+                        f"[down]\naccount_id = a3\napi_key = k3\ngateway_url = http://127.0.0.1:9\n")
+            env = {"HARNESS_DEBUGGER_CACHE_DIR": directory}
+            run = lambda *args: _python("-m", "harness_debugger.cli", "--profiles-file", path, "--max-retries", "0",
+                                        "--output", "ndjson", *args, env=env)
+            merged = run("--profiles", "prod,staging", "delegate", "list")
+            everything = run("--all-profiles", "delegate", "info", "delegate-00001")
+
+        self.assertEqual(merged.returncode, 0, merged.stderr)
+        records = [json.loads(line) for line in merged.stdout.splitlines()]
+        self.assertEqual(sorted((record["profile_name"], record["id"]) for record in records),
+                         [("prod", "delegate-00000"), ("prod", "delegate-00001"), ("prod", "delegate-00002"),
+                          ("staging", "delegate-00000"), ("staging", "delegate-00001")])
+        # Each profile's records keep their own order
+        self.assertEqual([record["id"] for record in records if record["profile_name"] == "prod"],
+                         ["delegate-00000", "delegate-00001", "delegate-00002"])
+
+        # One unreachable profile fails the run without holding back the others
+        self.assertEqual(everything.returncode, 1)
+        self.assertEqual(sorted(json.loads(line)["profile_name"] for line in everything.stdout.splitlines()),
+                         ["prod", "staging"])
+        self.assertIn("[down] ", everything.stderr)
+
+    def test_output_of_worker_threads_is_tagged_with_its_profile(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                StubHarnessServer(delegates=5, executions=6) as prod, StubHarnessServer(delegates=5) as staging:
+            # Delegate lookups fail, and are reported from the threads fetching prod's runs
+            prod.delegates.clear()
+            path = os.path.join(directory, "profiles.ini")
+            with open(path, "w") as f:
+                f.write(f"[prod]\naccount_id = a1\napi_key = k1\ngateway_url = {prod.url}\n\n"
+                        f"[staging]\naccount_id = a2\napi_key = k2\ngateway_url = {staging.url}\n")
+            result = _python("-m", "harness_debugger.cli", "--profiles-file", path, "--all-profiles", "--max-retries",
+                             "0", "pipeline", "check", "--pipeline", "pipeline-1", "--stage", "build",
+                             "--workers", "4", "--output-file", os.devnull,
+                             env={"HARNESS_DEBUGGER_CACHE_DIR": directory})
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        lookups = [line for line in result.stderr.splitlines() if "Error making API request for delegate info" in line]
+        self.assertEqual(len(lookups), 5)
+        self.assertTrue(all(line.startswith("[prod] ") for line in lookups), lookups)
+
+if __name__ == '__main__':
+    unittest.main()
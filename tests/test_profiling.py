@@ -0,0 +1,106 @@
+"""Tests for per-request instrumentation and the profile report."""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from harness_debugger.cache import ResponseCache
+from harness_debugger.client import HarnessClient
+from harness_debugger.profiling import RequestEvent, RequestProfiler
+from tests.stub_server import StubHarnessServer
+
+def make_event(endpoint, seconds, status=200, **fields):
+    event = RequestEvent(endpoint, "default")
+    event.status = status
+    event.seconds = seconds
+    for name, value in fields.items():
+        setattr(event, name, value)
+    return event
+
+class TestRequestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = RequestProfiler({"command": "delegate list"})
+        for seconds in (0.1, 0.2, 0.3, 0.4):
+            self.profiler(make_event("GET /a", seconds, bytes=100))
+        self.profiler(make_event("POST /b", 1.5, status=503, retries=2, error="HTTPError"))
+        self.profiler(make_event("GET /a", 0.0, status=None, cache_hit=True))
+
+    def test_summary_per_endpoint(self):
+        rows = self.profiler.summary()
+
+        self.assertEqual([row["endpoint"] for row in rows], ["POST /b", "GET /a"])
+        a = rows[1]
+        self.assertEqual((a["requests"], a["cache_hits"], a["bytes"], a["errors"]), (5, 1, 400, 0))
+        self.assertAlmostEqual(a["p50_ms"], 200.0)
+        self.assertAlmostEqual(a["max_ms"], 400.0)
+        self.assertAlmostEqual(a["time_share"], 0.4)
+        self.assertEqual((rows[0]["errors"], rows[0]["retries"]), (1, 2))
+
+    def test_prometheus_export(self):
+        exported = self.profiler.to_prometheus()
+
+        self.assertIn('harness_debugger_requests_total{command="delegate list",endpoint="GET /a",status="200"} 4', exported)
+        self.assertIn('harness_debugger_requests_total{command="delegate list",endpoint="GET /a",status="cached"} 1', exported)
+        self.assertIn('harness_debugger_request_duration_seconds_count{command="delegate list",endpoint="POST /b"} 1', exported)
+        self.assertIn('harness_debugger_request_retries_total{command="delegate list",endpoint="POST /b"} 2', exported)
+
+    def test_json_export(self):
+        exported = json.loads(self.profiler.to_json())
+
+        self.assertEqual(exported["labels"], {"command": "delegate list"})
+        self.assertEqual(len(exported["endpoints"]), 2)
+
+class TestClientInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.server = StubHarnessServer(delegates=30).start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.events = []
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def _client(self, **kwargs):
+        return HarnessClient(api_key="test_api_key", account_id="test_account_id", gateway_url=self.server.url,
+                             backoff_factor=0.01, on_request=self.events.append, **kwargs)
+
+    def test_events_record_endpoint_status_bytes_and_retries(self):
+        self.server.inject(503)
+        with self._client() as client:
+            delegates = list(client.iter_delegates(page_size=10))
+            client.get_delegate_info("delegate-00001")
+
+        self.assertEqual(len(delegates), 30)
+        listing = [event for event in self.events if event.endpoint == "POST /ng/api/delegate-setup"]
+        self.assertEqual(len(listing), 3)
+        self.assertEqual(sum(event.retries for event in listing), 1)
+        self.assertTrue(all(event.status == 200 and event.bytes > 0 for event in listing))
+        self.assertEqual(self.events[-1].endpoint, "GET /api/setup/delegates/{id}")
+        self.assertEqual(self.events[-1].endpoint_class, "delegates")
+
+    def test_cache_hits_are_reported(self):
+        cache = ResponseCache(os.path.join(self.tmpdir.name, "cache.sqlite3"))
+        with self._client(cache=cache) as client:
+            client.get_delegate_info("delegate-00001")
+            client.get_delegate_info("delegate-00001")
+
+        self.assertEqual([event.cache_hit for event in self.events], [False, True])
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_failed_calls_are_reported(self):
+        with self._client() as client:
+            client.get_delegate_info("missing")
+
+        self.assertEqual(len(self.events), 1)
+        self.assertIsNotNone(self.events[0].error)
+
+    def test_api_key_is_never_printed(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self._client() as client:
+            client.get_all_delegates()
+
+        self.assertNotIn("test_api_key", stderr.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Tests for compact API record types."""
+import io
+import json
+import unittest
+from harness_debugger.records import DelegateRecord, format_epoch_ms
+from harness_debugger.utils.formatting import write_ndjson
+from tests.stub_server import make_delegate
+
+class TestDelegateRecord(unittest.TestCase):
+    def test_both_api_spellings_of_the_heartbeat(self):
+        listed = make_delegate(3)
+        del listed["lastHeartBeat"]
+        single = make_delegate(3)
+        del single["lastHeartbeat"]
+
+        self.assertEqual(DelegateRecord.from_api(listed), DelegateRecord.from_api(single))
+        self.assertEqual(DelegateRecord.from_api(listed).last_heartbeat_ms, 1700000003000)
+
+    def test_reads_like_the_old_delegate_dict(self):
+        record = DelegateRecord.from_api(make_delegate(7))
+
+        self.assertEqual(record["id"], "delegate-00007")
+        self.assertEqual(record.get("labels", []), ["pool-2", "shared"])
+        self.assertEqual(record.get("missing", "default"), "default")
+        self.assertEqual(record["last_heartbeat"], format_epoch_ms(1700000007000))
+        self.assertEqual(dict(record), record.to_dict())
+        self.assertEqual(list(record.to_dict()), list(DelegateRecord.FIELDS))
+        with self.assertRaises(KeyError):
+            record["missing"]
+
+    def test_missing_timestamps(self):
+        record = DelegateRecord.from_api({"uuid": "d1"})
+
+        self.assertEqual(record.last_heartbeat, "Unknown")
+        self.assertIsNone(record.to_dict(numeric_timestamps=True)["connected_at"])
+
+    def test_json_output_with_numeric_timestamps(self):
+        record = DelegateRecord.from_api(make_delegate(1))
+        stream = io.StringIO()
+        write_ndjson([record, {"delegate_info": record}], stream, numeric_timestamps=True)
+
+        first, second = map(json.loads, stream.getvalue().splitlines())
+        self.assertEqual(first["last_heartbeat"], 1700000001000)
+        self.assertEqual(first["connected_at"], 1690000001000)
+        self.assertEqual(second["delegate_info"], first)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""Tests for command deadlines, request timeouts and circuit breakers."""
+import os
+import tempfile
+import time
+import unittest
+from harness_debugger.client import HarnessClient
+from harness_debugger.errors import CircuitOpenError, DeadlineExceeded
+from harness_debugger.resilience import CircuitBreaker, CircuitBreakers, Deadline
+from harness_debugger.scheduler import RequestScheduler
+from harness_debugger.utils.constants import EXIT_INCOMPLETE
+from tests.stub_server import StubHarnessServer
+from tests.test_cli import _python
+
+class TestDeadline(unittest.TestCase):
+    def test_listing_stops_at_the_deadline_with_what_it_has(self):
+        with StubHarnessServer(delegates=2000, latency=0.3) as server:
+            with HarnessClient(api_key="k", account_id="a", gateway_url=server.url) as client:
+                client.set_deadline(1.0)
+                started = time.monotonic()
+                delegates = list(client.stream_delegates(page_size=100, max_workers=4))
+                elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 1.5)
+        self.assertTrue(0 < len(delegates) < 2000, len(delegates))
+        self.assertEqual(client.incomplete_reasons(), ["the 1s deadline ran out"])
+
+    def test_scheduler_stops_waiting_at_the_deadline(self):
+        scheduler = RequestScheduler({"default": (0.5, 1)})
+        scheduler.release(scheduler.acquire("default"))
+
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            scheduler.acquire("default", Deadline(0.1))
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(scheduler.stats()["default"]["queued"], 0)
+
+    def test_cli_marks_partial_output_and_exits_incomplete(self):
+        with StubHarnessServer(delegates=300, latency=0.4) as server:
+            result = _python("-m", "harness_debugger.cli", "--no-cache", "--deadline", "0.6",
+                             "delegate", "list",
+                             env={"HARNESS_API_KEY": "k", "HARNESS_ACCOUNT_ID": "a",
+                                  "HARNESS_GATEWAY_URL": server.url})
+
+        self.assertEqual(result.returncode, EXIT_INCOMPLETE, result.stderr)
+        self.assertIn("delegate-00000", result.stdout)
+        self.assertNotIn("delegate-00299", result.stdout)
+        self.assertIn("Results are incomplete: the 0.6s deadline ran out", result.stdout)
+
+    def test_deadline_during_pipeline_check_is_not_reported_as_missing_delegates(self):
+        with StubHarnessServer(delegates=5, executions=6, latency=0.3) as server, \
+                tempfile.TemporaryDirectory() as directory:
+            result = _python("-m", "harness_debugger.cli", "--no-cache", "--deadline", "0.8",
+                             "pipeline", "check", "--pipeline", "pipeline-1", "--stage", "build",
+                             "--output-file", os.path.join(directory, "output.txt"),
+                             env={"HARNESS_API_KEY": "k", "HARNESS_ACCOUNT_ID": "a",
+                                  "HARNESS_GATEWAY_URL": server.url})
+
+        self.assertEqual(result.returncode, EXIT_INCOMPLETE, result.stderr)
+        self.assertNotIn("Error getting delegate info", result.stderr)
+        self.assertIn("Stopped listing pipeline executions: the 0.8s deadline ran out", result.stderr)
+        self.assertIn("Results are incomplete: the 0.8s deadline ran out", result.stdout)
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_repeated_failures_and_lets_one_trial_through(self):
+        breaker = CircuitBreaker("GET /x", threshold=2, cooldown=0.1)
+        breaker.record(ok=False)
+        breaker.before_call()
+        breaker.record(ok=False)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        time.sleep(0.15)
+        self.assertTrue(breaker.before_call())
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record(ok=True, trial=True)
+        self.assertFalse(breaker.before_call())
+        self.assertEqual(breaker.rejected, 2)
+
+    def test_trial_that_says_nothing_lets_the_next_call_try(self):
+        breaker = CircuitBreaker("GET /x", threshold=1, cooldown=0.05)
+        breaker.record(ok=False)
+        time.sleep(0.1)
+
+        trial = breaker.before_call()
+        # e.g. the trial got a 429
+        breaker.record(ok=None, trial=trial)
+        trial = breaker.before_call()
+        breaker.record(ok=False, trial=trial)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        self.assertEqual(breaker.failures, 2)
+
+    def test_only_the_trial_call_ends_the_trial(self):
+        breaker = CircuitBreaker("GET /x", threshold=1, cooldown=0.05)
+        straggler = breaker.before_call()
+        breaker.record(ok=False)
+        time.sleep(0.1)
+
+        self.assertTrue(breaker.before_call())
+        # A call admitted before the circuit opened reports a 429 while the trial is in flight
+        breaker.record(ok=None, trial=straggler)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record(ok=True, trial=True)
+        self.assertFalse(breaker.before_call())
+
+    def test_deadline_timeouts_do_not_count_as_failures(self):
+        with StubHarnessServer(delegates=3, latency=0.5) as server:
+            with HarnessClient(api_key="k", account_id="a", gateway_url=server.url,
+                               breakers=CircuitBreakers(threshold=1)) as client:
+                client.set_deadline(0.2)
+                with self.assertRaises(DeadlineExceeded):
+                    client.get_delegate_info("delegate-00001")
+                breaker = client.breakers.get("GET /api/setup/delegates/{id}")
+
+        self.assertEqual(breaker.failures, 0)
+        self.assertFalse(breaker.trial)
+        self.assertEqual(client.incomplete_reasons(), ["the 0.2s deadline ran out"])
+
+    def test_failing_endpoint_is_refused_without_calling_it(self):
+        with StubHarnessServer(delegates=3) as server:
+            server.inject(503, count=100)
+            with HarnessClient(api_key="k", account_id="a", gateway_url=server.url, max_retries=1,
+                               backoff_factor=0, breakers=CircuitBreakers(threshold=4)) as client:
+                for _ in range(2):
+                    self.assertEqual(client.get_delegate_info("delegate-00001"), {})
+                # Two calls of two attempts each open the circuit; the rest never reach the gateway
+                for _ in range(3):
+                    with self.assertRaises(CircuitOpenError):
+                        client.get_delegate_info("delegate-00001")
+                self.assertEqual(server.request_count, 4)
+                self.assertEqual(client.incomplete_reasons(),
+                                 ["3 calls refused by open circuit breakers (GET /api/setup/delegates/{id})"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Tests for batched delegate resolution."""
+import threading
+import time
+import unittest
+from harness_debugger.client import HarnessClient
+from harness_debugger.resolver import DelegateResolver
+from tests.stub_server import StubHarnessServer
+
+def _delegate(delegate_id):
+    return {"id": delegate_id, "name": delegate_id, "labels": []}
+
+class TestDelegateResolver(unittest.TestCase):
+    def setUp(self):
+        self.fetched = []
+        self.listings = 0
+    
+    def _fetch_one(self, delegate_id):
+        self.fetched.append(delegate_id)
+        time.sleep(0.05)
+        return _delegate(delegate_id) if delegate_id != "missing" else {}
+    
+    def _fetch_all(self):
+        self.listings += 1
+        return iter([_delegate(f"d{i}") for i in range(100)])
+    
+    def test_lookups_are_deduplicated_and_remembered(self):
+        resolver = DelegateResolver(self._fetch_one, self._fetch_all)
+        
+        first = resolver.resolve(["d1", "d1", "d2", None])
+        second = resolver.resolve(["d2", "d1"])
+        
+        self.assertEqual(set(first), {"d1", "d2"})
+        self.assertEqual(first, second)
+        self.assertEqual(sorted(self.fetched), ["d1", "d2"])
+        self.assertEqual(resolver.stats()["hits"], 2)
+    
+    def test_concurrent_lookups_share_one_call(self):
+        resolver = DelegateResolver(self._fetch_one, self._fetch_all)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resolver.resolve(["d7"])))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.fetched, ["d7"])
+        self.assertTrue(all(result == {"d7": _delegate("d7")} for result in results))
+    
+    def test_large_batches_use_one_listing(self):
+        resolver = DelegateResolver(self._fetch_one, self._fetch_all, bulk_threshold=5)
+        
+        resolved = resolver.resolve([f"d{i}" for i in range(20)] + ["missing"])
+        resolver.resolve([f"d{i}" for i in range(20, 60)])
+        
+        self.assertEqual(self.listings, 1)
+        self.assertEqual(self.fetched, ["missing"])
+        self.assertEqual(resolved["missing"], {})
+        self.assertEqual(resolved["d3"], _delegate("d3"))
+    
+    def test_lru_is_bounded(self):
+        resolver = DelegateResolver(self._fetch_one, self._fetch_all, max_entries=2)
+        resolver.resolve(["d1"])
+        resolver.resolve(["d2"])
+        resolver.resolve(["d1"])
+        resolver.resolve(["d3"])
+        resolver.resolve(["d1", "d2"])
+        
+        self.assertEqual(self.fetched, ["d1", "d2", "d3", "d2"])
+
+class TestFailedRunDelegateResolution(unittest.TestCase):
+    def test_scan_resolves_each_delegate_once(self):
+        with StubHarnessServer(delegates=4, executions=300) as server:
+            with HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                               gateway_url=server.url) as client:
+                runs = list(client.get_failed_runs("build", "pipeline-1", days=1))
+            
+            delegate_lookups = server.request_count - len(runs) - 1
+        
+        self.assertEqual(len(runs), 100)
+        self.assertLessEqual(delegate_lookups, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+"""Tests for the rate-limit-aware request scheduler."""
+import asyncio
+import threading
+import time
+import unittest
+from harness_debugger.async_client import AsyncHarnessClient, aiohttp
+from harness_debugger.client import HarnessClient
+from harness_debugger.scheduler import RequestScheduler, TokenBucket, parse_retry_after
+from tests.stub_server import StubHarnessServer
+
+class TestRequestScheduler(unittest.TestCase):
+    def test_token_bucket_limits_rate_after_burst(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        now = bucket.updated
+
+        self.assertEqual(bucket.take(now), 0)
+        self.assertEqual(bucket.take(now), 0)
+        self.assertAlmostEqual(bucket.take(now), 0.1)
+        self.assertEqual(bucket.take(now + 0.11), 0)
+
+    def test_rate_limit_is_per_endpoint_class(self):
+        scheduler = RequestScheduler({"delegates": (20, 1)})
+        started = time.monotonic()
+        for _ in range(5):
+            scheduler.release(scheduler.acquire("delegates"))
+        for _ in range(5):
+            scheduler.release(scheduler.acquire("connectors"))
+
+        stats = scheduler.stats()
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+        self.assertGreater(stats["delegates"]["total_wait"], 0.15)
+        self.assertLess(stats["connectors"]["total_wait"], 0.05)
+
+    def test_concurrency_backs_off_on_429_and_recovers(self):
+        scheduler = RequestScheduler(max_concurrency=8)
+        slot = scheduler.acquire("default")
+        slot.status = 429
+        scheduler.release(slot)
+        self.assertEqual(scheduler.stats()["default"]["concurrency_limit"], 4)
+
+        for _ in range(4 + 5):
+            slot = scheduler.acquire("default")
+            slot.status = 200
+            scheduler.release(slot)
+        self.assertEqual(scheduler.stats()["default"]["concurrency_limit"], 6)
+
+    def test_threads_never_exceed_concurrency_limit(self):
+        scheduler = RequestScheduler(max_concurrency=3)
+        in_flight, peak, lock = [0], [0], threading.Lock()
+
+        def work():
+            with scheduler.slot("default") as slot:
+                with lock:
+                    in_flight[0] += 1
+                    peak[0] = max(peak[0], in_flight[0])
+                time.sleep(0.01)
+                with lock:
+                    in_flight[0] -= 1
+                slot.status = 200
+
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = scheduler.stats()["default"]
+        self.assertEqual(peak[0], 3)
+        self.assertEqual(stats["requests"], 20)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertGreater(stats["max_queued"], 1)
+
+    def test_async_acquire_waits_for_a_release_without_polling(self):
+        scheduler = RequestScheduler({"default": (5, 1)}, max_concurrency=1)
+        attempts = []
+        try_acquire = scheduler._try_acquire
+        scheduler._try_acquire = lambda state: attempts.append(state) or try_acquire(state)
+        held = scheduler.acquire("default")
+        threading.Timer(0.2, scheduler.release, [held]).start()
+
+        async def acquire():
+            started = time.monotonic()
+            # Woken by the release from the timer thread, then waits exactly for the next token
+            scheduler.release(await scheduler.acquire_async("default"))
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(acquire())
+        self.assertGreaterEqual(elapsed, 0.19)
+        self.assertLess(elapsed, 0.3)
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(scheduler.stats()["default"]["in_flight"], 0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("2"), 2.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+class TestThrottledClient(unittest.TestCase):
+    def setUp(self):
+        self.server = StubHarnessServer(delegates=5).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_429_is_retried_after_retry_after(self):
+        scheduler = RequestScheduler()
+        client = HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                               gateway_url=self.server.url, scheduler=scheduler)
+        self.server.throttle(2, retry_after=0.2)
+        started = time.monotonic()
+        with client:
+            delegate = client.get_delegate_info("delegate-00001")
+
+        self.assertEqual(delegate.get("id"), "delegate-00001")
+        self.assertGreaterEqual(time.monotonic() - started, 0.4)
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(scheduler.stats()["delegates"]["throttled"], 2)
+
+    def test_non_idempotent_calls_are_retried_on_429(self):
+        client = HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                               gateway_url=self.server.url)
+        self.server.throttle(1)
+        with client:
+            delegates = client.get_all_delegates()
+
+        self.assertEqual(len(delegates), 5)
+        self.assertEqual(self.server.throttled_count, 1)
+
+    def test_injected_server_errors_are_retried_for_reads(self):
+        client = HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                               gateway_url=self.server.url, backoff_factor=0.01)
+        self.server.inject(503, 2)
+        with client:
+            delegate = client.get_delegate_info("delegate-00003")
+
+        self.assertEqual(delegate.get("id"), "delegate-00003")
+        self.assertEqual(self.server.error_count, 2)
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_random_failures_are_reproducible(self):
+        def failures(seed):
+            with StubHarnessServer(throttle_rate=0.3, error_rate=0.3, seed=seed) as server:
+                return [server.take_injected() for _ in range(20)]
+
+        self.assertEqual(failures(1), failures(1))
+        self.assertIn((429, 0), failures(1))
+        self.assertIn((503, None), failures(1))
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_scheduler_is_shared_with_async_client(self):
+        scheduler = RequestScheduler()
+        sync_client = HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                    gateway_url=self.server.url, scheduler=scheduler)
+        self.server.throttle(1, retry_after=0.2)
+
+        async def lookup():
+            async with AsyncHarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                          gateway_url=self.server.url, scheduler=scheduler) as client:
+                return await client.get_delegate_info("delegate-00002")
+
+        with sync_client:
+            sync_client.get_delegate_info("delegate-00001")
+        delegate = asyncio.run(lookup())
+
+        self.assertEqual(delegate.get("id"), "delegate-00002")
+        self.assertEqual(scheduler.stats()["delegates"]["requests"], 3)
+        self.assertEqual(scheduler.stats()["delegates"]["throttled"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
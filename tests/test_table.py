@@ -0,0 +1,67 @@
+"""Tests for the streaming table renderer."""
+import io
+import unittest
+from colorama import Fore
+from tabulate import tabulate
+from harness_debugger.utils.table import StreamingTable, _visible_width
+
+HEADERS = ["Name", "ID", "Status", "Labels"]
+
+def make_rows(count):
+    return [[f"delegate-{i}", f"id-{i:05d}", f"{Fore.GREEN}ENABLED{Fore.RESET}", ", ".join(["pool", "shared"][:i % 3])]
+            for i in range(count)]
+
+class TestStreamingTable(unittest.TestCase):
+    def test_small_tables_match_tabulate_pretty(self):
+        rows = make_rows(7) + [["x", None, "DISABLED", ""]]
+        stream = io.StringIO()
+
+        count = StreamingTable(HEADERS, stream=stream).write(rows)
+
+        self.assertEqual(count, 8)
+        self.assertEqual(stream.getvalue(), tabulate(rows, headers=HEADERS, tablefmt="pretty") + "\n")
+
+    def test_rows_after_the_sample_are_printed_as_they_arrive(self):
+        stream = io.StringIO()
+        lines_before = []
+
+        def rows():
+            for row in make_rows(10):
+                lines_before.append(len(stream.getvalue().splitlines()))
+                yield row
+            yield ["a-much-longer-delegate-name", "id", "ENABLED", ""]
+
+        titles = []
+        count = StreamingTable(HEADERS, stream=stream, sample_size=3).write(
+            rows(), title=lambda count: titles.append(count) or "Delegates:")
+
+        self.assertEqual(count, 11)
+        self.assertEqual(titles, [None])
+        # The title, header and the 3 sampled rows were out before the 5th row was produced
+        self.assertEqual(lines_before[4], 1 + 3 + 3 + 1)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len({_visible_width(line) for line in lines[1:]}), 1)
+        self.assertTrue(lines[-2].startswith("| a-much-lo… |"))
+
+    def test_fixed_widths_without_sampling(self):
+        stream = io.StringIO()
+
+        StreamingTable(HEADERS, stream=stream, sample_size=0, max_width=8).write(make_rows(2))
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[0], "+" + "+".join(["-" * 10] * 4) + "+")
+        self.assertTrue(lines[3].startswith("| delegat… | id-00000 |"))
+
+    def test_complete_results_report_their_count_and_empty_results_print_nothing(self):
+        stream = io.StringIO()
+        titles = []
+
+        StreamingTable(HEADERS, stream=stream).write(make_rows(2), title=lambda count: titles.append(count) or "")
+        empty = io.StringIO()
+        count = StreamingTable(HEADERS, stream=empty).write(iter([]))
+
+        self.assertEqual(titles, [2])
+        self.assertEqual((count, empty.getvalue()), (0, ""))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Tests for incremental pipeline watching."""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from harness_debugger.client import HarnessClient
+from harness_debugger.commands.pipeline import watch_pipeline
+from harness_debugger.watch_state import WatchState
+from tests.stub_server import StubHarnessServer, make_execution
+
+class TestPipelineWatch(unittest.TestCase):
+    def setUp(self):
+        self.server = StubHarnessServer(delegates=10, executions=30).start()
+        self.client = HarnessClient(api_key="test_api_key", account_id="test_account_id",
+                                    gateway_url=self.server.url)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.args = argparse.Namespace(
+            pipeline="pipeline-1", stage="build", days=1, workers=4, interval=0, lookback=0, once=True,
+            output="ndjson", timestamps="text", state_file=os.path.join(self.tmpdir.name, "state.json"),
+            output_file=os.path.join(self.tmpdir.name, "output.txt"))
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def _poll(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            self.assertEqual(watch_pipeline(self.args, self.client), 0)
+        return [json.loads(line)["execution_id"] for line in stdout.getvalue().splitlines()]
+
+    def _output_variables(self):
+        with open(self.args.output_file) as f:
+            return dict(line.strip().split("=", 1) for line in f)
+
+    def test_first_poll_reports_the_whole_window(self):
+        emitted = self._poll()
+
+        self.assertEqual(len(emitted), 10)
+        self.assertEqual(emitted[0], "exec-00000")
+        self.assertEqual(self._output_variables()["FAILED_RUNS_COUNT"], "10")
+
+    def test_later_polls_only_fetch_new_failures(self):
+        self._poll()
+        self.server.reset_counters()
+
+        self.assertEqual(self._poll(), [])
+        self.assertEqual(self.server.request_count, 1)
+
+        now_ms = int(time.time() * 1000)
+        self.server.executions.insert(0, make_execution(999, self.server.delegates, now_ms + 1000 * 60000))
+        self.server.reset_counters()
+
+        self.assertEqual(self._poll(), ["exec-00999"])
+        self.assertEqual(self.server.request_count, 2)
+        variables = self._output_variables()
+        self.assertEqual(variables["FAILED_RUNS_COUNT"], "11")
+        self.assertEqual(variables["LAST_FAILED_RUN_ID"], "exec-00999")
+
+    def test_mark_survives_restarts(self):
+        self._poll()
+        key = WatchState.key(("test_account_id", "", ""), "pipeline-1", "build")
+        mark = WatchState(self.args.state_file).mark(key)
+
+        self.assertIsNotNone(mark.since_ms)
+        self.assertEqual(len(mark.seen), 10)
+        self.assertEqual(mark.last_run["execution_id"], "exec-00000")
+
+    def test_unreadable_state_starts_over(self):
+        for content in ('{"pipeline-1": {"since_ms": 12', '[]', '{"key": {"unknown": 1}}'):
+            with self.subTest(content=content):
+                with open(self.args.state_file, "w") as f:
+                    f.write(content)
+                stderr = io.StringIO()
+                with redirect_stderr(stderr):
+                    self.assertEqual(len(self._poll()), 10)
+
+                self.assertIn("Ignoring unreadable watch state", stderr.getvalue())
+                with open(self.args.state_file) as f:
+                    self.assertEqual(len(json.load(f)), 1)
+                # Rewritten through a temporary file, none of which is left behind
+                self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ["output.txt", "state.json"])
+
+    def test_failed_poll_keeps_the_mark(self):
+        self.client.max_retries = 0
+        self.client.pipeline_url = "http://127.0.0.1:9/pipeline/api"
+        with redirect_stderr(io.StringIO()):
+            self.assertEqual(self._poll(), [])
+
+        key = WatchState.key(("test_account_id", "", ""), "pipeline-1", "build")
+        self.assertIsNone(WatchState(self.args.state_file).mark(key).since_ms)
+
+if __name__ == '__main__':
+    unittest.main()